@@ -1,16 +1,143 @@
 # app/core/database.py
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-# تنظیمات دیتابیس
-DATABASE_URL = "sqlite:///./basij.db"  # تغییر نام فایل برای مشخص‌تر بودن
+# تنظیمات دیتابیس (از متغیرهای محیطی خوانده می‌شود)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./basij.db")  # تغییر نام فایل برای مشخص‌تر بودن
+DB_PROFILE = os.getenv("DB_PROFILE", "sqlite-dev")  # sqlite-dev / sqlite-prod / postgres
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")  # فقط برای دیباگ
+
+# درایورهای async متناظر با هر درایور sync
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# پروفایل‌های engine
+ENGINE_PROFILES = {
+    # رفتار قبلی: SQLite ساده بدون تنظیمات اضافه
+    "sqlite-dev": {
+        "connect_args": {"check_same_thread": False},  # برای SQLite ضروری است
+        "pragmas": {},
+    },
+    # SQLite برای production: WAL و pragmaهای کارایی روی هر اتصال
+    "sqlite-prod": {
+        "connect_args": {"check_same_thread": False},
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+            "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -64000)),  # منفی یعنی KiB
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),  # میلی‌ثانیه
+        },
+    },
+    # PostgreSQL با connection pool
+    "postgres": {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": True,
+        "statement_timeout_ms": int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000)),
+    },
+}
+
+
+def _set_sqlite_pragmas(engine, pragmas: dict):
+    """اجرای pragmaهای SQLite روی هر اتصال جدید."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def engine_options(profile: str, is_async: bool = False) -> tuple:
+    """
+    تبدیل یک پروفایل به آرگومان‌های create_engine.
+
+    Returns:
+        (kwargs, pragmas): آرگومان‌های engine و pragmaهای SQLite
+    """
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"پروفایل دیتابیس '{profile}' تعریف نشده است")
+
+    options = dict(ENGINE_PROFILES[profile])
+    pragmas = options.pop("pragmas", {})
+
+    if is_async:
+        # aiosqlite اتصال را در thread خودش نگه می‌دارد
+        options.pop("connect_args", None)
+
+    statement_timeout = options.pop("statement_timeout_ms", None)
+    if statement_timeout:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(statement_timeout)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+
+    return options, pragmas
+
+
+def to_async_url(url: str) -> str:
+    """تبدیل آدرس sync به آدرس با درایور async (مثلاً sqlite → sqlite+aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername == backend and backend in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_db_engine(url: str = None, profile: str = None, echo: bool = None):
+    """
+    ساخت engine بر اساس پروفایل.
+
+    Args:
+        url: آدرس دیتابیس (پیش‌فرض DATABASE_URL)
+        profile: نام پروفایل (پیش‌فرض DB_PROFILE)
+        echo: چاپ کوئری‌ها (پیش‌فرض DB_ECHO)
+    """
+    options, pragmas = engine_options(profile or DB_PROFILE)
+
+    new_engine = create_engine(
+        url or DATABASE_URL,
+        echo=DB_ECHO if echo is None else echo,
+        **options
+    )
+
+    if pragmas:
+        _set_sqlite_pragmas(new_engine, pragmas)
+
+    return new_engine
+
+
+def create_async_db_engine(url: str = None, profile: str = None, echo: bool = None):
+    """
+    ساخت AsyncEngine با همان پروفایل‌های create_db_engine.
+    """
+    options, pragmas = engine_options(profile or DB_PROFILE, is_async=True)
+
+    new_engine = create_async_engine(
+        to_async_url(url or DATABASE_URL),
+        echo=DB_ECHO if echo is None else echo,
+        **options
+    )
+
+    if pragmas:
+        _set_sqlite_pragmas(new_engine.sync_engine, pragmas)
+
+    return new_engine
+
 
 # ایجاد engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # برای SQLite ضروری است
-    echo=True  # اضافه کردن echo برای دیباگ - در production غیرفعال کنید
-)
+engine = create_db_engine()
+async_engine = create_async_db_engine()
 
 # ایجاد session factory
 SessionLocal = sessionmaker(
@@ -19,15 +146,31 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# session factory برای مسیرهای async
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class برای مدل‌ها
 Base = declarative_base()
 
 
+def get_dialect_name(executor) -> str:
+    """نام dialect برای Engine، Connection یا Session (sync یا async)"""
+    dialect = getattr(executor, "dialect", None)
+    if dialect is None:
+        dialect = executor.get_bind().dialect
+    return dialect.name
+
+
 # تابع کمکی برای ایجاد دیتابیس
 def create_database():
     """ایجاد همه جداول در دیتابیس"""
     Base.metadata.create_all(bind=engine)
-    print(f"✅ دیتابیس در {DATABASE_URL} ایجاد شد")
+    print(f"✅ دیتابیس در {DATABASE_URL} ایجاد شد (پروفایل: {DB_PROFILE})")
 
 
 # تابع کمکی برای دیدن جداول ایجاد شده
@@ -45,4 +188,4 @@ def show_tables():
         for column in columns:
             print(f"    ├─ {column['name']}: {column['type']}")
 
-    return tables
\ No newline at end of file
+    return tables
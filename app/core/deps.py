@@ -1,7 +1,8 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal, SessionLocal
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -13,12 +14,23 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency برای session دیتابیس async."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # تعریف ساده Aliases - همه با پرانتز استفاده شوند
 def DBDep() -> Session:
     """Alias برای Depends(get_db)."""
     return Depends(get_db)
 
 
+def AsyncDBDep() -> AsyncSession:
+    """Alias برای Depends(get_async_db)."""
+    return Depends(get_async_db)
+
+
 def CurrentUser():
     """Alias برای Depends(get_current_user)."""
     from app.core.security import get_current_user
@@ -0,0 +1,83 @@
+# app/core/etag.py
+"""
+ETag ضعیف و GET شرطی (If-None-Match → 304) برای endpointهای خواندنی.
+
+ETag از نوع موجودیت، id و updated_at ساخته می‌شود؛ پس بدون ساختن JSON پاسخ
+(و در /student/me و /users/me حتی بدون کوئری، از روی Principal کش شده)
+می‌توان فهمید که کلاینت نسخه فعلی را دارد.
+
+CURRENT_TIMESTAMP در SQLite دقت ثانیه دارد و دو تغییر در یک ثانیه ETag یکسان
+می‌ساختند؛ برای همین stamp_updated_at روی User و StudentProfile ثبت شده و
+updated_at را با دقت میکروثانیه در پایتون مقداردهی می‌کند.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import object_session
+
+# با تغییر شکل پاسخ‌ها افزایش یابد تا ETagهای قبلی نامعتبر شوند
+ETAG_VERSION = "2"
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(kind: str, entity_id: Optional[int], updated_at: Optional[datetime], *extra) -> str:
+    """ETag ضعیف از (نوع، id، updated_at) بدون افشای مقادیر"""
+    stamp = updated_at.isoformat() if updated_at else ""
+    raw = ":".join(str(part) for part in (ETAG_VERSION, kind, entity_id, stamp, *extra))
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=10).hexdigest()}"'
+
+
+def _opaque(tag: str) -> str:
+    """مقایسه ضعیف: W/ نادیده گرفته می‌شود"""
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """آیا If-None-Match درخواست شامل این ETag (یا *) است؟"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in header.split(","))
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    افزودن ETag به پاسخ؛ اگر کلاینت همین نسخه را دارد پاسخ 304 برمی‌گرداند
+
+    استفاده در endpoint:
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+    """
+    headers = {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def principal_etag(principal) -> str:
+    """ETag اطلاعات هویتی کاربر همراه با خلاصه پروفایل (/users/me و /auth/me)"""
+    return make_etag("user", principal.id, principal.updated_at, principal.profile_updated_at)
+
+
+def profile_etag(principal) -> str:
+    """ETag پروفایل دانشجویی کاربر (/student/me) بدون خواندن ردیف پروفایل"""
+    return make_etag("profile", principal.profile_id, principal.profile_updated_at)
+
+
+def stamp_updated_at(mapper, connection, target):
+    """
+    listener before_update: مقداردهی updated_at با دقت میکروثانیه
+
+    (به جای onupdate=func.now() که در SQLite فقط دقت ثانیه دارد)
+    """
+    session = object_session(target)
+    if session is None or session.is_modified(target, include_collections=False):
+        target.updated_at = datetime.now(timezone.utc)
@@ -0,0 +1,192 @@
+# app/core/hashing.py
+"""
+سرویس هش رمز عبور با ProcessPoolExecutor.
+
+bcrypt برای هر هش/تأیید ده‌ها میلی‌ثانیه CPU مصرف می‌کند؛ اجرای آن داخل
+handlerهای async باعث قفل شدن event loop می‌شود. این ماژول کار را به
+پردازه‌های جداگانه می‌فرستد و با یک صف محدود جلوی انباشت درخواست‌ها را می‌گیرد.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# تعداد پردازه‌ها (۰ = اجرای مستقیم در همان پردازه، مثل قبل)
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", os.cpu_count() or 1))
+# حداکثر کارهای در حال انتظار/اجرا؛ بیشتر از این باید منتظر بماند
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", max(HASH_POOL_WORKERS, 1) * 8))
+# حداکثر زمان انتظار برای گرفتن جا در صف (ثانیه)
+HASH_POOL_QUEUE_TIMEOUT = float(os.getenv("HASH_POOL_QUEUE_TIMEOUT", 5))
+# هش گروهی: حداکثر کار در صف pool به ازای هر worker (بقیه منتظر می‌مانند)
+HASH_BATCH_SLICE = int(os.getenv("HASH_BATCH_SLICE", 2))
+
+# الگوریتم و هزینه هش (با app/scripts/calibrate_password_hashing.py انتخاب شود)
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "bcrypt")  # bcrypt / argon2
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))  # KiB
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+
+try:
+    import argon2  # noqa: F401  (argon2-cffi)
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+
+def build_crypt_context(
+        scheme: str = PASSWORD_SCHEME,
+        bcrypt_rounds: int = BCRYPT_ROUNDS,
+        argon2_memory_cost: int = ARGON2_MEMORY_COST,
+        argon2_time_cost: int = ARGON2_TIME_COST,
+        argon2_parallelism: int = ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    ساخت CryptContext با پارامترهای مشخص.
+
+    الگوریتم اول برای هش‌های جدید استفاده می‌شود و بقیه deprecated هستند؛
+    هش‌هایی که الگوریتم یا پارامترشان با تنظیمات فعلی فرق دارد needs_update
+    می‌شوند و هنگام ورود موفق دوباره هش می‌شوند.
+    """
+    if scheme not in ("bcrypt", "argon2"):
+        raise ValueError(f"الگوریتم هش '{scheme}' پشتیبانی نمی‌شود")
+    if scheme == "argon2" and not ARGON2_AVAILABLE:
+        raise RuntimeError("برای argon2 باید بسته argon2-cffi نصب شود")
+
+    schemes = [scheme]
+    if scheme != "bcrypt":
+        schemes.append("bcrypt")
+    elif ARGON2_AVAILABLE:
+        schemes.append("argon2")
+
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__rounds=argon2_time_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_crypt_context()
+
+
+# این توابع در پردازه‌های worker اجرا می‌شوند (باید در سطح ماژول باشند)
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """هش و تأیید رمز عبور به صورت awaitable با backpressure."""
+
+    def __init__(
+            self,
+            workers: int = HASH_POOL_WORKERS,
+            max_pending: int = HASH_POOL_MAX_PENDING,
+            queue_timeout: float = HASH_POOL_QUEUE_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+        self.rejected = 0
+        self.batch_hashed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # هش گروهی از threadهای دیگر هم pool را می‌خواهد
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="سرور مشغول است، لطفاً چند لحظه دیگر تلاش کنید",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple:
+        """(صحت رمز، هش جدید یا None اگر هش فعلی به‌روز است)"""
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        هش گروهی روی همان pool (همگام؛ برای ورود گروهی در thread یا اسکریپت).
+
+        رمزها در برش‌های workers × HASH_BATCH_SLICE فرستاده می‌شوند تا هش‌های
+        ثبت‌نام و ورودی که همزمان می‌رسند پشت کل دسته در صف pool نمانند.
+        """
+        if self.workers <= 0:
+            hashes = [_hash(password) for password in passwords]
+        else:
+            executor = self._get_executor()
+            step = self.workers * max(HASH_BATCH_SLICE, 1)
+            hashes = []
+            for start in range(0, len(passwords), step):
+                hashes.extend(executor.map(_hash, passwords[start:start + step]))
+        self.batch_hashed += len(hashes)
+        return hashes
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "batch_hashed": self.batch_hashed,
+        }
+
+    def shutdown(self):
+        """بستن پردازه‌ها (در shutdown برنامه)."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+        self._slots = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,227 @@
+# app/core/principal_cache.py
+"""
+کش توکن → کاربر (principal) برای get_current_user.
+
+به جای اجرای کوئری User و بارگذاری نقش در هر درخواست احراز هویت شده،
+یک snapshot کوچک از کاربر در حافظه نگه داشته می‌شود. با تغییر User،
+StudentProfile یا Role (بعد از commit) ورودی‌های مربوطه حذف می‌شوند.
+
+این حذف فقط در پردازه‌ای که commit را انجام داده رخ می‌دهد و insert/update
+مستقیم core (مثل ورود گروهی) رویداد سشن ندارد. برای همین ورودی‌ای که بیش از
+PRINCIPAL_CACHE_REVALIDATE ثانیه از آخرین بررسی آن گذشته، قبل از استفاده با
+یک کوئری روی کلید اصلی (updated_at کاربر و پروفایل) تأیید می‌شود؛ غیرفعال
+شدن یا تغییر نقش در worker دیگر حداکثر با این تأخیر دیده می‌شود.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.roles import has_permission
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 300))  # ثانیه
+PRINCIPAL_CACHE_REVALIDATE = float(os.getenv("PRINCIPAL_CACHE_REVALIDATE", 5))  # ثانیه؛ 0 = هر درخواست
+
+
+@dataclass(frozen=True)
+class Principal:
+    """snapshot فشرده از کاربر احراز هویت شده."""
+    id: int
+    student_number: str
+    national_code: str
+    role_id: int
+    role_name: Optional[str]
+    is_active: bool
+    permission_mask: int  # bitmask مجوزهای نقش (app/core/roles.py)
+    created_at: Optional[datetime] = None
+    # برای ETag پاسخ‌ها (app/core/etag.py)
+    updated_at: Optional[datetime] = None
+    profile_id: Optional[int] = None
+    profile_updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        """ساخت snapshot از یک شیء User (با پروفایل)؛ نقش از role_registry خوانده می‌شود."""
+        role = user.role_info
+        profile = user.profile
+        return cls(
+            id=user.id,
+            student_number=user.student_number,
+            national_code=profile.national_code if profile else None,
+            role_id=user.role_id,
+            role_name=role.name if role else None,
+            is_active=user.is_active,
+            permission_mask=role.mask if role else 0,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            profile_id=profile.id if profile else None,
+            profile_updated_at=profile.updated_at if profile else None,
+        )
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role_name == "admin"
+
+    @property
+    def is_moderator(self) -> bool:
+        return self.role_name == "moderator"
+
+    def can(self, permission: str) -> bool:
+        return has_permission(self.permission_mask, permission)
+
+
+class PrincipalCache:
+    """کش LRU با TTL، thread-safe، با کلید subject توکن (شماره دانشجویی)."""
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: int = PRINCIPAL_CACHE_TTL,
+                 revalidate: float = PRINCIPAL_CACHE_REVALIDATE):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.revalidate = revalidate
+        # key -> (expires_at, checked_at, principal)
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._keys_by_user_id: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale = 0
+
+    def get(self, key: str) -> Optional[Principal]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            expires_at, _, principal = item
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def needs_revalidation(self, key: str) -> bool:
+        """آیا از آخرین تأیید ورودی با دیتابیس بیش از revalidate ثانیه گذشته است؟"""
+        with self._lock:
+            item = self._items.get(key)
+        return item is None or time.monotonic() - item[1] >= self.revalidate
+
+    def mark_valid(self, key: str):
+        """ورودی با دیتابیس تأیید شد"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items[key] = (item[0], time.monotonic(), item[2])
+            self.revalidations += 1
+
+    def discard(self, key: str):
+        """حذف ورودی‌ای که با دیتابیس مطابقت ندارد"""
+        with self._lock:
+            self._remove(key)
+            self.stale += 1
+
+    def set(self, key: str, principal: Principal):
+        if self.maxsize <= 0:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._remove(key)
+            self._items[key] = (now + self.ttl, now, principal)
+            self._keys_by_user_id[principal.id] = key
+
+            while len(self._items) > self.maxsize:
+                oldest_key = next(iter(self._items))
+                self._remove(oldest_key)
+
+    def invalidate_user(self, user_id: int):
+        """حذف ورودی یک کاربر."""
+        with self._lock:
+            key = self._keys_by_user_id.get(user_id)
+            if key is not None:
+                self._remove(key)
+
+    def invalidate_keys(self, keys):
+        """حذف ورودی‌ها با کلید (شماره دانشجویی)، برای نوشتن‌های core بدون رویداد سشن"""
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self):
+        """حذف همه ورودی‌ها (مثلاً بعد از تغییر نقش‌ها)."""
+        with self._lock:
+            self._items.clear()
+            self._keys_by_user_id.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "revalidate": self.revalidate,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "stale": self.stale,
+        }
+
+    def _remove(self, key: str):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._keys_by_user_id.pop(item[2].id, None)
+
+
+principal_cache = PrincipalCache()
+
+
+# ----------------------------
+# Invalidation با رویدادهای Session
+# ----------------------------
+_PENDING_KEY = "principal_cache_invalidate"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    """جمع‌آوری کاربرانی که User/StudentProfile/Role آن‌ها تغییر کرده است."""
+    from app.models.role import Role
+    from app.models.student_profile import StudentProfile
+    from app.models.user import User
+
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            pending.add(obj.id)
+        elif isinstance(obj, StudentProfile):
+            pending.add(obj.user_id)
+        elif isinstance(obj, Role):
+            pending.add("*")
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_invalidation(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    if "*" in pending:
+        principal_cache.clear()
+        return
+
+    for user_id in pending:
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidation(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,86 @@
+# app/core/responses.py
+"""
+پاسخ JSON با orjson برای endpointهای لیستی و خطاها.
+
+مسیر پیش‌فرض FastAPI برای endpointهای بدون response_model، خروجی را ابتدا با
+jsonable_encoder پیمایش و سپس با json.dumps سریال می‌کند؛ برای صفحه‌ای با
+چند صد ردیف این پیمایش ده‌ها برابر کندتر از خود سریال‌سازی است. ORJSONResponse
+dict/list، dataclass (مثل AuditLogRow)، datetime، Enum و مدل‌های pydantic را
+مستقیم با orjson به بایت تبدیل می‌کند و متن فارسی escape نمی‌شود.
+
+NDJSONResponse برای حالت Accept: application/x-ndjson لیست‌های بزرگ است: هر
+رکورد یک خط JSON و هر دسته از cursor دیتابیس یک تکه پاسخ؛ حافظه سرور و
+زمان رسیدن اولین بایت مستقل از تعداد کل ردیف‌هاست.
+
+endpointی که ORJSONResponse را برمی‌گرداند از اعتبارسنجی response_model و
+jsonable_encoder عبور نمی‌کند؛ response_model فقط برای مستندات می‌ماند.
+این کلاس عمداً default_response_class برنامه نیست: endpointهای دارای
+response_model در FastAPI فعلی با dump_json هسته Rust پایدانتیک سریال می‌شوند
+و تعیین کلاس پیش‌فرض همین مسیر سریع را غیرفعال می‌کند
+(مقایسه: python -m app.scripts.bench_json_responses).
+"""
+import os
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator
+
+import orjson
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+# Z برای datetimeهای UTC، مثل خروجی پایدانتیک در endpointهای response_model
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_BATCH_SIZE = int(os.getenv("NDJSON_BATCH_SIZE", 1000))  # ردیف در هر تکه پاسخ
+
+
+def orjson_default(obj: Any) -> Any:
+    """نوع‌هایی که orjson به تنهایی نمی‌شناسد"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, BaseException):
+        # ctx خطاهای اعتبارسنجی
+        return str(obj)
+    if hasattr(obj, "to_dict"):
+        # مدل‌های ORM (User، StudentProfile، AuditLog)
+        return obj.to_dict()
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """سریال‌سازی JSON با orjson (UTF-8، بدون escape متن فارسی)"""
+    return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse با orjson؛ content بدون jsonable_encoder سریال می‌شود"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def wants_ndjson(request: Request) -> bool:
+    """آیا کلاینت با Accept خروجی NDJSON خواسته است؟"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def iter_ndjson(batches: Iterable[Iterable], dump: Callable[[Any], bytes]) -> Iterator[bytes]:
+    """هر دسته ردیف به یک تکه؛ dump هر ردیف را به یک خط JSON (بدون \\n) تبدیل می‌کند"""
+    for batch in batches:
+        chunk = b"".join([dump(row) + b"\n" for row in batch])
+        if chunk:
+            yield chunk
+
+
+class NDJSONResponse(StreamingResponse):
+    """پاسخ جریانی NDJSON (یک رکورد JSON در هر خط)"""
+
+    media_type = NDJSON_MEDIA_TYPE
@@ -0,0 +1,215 @@
+# app/core/roles.py
+"""
+رجیستری درون‌پردازه نقش‌ها و مجوزها.
+
+نقش‌ها تقریباً هرگز تغییر نمی‌کنند؛ به جای کوئری Role با نام در هر ثبت‌نام و
+بارگذاری lazy نقش برای هر بررسی دسترسی، همه نقش‌ها هنگام شروع برنامه یک بار
+خوانده می‌شوند و برای هر نقش یک bitmask مجوز از ROLE_PERMISSIONS ساخته می‌شود.
+بررسی مجوز یک جستجوی dict و یک AND بیتی است، بدون کوئری.
+
+تغییر نقش‌ها از طریق ORM (رویداد after_commit سشن، مثل principal_cache) در
+همین پردازه اعمال می‌شود. تغییر در پردازه‌های دیگر یا مستقیم در دیتابیس با
+POST /admin/api/roles/reload یا شروع دوباره برنامه دیده می‌شود.
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.models.role import Role
+
+logger = logging.getLogger(__name__)
+
+# مجوزهای هر نقش
+ROLE_PERMISSIONS = {
+    "admin": ["create", "read", "update", "delete", "manage_users"],
+    "moderator": ["create", "read", "update"],
+    "user": ["read"]
+}
+
+# هر مجوز یک بیت؛ مجوز جدید فقط به انتهای این لیست اضافه شود
+PERMISSIONS = ("create", "read", "update", "delete", "manage_users")
+PERMISSION_BITS = {name: 1 << index for index, name in enumerate(PERMISSIONS)}
+
+DEFAULT_ROLES = (
+    {"name": "user", "description": "کاربر عادی سیستم"},
+    {"name": "admin", "description": "مدیر سیستم با دسترسی کامل"},
+    {"name": "moderator", "description": "ناظر سیستم"},
+)
+
+
+def default_role(name: str) -> Optional[dict]:
+    """تعریف نقش پیش‌فرض (نام و توضیح) یا None برای نقش‌های خارج از DEFAULT_ROLES"""
+    for role in DEFAULT_ROLES:
+        if role["name"] == name:
+            return dict(role)
+    return None
+
+
+def permission_mask(permissions: Iterable[str]) -> int:
+    """bitmask مجوزها؛ مجوزهای ناشناخته نادیده گرفته می‌شوند"""
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS.get(permission, 0)
+    return mask
+
+
+def has_permission(mask: int, permission: str) -> bool:
+    """آیا bitmask شامل این مجوز است؟"""
+    bit = PERMISSION_BITS.get(permission)
+    return bit is not None and mask & bit == bit
+
+
+@dataclass(frozen=True)
+class RoleInfo:
+    """snapshot یک نقش همراه با bitmask مجوزها"""
+    id: int
+    name: str
+    description: Optional[str]
+    mask: int
+
+    @classmethod
+    def build(cls, role_id: int, name: str, description: Optional[str] = None) -> "RoleInfo":
+        return cls(role_id, name, description, permission_mask(ROLE_PERMISSIONS.get(name, ())))
+
+    @property
+    def permissions(self) -> List[str]:
+        return [name for name in PERMISSIONS if self.mask & PERMISSION_BITS[name]]
+
+    def can(self, permission: str) -> bool:
+        return has_permission(self.mask, permission)
+
+
+class RoleRegistry:
+    """نقش‌ها با کلید id و نام؛ خواندن بدون قفل، هر تغییر dictها را جایگزین می‌کند"""
+
+    def __init__(self):
+        self._by_id: Dict[int, RoleInfo] = {}
+        self._by_name: Dict[str, RoleInfo] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.reloads = 0
+
+    # ---------- خواندن ----------
+    def get(self, role_id: Optional[int]) -> Optional[RoleInfo]:
+        return self._by_id.get(role_id)
+
+    def by_name(self, name: str) -> Optional[RoleInfo]:
+        return self._by_name.get(name)
+
+    def can(self, role_id: Optional[int], permission: str) -> bool:
+        info = self._by_id.get(role_id)
+        return info is not None and has_permission(info.mask, permission)
+
+    def all(self) -> List[RoleInfo]:
+        return sorted(self._by_id.values(), key=lambda info: info.id)
+
+    # ---------- بارگذاری و به‌روزرسانی ----------
+    def load(self, bind=engine):
+        """خواندن همه نقش‌ها از دیتابیس (یک SELECT)"""
+        with bind.connect() as conn:
+            rows = conn.execute(select(Role.id, Role.name, Role.description)).all()
+        self._replace(RoleInfo.build(*row) for row in rows)
+        with self._lock:
+            self.loaded = True
+            self.reloads += 1
+        logger.info(f"✅ Role registry loaded: {', '.join(info.name for info in self.all())}")
+
+    def ensure_defaults(self, bind=engine, roles=DEFAULT_ROLES) -> List[str]:
+        """ساخت نقش‌های پیش‌فرض ناموجود با یک INSERT و بارگذاری رجیستری؛ نام نقش‌های ساخته شده"""
+        try:
+            with bind.begin() as conn:
+                existing = set(conn.scalars(select(Role.name)))
+                missing = [dict(role) for role in roles if role["name"] not in existing]
+                if missing:
+                    conn.execute(insert(Role), missing)
+        except IntegrityError:
+            # پردازه دیگری همزمان همین نقش‌ها را ساخته است
+            missing = []
+        self.load(bind)
+        return [role["name"] for role in missing]
+
+    def register(self, role) -> RoleInfo:
+        """افزودن/به‌روزرسانی یک نقش (شیء Role یا هر چیزی با id، name و description)"""
+        info = RoleInfo.build(role.id, role.name, role.description)
+        self.apply([info], [])
+        return info
+
+    def apply(self, upserts: Iterable[RoleInfo], deleted_ids: Iterable[int]):
+        """اعمال تغییرات commit شده"""
+        with self._lock:
+            by_id = dict(self._by_id)
+            for role_id in deleted_ids:
+                by_id.pop(role_id, None)
+            for info in upserts:
+                by_id[info.id] = info
+            self._swap(by_id)
+
+    def clear(self):
+        self._replace(())
+        with self._lock:
+            self.loaded = False
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "reloads": self.reloads,
+            "permissions": list(PERMISSIONS),
+            "roles": [
+                {"id": info.id, "name": info.name, "mask": info.mask, "permissions": info.permissions}
+                for info in self.all()
+            ],
+        }
+
+    def _replace(self, infos: Iterable[RoleInfo]):
+        with self._lock:
+            self._swap({info.id: info for info in infos})
+
+    def _swap(self, by_id: Dict[int, RoleInfo]):
+        # dictهای جدید یکجا جایگزین می‌شوند تا خواننده‌ها بدون قفل وضعیت سازگار ببینند
+        self._by_id = by_id
+        self._by_name = {info.name: info for info in by_id.values()}
+
+
+role_registry = RoleRegistry()
+
+
+# ----------------------------
+# به‌روزرسانی با رویدادهای Session
+# ----------------------------
+_PENDING_KEY = "role_registry_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_role_changes(session, flush_context):
+    """نقش‌های ساخته/تغییر/حذف شده (مقادیر همین‌جا خوانده می‌شوند؛ بعد از commit منقضی‌اند)"""
+    pending = None
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Role):
+            continue
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, {})
+        if obj in session.deleted:
+            pending[obj.id] = None
+        else:
+            pending[obj.id] = RoleInfo.build(obj.id, obj.name, obj.description)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_role_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        role_registry.apply(
+            [info for info in pending.values() if info is not None],
+            [role_id for role_id, info in pending.items() if info is None],
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_role_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -2,11 +2,14 @@ from datetime import datetime, timedelta, timezone
 
 from typing import Optional
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
 from app.core.deps import DBDep
+from app.core.hashing import password_hasher, pwd_context
+from app.core.principal_cache import Principal, principal_cache
+from app.models.student_profile import StudentProfile
 from app.models.user import User
 
 # تنظیمات
@@ -16,7 +19,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 # Exception
 credentials_exception = HTTPException(
@@ -36,6 +39,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple:
+    """تأیید رمز عبور و ساخت هش جدید اگر پارامترهای هش قدیمی باشند."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """هش کردن رمز عبور در process pool (بدون قفل کردن event loop)."""
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """تأیید رمز عبور در process pool (بدون قفل کردن event loop)."""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple:
+    """نسخه async از verify_and_update_password در process pool."""
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """ساخت توکن JWT."""
     to_encode = data.copy()
@@ -49,13 +72,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def _principal_is_current(db: Session, principal: Principal) -> bool:
+    """
+    تأیید snapshot کش شده با دیتابیس (یک کوئری روی کلید اصلی)
+
+    هر تغییر User یا StudentProfile (از ORM در هر پردازه یا update مستقیم core با
+    onupdate) updated_at را عوض می‌کند؛ is_active و role_id جدا هم مقایسه
+    می‌شوند چون CURRENT_TIMESTAMP در SQLite دقت ثانیه دارد. کاربر حذف شده ردیفی ندارد.
+    """
+    row = db.execute(
+        select(User.updated_at, User.is_active, User.role_id, StudentProfile.updated_at)
+        .outerjoin(StudentProfile, StudentProfile.user_id == User.id)
+        .where(User.id == principal.id)
+    ).first()
+    return row is not None and tuple(row) == (
+        principal.updated_at, principal.is_active, principal.role_id, principal.profile_updated_at
+    )
+
+
 def get_current_user(
         token: str = Depends(oauth2_scheme),
         db: Session = DBDep()
 
-) -> User:
+) -> Principal:
     """
-    اعتبارسنجی توکن JWT و برگرداندن کاربر.
+    اعتبارسنجی توکن JWT و برگرداندن snapshot کاربر (Principal).
+
+    در صورت وجود در principal_cache هیچ کوئری‌ای اجرا نمی‌شود، مگر اینکه
+    زمان تأیید دوباره ورودی (PRINCIPAL_CACHE_REVALIDATE) رسیده باشد.
     """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -69,7 +113,19 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(
+    principal = principal_cache.get(student_number)
+    if principal is not None and principal.national_code == national_code:
+        if not principal_cache.needs_revalidation(student_number):
+            return principal
+        if _principal_is_current(db, principal):
+            principal_cache.mark_valid(student_number)
+            return principal
+        principal_cache.discard(student_number)
+
+    # نقش از role_registry خوانده می‌شود (بدون JOIN روی roles)
+    user = db.query(User).options(
+        joinedload(User.profile),
+    ).filter(
         User.student_number == student_number,
         User.profile.has(national_code=national_code)  # جستجو بر اساس کد ملی
     ).first()
@@ -77,18 +133,37 @@ def get_current_user(
     if user is None:
         raise credentials_exception
 
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(student_number, principal)
+    return principal
 
 
 def get_current_admin(
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
 ):
     """
     Dependency برای اطمینان از admin بودن کاربر
     """
-    if current_user.role.name != "admin":
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="شما دسترسی لازم را ندارید"
         )
     return current_user
+
+
+def get_current_admin_for_stream(
+        request: Request,
+        token: Optional[str] = Depends(oauth2_scheme_optional),
+        db: Session = DBDep(),
+):
+    """
+    مشابه get_current_admin برای اتصال‌های EventSource
+
+    EventSource مرورگر هدر Authorization نمی‌فرستد؛ پس توکن کوکی access_token
+    (ورود از UI) هم پذیرفته می‌شود.
+    """
+    token = token or request.cookies.get("access_token")
+    if not token:
+        raise credentials_exception
+    return get_current_admin(get_current_user(token, db))
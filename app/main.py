@@ -3,15 +3,22 @@ import time
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import HTMLResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 import logging
-from app.routers import student, admin, test, user, admin_ui, admin_dashboard
-from app.core.database import create_database
+from app.routers import student, admin, test, user, admin_ui, admin_dashboard, admin_audit
+from app.core.database import SessionLocal, create_database, engine, async_engine, DB_PROFILE
+from app.core.hashing import password_hasher, PASSWORD_SCHEME
+from app.core.responses import ORJSONResponse
+from app.core.roles import role_registry
 from app.routers.auth import router as auth_router
 from app.routers.ui_auth import router as ui_auth_router
 from app.services.auth_service import create_token_for_user
+from app.services.audit_broadcast import audit_broadcaster
+from app.services.audit_sink import audit_sink
+from app.services.audit_stats_service import backfill_audit_stats
+from app.services.student_number_filter import STUDENT_FILTER_ENABLED, student_number_filter
 
 # تنظیمات لاگ‌گیری
 logging.basicConfig(
@@ -35,41 +42,40 @@ async def lifespan(app: FastAPI):
     # ایجاد نقش‌های پیش‌فرض
     await create_default_roles()
 
+    # پر کردن آمار تجمیعی لاگ‌ها روی دیتابیسی که قبل از این جدول‌ها لاگ داشته است
+    try:
+        with SessionLocal() as db:
+            backfill_audit_stats(db)
+    except Exception as e:
+        logger.warning(f"⚠️ Audit stats backfill failed: {e}")
+
+    # Bloom filter شماره‌های دانشجویی برای /auth/check (در صورت خطا همه بررسی‌ها به دیتابیس می‌روند)
+    if STUDENT_FILTER_ENABLED:
+        try:
+            student_number_filter.rebuild()
+        except Exception as e:
+            logger.warning(f"⚠️ Student number filter not built: {e}")
+
+    # شروع نوشتن دسته‌ای لاگ‌های audit (و پخش زنده بعد از هر commit)
+    audit_sink.add_listener(audit_broadcaster.publish)
+    audit_sink.start()
+
     yield
 
     # Shutdown
     logger.info("👋 Shutting down Basij Management System...")
+    audit_broadcaster.close()
+    audit_sink.stop()
+    logger.info(f"✅ Audit logs flushed: {audit_sink.stats()}")
+    await async_engine.dispose()
+    password_hasher.shutdown()
 
 async def create_default_roles():
-    """ایجاد نقش‌های پیش‌فرض سیستم."""
-    from app.core.database import SessionLocal
-    from app.models.role import Role
-
+    """ایجاد نقش‌های پیش‌فرض سیستم و بارگذاری role_registry."""
     try:
-        db = SessionLocal()
-
-        default_roles = [
-            {"name": "user", "description": "کاربر عادی سیستم"},
-            {"name": "admin", "description": "مدیر سیستم با دسترسی کامل"},
-            {"name": "moderator", "description": "ناظر سیستم"}
-        ]
-
-        for role_data in default_roles:
-            role_name = role_data["name"]
-            existing_role = db.query(Role).filter(Role.name == role_name).first()
-
-            if not existing_role:
-                role = Role(
-                    name=role_name,
-                    description=role_data["description"]
-                )
-                db.add(role)
-                logger.info(f"✅ Created role: {role_name}")
-            else:
-                logger.info(f"ℹ️ Role already exists: {role_name}")
-
-        db.commit()
-        db.close()
+        # یک SELECT برای همه نقش‌ها و یک INSERT برای نقش‌های ناموجود
+        for role_name in role_registry.ensure_defaults():
+            logger.info(f"✅ Created role: {role_name}")
 
     except Exception as e:
         logger.error(f"❌ Error creating default roles: {e}")
@@ -151,7 +157,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     """مدیریت خطاهای validation."""
     logger.warning(f"⚠️ Validation error: {exc.errors()}")
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "detail": "خطای اعتبارسنجی داده‌ها",
@@ -166,7 +172,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     """مدیریت خطاهای HTTP."""
     logger.warning(f"⚠️ HTTP error {exc.status_code}: {exc.detail}")
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
@@ -181,7 +187,7 @@ async def general_exception_handler(request: Request, exc: Exception):
     """مدیریت خطاهای عمومی."""
     logger.error(f"💥 Unhandled error: {exc}", exc_info=True)
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "detail": "خطای داخلی سرور",
@@ -284,12 +290,13 @@ async def get_api_info():
             "documentation": "/docs"
         },
         "database": {
-            "type": "SQLite",
+            "type": engine.dialect.name,
+            "profile": DB_PROFILE,
             "status": "connected"
         },
         "security": {
             "authentication": "JWT",
-            "password_hashing": "bcrypt"
+            "password_hashing": PASSWORD_SCHEME
         }
     }
 
@@ -315,6 +322,7 @@ app.include_router(student.router)
 app.include_router(admin.router)
 app.include_router(admin_ui.router)
 app.include_router(admin_dashboard.router)
+app.include_router(admin_audit.router)
 app.include_router(ui_auth_router)
 
 
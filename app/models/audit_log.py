@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, event, inspect, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.core.database import Base
@@ -6,6 +6,18 @@ from app.core.database import Base
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # ایندکس‌ها بر اساس ترکیب فیلترهای get_audit_logs و خروجی‌ها؛ همه با
+    # (created_at, id) در انتها تا مرتب‌سازی DESC و keyset بدون sort انجام شود
+    # و COUNT فقط از روی ایندکس (covering) خوانده شود.
+    # بررسی: python -m app.scripts.check_audit_query_plans
+    __table_args__ = (
+        # بدون فیلتر / بازه تاریخ
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        # user_id (+ بازه تاریخ، + action)
+        Index("ix_audit_logs_user_id_created_at_id", "user_id", "created_at", "id"),
+        # action (+ بازه تاریخ)
+        Index("ix_audit_logs_action_created_at_id", "action", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -17,7 +29,7 @@ class AuditLog(Base):
 
     description = Column(String(255), nullable=True, comment="توضیحات مربوط به عملیات")
     ip_address = Column(String(45), nullable=True, comment="آدرس IP کاربر که عملیات را انجام داده")
-    created_at = Column(DateTime, default=datetime.now(timezone.utc), comment="زمان ایجاد لاگ")
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), comment="زمان ایجاد لاگ")
 
     # ارتباط با مدل User
     user = relationship("User", back_populates="audit_logs")  # اگر در مدل User از back_populates استفاده شده باشد
@@ -25,3 +37,82 @@ class AuditLog(Base):
     def __repr__(self):
         return f"<AuditLog(id={self.id}, action={self.action}, created_at={self.created_at})>"
 
+
+# ----------------------------
+# ایندکس جستجوی متنی (description و entity)
+# ----------------------------
+# SQLite: جدول مجازی FTS5 با محتوای خارجی که با trigger همگام می‌ماند.
+# PostgreSQL: ایندکس GIN روی عبارت tsvector (خودکار همگام است).
+AUDIT_FTS_TABLE = "audit_logs_fts"
+
+# همین عبارت باید در کوئری‌ها استفاده شود تا PostgreSQL از ایندکس استفاده کند
+AUDIT_SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(audit_logs.description, '') || ' ' || coalesce(audit_logs.entity, ''))"
+)
+
+_SQLITE_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE {AUDIT_FTS_TABLE} USING fts5(
+        description, entity, content='audit_logs', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS audit_logs_fts_ai AFTER INSERT ON audit_logs BEGIN
+        INSERT INTO {AUDIT_FTS_TABLE}(rowid, description, entity)
+        VALUES (new.id, new.description, new.entity);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS audit_logs_fts_ad AFTER DELETE ON audit_logs BEGIN
+        INSERT INTO {AUDIT_FTS_TABLE}({AUDIT_FTS_TABLE}, rowid, description, entity)
+        VALUES ('delete', old.id, old.description, old.entity);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS audit_logs_fts_au AFTER UPDATE ON audit_logs BEGIN
+        INSERT INTO {AUDIT_FTS_TABLE}({AUDIT_FTS_TABLE}, rowid, description, entity)
+        VALUES ('delete', old.id, old.description, old.entity);
+        INSERT INTO {AUDIT_FTS_TABLE}(rowid, description, entity)
+        VALUES (new.id, new.description, new.entity);
+    END""",
+    # پر کردن ایندکس از لاگ‌های موجود
+    f"INSERT INTO {AUDIT_FTS_TABLE}({AUDIT_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_audit_search_index(target, connection, **kw):
+    """ساخت ایندکس جستجو (برای دیتابیس‌های موجود هم، بعد از create_all)"""
+    if not inspect(connection).has_table(AuditLog.__tablename__):
+        return
+
+    dialect_name = connection.dialect.name
+    if dialect_name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": AUDIT_FTS_TABLE},
+        ).first()
+        if not exists:
+            for statement in _SQLITE_SEARCH_DDL:
+                connection.execute(text(statement))
+
+    elif dialect_name == "postgresql":
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_audit_logs_search ON audit_logs USING GIN ({AUDIT_SEARCH_VECTOR_SQL})"
+        ))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_missing_audit_indexes(target, connection, **kw):
+    """
+    ساخت ایندکس‌های جدید audit_logs روی دیتابیس‌های موجود
+
+    create_all برای جدولی که از قبل وجود دارد ایندکس نمی‌سازد.
+    """
+    if not inspect(connection).has_table(AuditLog.__tablename__):
+        return
+
+    existing = {index["name"] for index in inspect(connection).get_indexes(AuditLog.__tablename__)}
+    for index in AuditLog.__table__.indexes:
+        if index.name not in existing:
+            index.create(connection)
+
+
+@event.listens_for(Base.metadata, "after_drop")
+def drop_audit_search_index(target, connection, **kw):
+    """حذف جدول FTS همراه با audit_logs (تا ایندکس کهنه باقی نماند)"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {AUDIT_FTS_TABLE}"))
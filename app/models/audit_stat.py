@@ -0,0 +1,35 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from app.core.database import Base
+
+
+class AuditStatHourly(Base):
+    """
+    آمار تجمیعی لاگ‌ها به تفکیک ساعت و عملیات.
+
+    همزمان با نوشتن لاگ‌ها به‌روز می‌شود تا آمار داشبورد بدون اسکن
+    جدول audit_logs خوانده شود.
+    """
+    __tablename__ = "audit_stats_hourly"
+
+    bucket = Column(DateTime, primary_key=True, comment="شروع ساعت (UTC)")
+    action = Column(String(50), primary_key=True, comment="عملیات")
+    count = Column(Integer, nullable=False, default=0, comment="تعداد لاگ‌ها")
+
+    def __repr__(self):
+        return f"<AuditStatHourly(bucket={self.bucket}, action={self.action}, count={self.count})>"
+
+
+class AuditStatTotal(Base):
+    """
+    تعداد کل لاگ‌ها به تفکیک عملیات (از ابتدا).
+
+    در همان تراکنش audit_stats_hourly افزایش می‌یابد تا آمار کل داشبورد
+    با خواندن یک ردیف برای هر عملیات به دست آید، مستقل از تعداد ساعت‌ها.
+    """
+    __tablename__ = "audit_stats_total"
+
+    action = Column(String(50), primary_key=True, comment="عملیات")
+    count = Column(Integer, nullable=False, default=0, comment="تعداد لاگ‌ها")
+
+    def __repr__(self):
+        return f"<AuditStatTotal(action={self.action}, count={self.count})>"
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Index, event, inspect
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.core.etag import stamp_updated_at
 from fastapi import HTTPException
 from typing import TYPE_CHECKING
 
@@ -11,6 +12,14 @@ if TYPE_CHECKING:
 
 class StudentProfile(Base):
     __tablename__ = "student_profiles"
+    # ایندکس‌های لیست دانشجویان ادمین (app/services/student_list_service.py):
+    # مرتب‌سازی پیش‌فرض و keyset روی (created_at, id)، با فیلتر جنسیت یا بدون آن
+    __table_args__ = (
+        Index("ix_student_profiles_created_at_id", "created_at", "id"),
+        Index("ix_student_profiles_gender_created_at_id", "gender", "created_at", "id"),
+        # جستجوی پیشوندی شماره تلفن (student_number و national_code ایندکس unique دارند)
+        Index("ix_student_profiles_phone_number", "phone_number"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -71,3 +80,23 @@ class StudentProfile(Base):
                 status_code=400,
                 detail="کد ملی یا شماره دانشجویی تکراری است"
             )
+
+
+# updated_at با دقت میکروثانیه (برای ETag پاسخ‌ها)
+event.listen(StudentProfile, "before_update", stamp_updated_at)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_missing_student_indexes(target, connection, **kw):
+    """
+    ساخت ایندکس‌های جدید student_profiles روی دیتابیس‌های موجود
+
+    create_all برای جدولی که از قبل وجود دارد ایندکس نمی‌سازد.
+    """
+    if not inspect(connection).has_table(StudentProfile.__tablename__):
+        return
+
+    existing = {index["name"] for index in inspect(connection).get_indexes(StudentProfile.__tablename__)}
+    for index in StudentProfile.__table__.indexes:
+        if index.name not in existing:
+            index.create(connection)
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.core.etag import stamp_updated_at
+from app.core.roles import ROLE_PERMISSIONS, RoleInfo, role_registry  # noqa: F401  ROLE_PERMISSIONS برای سازگاری
 from fastapi import HTTPException
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from app.models.student_profile import StudentProfile
@@ -24,7 +26,7 @@ class User(Base):
     audit_logs = relationship("AuditLog", back_populates="user")
 
     def __repr__(self):
-        return f"<User(id={self.id}, student_number='{self.student_number}', role='{self.role.name if self.role else None}')>"
+        return f"<User(id={self.id}, student_number='{self.student_number}', role='{self.role_name}')>"
 
     def to_dict(self, include_profile=False, include_role=False):
         data = {
@@ -35,11 +37,12 @@ class User(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
 
-        if include_role and self.role:
+        role = self.role_info if include_role else None
+        if role:
             data["role"] = {
-                "id": self.role.id,
-                "name": self.role.name,
-                "description": self.role.description
+                "id": role.id,
+                "name": role.name,
+                "description": role.description
             }
 
         if include_profile and self.profile:
@@ -53,32 +56,45 @@ class User(Base):
         return data
 
     @property
-    def is_admin(self):
+    def role_info(self) -> Optional[RoleInfo]:
+        """نقش کاربر از role_registry (بدون بارگذاری رابطه role)"""
+        info = role_registry.get(self.role_id)
+        if info is None and self.role is not None:
+            # نقشی که هنوز در رجیستری نیست (مثلاً رجیستری بارگذاری نشده)
+            info = role_registry.register(self.role)
+        return info
+
+    @property
+    def role_name(self) -> Optional[str]:
+        info = self.role_info
+        return info.name if info else None
+
+    @property
+    def is_admin(self) -> bool:
         """بررسی اینکه آیا کاربر admin است یا نه."""
-        return self.role and self.role.name == "admin"
+        return self.role_name == "admin"
 
     @property
-    def is_moderator(self):
+    def is_moderator(self) -> bool:
         """بررسی اینکه آیا کاربر moderator است یا نه."""
-        return self.role and self.role.name == "moderator"
+        return self.role_name == "moderator"
 
     def can(self, permission: str) -> bool:
-        permissions_map = {
-            "admin": ["create", "read", "update", "delete", "manage_users"],
-            "moderator": ["create", "read", "update"],
-            "user": ["read"]
-        }
-
-        return permission in permissions_map.get(self.role.name, [])
+        """بررسی مجوز با bitmask نقش (بدون کوئری)"""
+        info = self.role_info
+        return info is not None and info.can(permission)
 
     @classmethod
     def create_simple_user(cls, student_number: str, password: str, db_session, role_name="user"):
         from app.core.security import hash_password
         from app.models.role import Role
 
-        role = db_session.query(Role).filter(Role.name == role_name).first()
-        if not role:
-            raise ValueError(f"نقش '{role_name}' وجود ندارد")
+        role = role_registry.by_name(role_name)
+        if role is None:
+            role = db_session.query(Role).filter(Role.name == role_name).first()
+            if not role:
+                raise ValueError(f"نقش '{role_name}' وجود ندارد")
+            role_registry.register(role)
 
         user = cls(
             student_number=student_number,
@@ -107,3 +123,7 @@ class User(Base):
                 status_code=400,
                 detail="کد ملی یا شماره دانشجویی تکراری است"
             )
+
+
+# updated_at با دقت میکروثانیه (برای ETag پاسخ‌ها)
+event.listen(User, "before_update", stamp_updated_at)
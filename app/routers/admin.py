@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
 from sqlalchemy.orm import Session
 from app.core.deps import get_db
+from app.core.responses import NDJSONResponse, ORJSONResponse, wants_ndjson
 from app.core.security import get_current_admin
-from app.schemas.student import StudentProfileOut, AdminStudentUpdate
+from app.schemas.student import StudentProfileOut, AdminStudentUpdate, GenderEnum, StudentListPage
 from app.services import user_service
+from app.services.student_import_service import import_students
+from app.services.student_list_service import (
+    DEFAULT_STUDENT_SORT,
+    list_students as list_students_page,
+    search_students as search_students_prefix,
+    stream_students_ndjson,
+)
 from app.services.user_service import _check_uniqueness  # import صحیح تابع
 
 router = APIRouter(
@@ -12,9 +23,77 @@ router = APIRouter(
     dependencies=[Depends(get_current_admin)],
 )
 
-@router.get("/students", response_model=list[StudentProfileOut])
-def list_students(db: Session = Depends(get_db)):
-    return user_service.get_all_students(db)
+@router.get("/students", response_model=StudentListPage)
+def list_students(
+        request: Request,
+        db: Session = Depends(get_db),
+        limit: int = Query(50, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="مقدار next_cursor صفحه قبل"),
+        gender: Optional[GenderEnum] = Query(None),
+        is_active: Optional[bool] = Query(None),
+        created_from: Optional[datetime] = Query(None),
+        created_to: Optional[datetime] = Query(None),
+        sort: str = Query(DEFAULT_STUDENT_SORT, description="created_at / student_number / national_code؛ با - نزولی"),
+        fields: Optional[str] = Query(None, description="ستون‌های خروجی با کاما، مثلاً id,student_number,gender"),
+        include_total: bool = Query(False),
+):
+    """
+    لیست دانشجویان با صفحه‌بندی cursor، فیلتر و انتخاب ستون‌ها
+
+    با Accept: application/x-ndjson همه دانشجویان بعد از cursor (بدون limit)
+    به صورت جریانی و یک دانشجو در هر خط برگردانده می‌شوند.
+    """
+    headers = {"Vary": "Accept"}
+    if wants_ndjson(request):
+        return NDJSONResponse(stream_students_ndjson(
+            cursor=cursor,
+            gender=gender.value if gender else None,
+            is_active=is_active,
+            created_from=created_from,
+            created_to=created_to,
+            sort=sort,
+            fields=fields,
+        ), headers=headers)
+
+    return ORJSONResponse(list_students_page(
+        db,
+        limit=limit,
+        cursor=cursor,
+        gender=gender.value if gender else None,
+        is_active=is_active,
+        created_from=created_from,
+        created_to=created_to,
+        sort=sort,
+        fields=fields,
+        include_total=include_total,
+    ), headers=headers)
+
+@router.get("/students/search", response_model=list[dict])
+def search_students(
+        q: str = Query(..., min_length=1, max_length=20, description="پیشوند شماره دانشجویی، کد ملی یا تلفن"),
+        limit: int = Query(10, ge=1, le=50),
+        field: Optional[str] = Query(None, description="student_number / national_code / phone_number"),
+        db: Session = Depends(get_db),
+):
+    """جستجوی پیشوندی دانشجویان (typeahead)"""
+    return ORJSONResponse(search_students_prefix(db, q, limit=limit, field=field))
+
+@router.post("/students/import")
+def import_students_file(
+        file: UploadFile = File(...),
+        dry_run: bool = False,
+):
+    """
+    ورود گروهی دانشجوها از فایل CSV یا XLSX
+
+    ستون‌ها: student_number، national_code، phone_number، gender، address
+    (سرآیند فارسی هم پذیرفته می‌شود). خروجی گزارش خطای هر ردیف است.
+    """
+    try:
+        report = import_students(file.file, file.filename or "", dry_run=dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return report
 
 @router.get("/students/{student_id}", response_model=StudentProfileOut)
 def get_student(student_id: int, db: Session = Depends(get_db)):
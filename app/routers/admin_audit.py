@@ -1,15 +1,21 @@
-import csv
-from io import StringIO
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from datetime import datetime
-from openpyxl import Workbook
-from io import BytesIO
-from fastapi.responses import StreamingResponse
-from app.core.deps import get_db
-from app.core.security import get_current_admin
-from app.models.audit_log import AuditLog
+from app.core.database import AsyncSessionLocal
+from app.core.security import get_current_admin, get_current_admin_for_stream
+from app.services.audit_broadcast import audit_broadcaster
+from app.services.audit_service import get_audit_stats_snapshot_async
+from app.services.audit_export_service import (
+    AUDIT_EXPORT_CHUNK_SIZE,
+    AUDIT_PARQUET_COMPRESSION,
+    PARQUET_COMPRESSIONS,
+    PYARROW_AVAILABLE,
+    build_export_query,
+    export_excel_file,
+    export_parquet_file,
+    stream_csv,
+)
 
 router = APIRouter(
     prefix="/admin/audit-logs",
@@ -18,109 +24,117 @@ router = APIRouter(
 
 @router.get("/export/csv")
 def export_audit_logs_csv(
-    db: Session = Depends(get_db),
     admin=Depends(get_current_admin),
     user_id: int | None = Query(None),
     action: str | None = Query(None),
     date_from: datetime | None = Query(None),
     date_to: datetime | None = Query(None),
+    q: str | None = Query(None, max_length=200, description="جستجوی متنی در توضیحات و موجودیت"),
+    chunk_size: int = Query(AUDIT_EXPORT_CHUNK_SIZE, ge=1024, le=16 * 1024 * 1024, description="اندازه هر تکه (بایت)"),
+    gzip: bool = Query(False, description="فشرده‌سازی gzip در حین ارسال"),
 ):
-    # فیلتر کردن لاگ‌ها بر اساس پارامترها
-    query = db.query(AuditLog)
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
-    if action:
-        query = query.filter(AuditLog.action == action)
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-
-    logs = query.order_by(AuditLog.created_at.desc()).all()
-
-    # تولید فایل CSV
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # اضافه کردن سرآیندهای جدید به CSV
-    writer.writerow([
-        "ID", "User ID", "Action", "Entity", "Entity ID", "Description", "IP Address", "Created At",
-    ])
-
-    # نوشتن لاگ‌ها در CSV
-    for log in logs:
-        writer.writerow([
-            log.id,
-            log.user_id,
-            log.action,
-            log.entity,
-            log.entity_id,
-            log.description,
-            log.ip_address,
-            log.created_at,
-        ])
-
-    output.seek(0)
+    # فیلتر کردن لاگ‌ها بر اساس پارامترها (فقط ستون‌های لازم)
+    query = build_export_query(user_id=user_id, action=action, date_from=date_from, date_to=date_to, q=q)
 
+    # تولید CSV به صورت جریانی؛ حافظه مصرفی به تعداد ردیف‌ها وابسته نیست
+    filename = "audit_logs.csv.gz" if gzip else "audit_logs.csv"
     return StreamingResponse(
-        output,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=audit_logs.csv"}
+        stream_csv(query, chunk_size=chunk_size, compress=gzip),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @router.get("/export/excel")
 def export_audit_logs_excel(
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
     admin=Depends(get_current_admin),
     user_id: int | None = Query(None),
     action: str | None = Query(None),
     date_from: datetime | None = Query(None),
     date_to: datetime | None = Query(None),
+    q: str | None = Query(None, max_length=200, description="جستجوی متنی در توضیحات و موجودیت"),
 ):
-    # فیلتر کردن لاگ‌ها
-    query = db.query(AuditLog)
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
-    if action:
-        query = query.filter(AuditLog.action == action)
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-
-    logs = query.order_by(AuditLog.created_at.desc()).all()
-
-    # تولید فایل Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Audit Logs"
-
-    # اضافه کردن سرآیندها در Excel
-    ws.append([
-        "ID", "User ID", "Action", "Entity", "Entity ID", "Description", "IP Address", "Created At",
-    ])
-
-    # نوشتن لاگ‌ها در Excel
-    for log in logs:
-        ws.append([
-            log.id,
-            log.user_id,
-            log.action,
-            log.entity,
-            log.entity_id,
-            log.description,
-            log.ip_address,
-            log.created_at.strftime("%Y-%m-%d %H:%M"),
-        ])
-
-    stream = BytesIO()
-    wb.save(stream)
-    stream.seek(0)
+    # فیلتر کردن لاگ‌ها (فقط ستون‌های لازم)
+    query = build_export_query(user_id=user_id, action=action, date_from=date_from, date_to=date_to, q=q)
 
-    return StreamingResponse(
-        stream,
+    # تولید فایل Excel روی دیسک (write-only) به جای حافظه
+    path = export_excel_file(query)
+
+    # فایل موقت بعد از ارسال پاسخ حذف می‌شود
+    background_tasks.add_task(os.remove, path)
+    return FileResponse(
+        path,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=audit_logs.xlsx"}
+        filename="audit_logs.xlsx",
     )
 
+
+@router.get("/export/parquet")
+def export_audit_logs_parquet(
+    background_tasks: BackgroundTasks,
+    admin=Depends(get_current_admin),
+    user_id: int | None = Query(None),
+    action: str | None = Query(None),
+    date_from: datetime | None = Query(None),
+    date_to: datetime | None = Query(None),
+    q: str | None = Query(None, max_length=200, description="جستجوی متنی در توضیحات و موجودیت"),
+    compression: str = Query(AUDIT_PARQUET_COMPRESSION, description="zstd / snappy / gzip / none"),
+):
+    if not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="خروجی Parquet روی این سرور فعال نیست (pyarrow نصب نشده)")
+    if compression not in PARQUET_COMPRESSIONS:
+        raise HTTPException(status_code=400, detail="نوع فشرده‌سازی نامعتبر است")
+
+    # فیلتر کردن لاگ‌ها (فقط ستون‌های لازم)
+    query = build_export_query(user_id=user_id, action=action, date_from=date_from, date_to=date_to, q=q)
+
+    # تولید فایل Parquet ستونی و فشرده روی دیسک
+    path = export_parquet_file(query, compression=compression)
+
+    # فایل موقت بعد از ارسال پاسخ حذف می‌شود
+    background_tasks.add_task(os.remove, path)
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename="audit_logs.parquet",
+    )
+
+
+@router.get("/stream")
+async def stream_audit_logs(
+    admin=Depends(get_current_admin_for_stream),
+):
+    """
+    جریان زنده لاگ‌ها (Server-Sent Events)
+
+    رویداد snapshot آمار فعلی را می‌فرستد و بعد از آن هر رویداد audit شامل
+    لاگ‌های تازه و افزایش شمارنده عملیات‌هاست؛ بدون polling دیتابیس.
+    """
+    # اشتراک قبل از خواندن آمار، تا رویدادی بین این دو از دست نرود؛ رویدادهایی
+    # که در همین فاصله commit و در snapshot هم شمرده شده‌اند با high_water حذف می‌شوند
+    subscription = audit_broadcaster.subscribe()
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail="تعداد اتصال‌های زنده به حداکثر رسیده است",
+            headers={"Retry-After": "30"},
+        )
+
+    try:
+        # آمار و high-water mark (max(audit_logs.id)) از یک snapshot دیتابیس
+        async with AsyncSessionLocal() as db:
+            snapshot, high_water = await get_audit_stats_snapshot_async(db)
+    except BaseException:
+        audit_broadcaster.unsubscribe(subscription)
+        raise
+    snapshot["last_id"] = high_water
+
+    return StreamingResponse(
+        audit_broadcaster.stream(subscription, snapshot, high_water),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # غیرفعال کردن بافر nginx
+        },
+    )
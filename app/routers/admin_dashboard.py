@@ -5,12 +5,19 @@ from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
+from app.core.principal_cache import Principal, principal_cache
+from app.core.responses import NDJSONResponse, ORJSONResponse, wants_ndjson
+from app.core.roles import role_registry
 from app.core.security import get_current_admin
-from app.models.user import User
 from app.services.audit_service import (
     get_audit_logs,
-    get_simple_audit_stats
+    get_simple_audit_stats,
+    stream_audit_logs_ndjson,
 )
+from app.services.audit_broadcast import audit_broadcaster
+from app.services.audit_sink import audit_sink
+from app.services.profile_cache import profile_cache
+from app.services.student_number_filter import student_number_filter
 
 router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 
@@ -19,7 +26,7 @@ router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 def admin_dashboard(
         request: Request,
         db: Session = Depends(get_db),
-        _: User = Depends(get_current_admin),
+        _: Principal = Depends(get_current_admin),
 ):
     """داشبورد ادمین - فقط آخرین لاگ‌ها"""
 
@@ -29,12 +36,6 @@ def admin_dashboard(
     # دریافت آمار ساده
     stats = get_simple_audit_stats(db)
 
-    # اضافه کردن شماره دانشجویی و کد ملی به لاگ‌ها
-    for log in recent_logs.get("logs", []):
-        if log.user:
-            log.student_number = log.user.student_number  # شماره دانشجویی
-            log.national_code = log.user.profile.national_code if log.user.profile else None  # کد ملی
-
     return request.app.state.templates.TemplateResponse(
         "admin/dashboard.html",
         {
@@ -49,13 +50,16 @@ def admin_dashboard(
 def audit_logs_page(
         request: Request,
         db: Session = Depends(get_db),
-        _: User = Depends(get_current_admin),
+        _: Principal = Depends(get_current_admin),
         skip: int = Query(0, ge=0, description="تعداد رکوردهای رد شده"),
         limit: int = Query(50, ge=1, le=200, description="تعداد رکوردهای قابل نمایش"),
         date_from: Optional[datetime] = Query(None, description="تاریخ شروع"),
         date_to: Optional[datetime] = Query(None, description="تاریخ پایان"),
         action: Optional[str] = Query(None, description="فیلتر بر اساس عمل"),
         user_id: Optional[int] = Query(None, description="فیلتر بر اساس کاربر"),
+        cursor: Optional[str] = Query(None, description="cursor صفحه بعد (به جای skip)"),
+        include_total: bool = Query(True, description="محاسبه تعداد کل"),
+        q: Optional[str] = Query(None, max_length=200, description="جستجوی متنی در توضیحات و موجودیت"),
 ):
     """صفحه نمایش لاگ‌های سیستم"""
 
@@ -67,44 +71,69 @@ def audit_logs_page(
         date_from=date_from,
         date_to=date_to,
         action=action,
-        user_id=user_id
+        user_id=user_id,
+        cursor=cursor,
+        include_total=include_total,
+        q=q,
     )
 
-    # اضافه کردن اطلاعات بیشتر به لاگ‌ها
-    for log in result.get("logs", []):
-        if log.user:
-            log.student_number = log.user.student_number
-            log.national_code = log.user.profile.national_code if log.user.profile else None
-
     return request.app.state.templates.TemplateResponse(
         "admin/audit_logs.html",
         {
             "request": request,
             "logs": result.get("logs", []),
-            "total": result.get("total", 0),
+            "total": result.get("total"),
             "skip": skip,
             "limit": limit,
             "has_more": result.get("has_more", False),
+            "next_cursor": result.get("next_cursor"),
             "date_from": date_from,
             "date_to": date_to,
             "action": action,
             "user_id": user_id,
+            "q": q,
+            "filters": {
+                "user_id": user_id or "",
+                "action": action or "",
+                "date_from": date_from.isoformat() if date_from else "",
+                "date_to": date_to.isoformat() if date_to else "",
+                "q": q or "",
+            },
         },
     )
 
 
 @router.get("/api/audit-logs", response_model=dict)
 def list_audit_logs_api(
+        request: Request,
         db: Session = Depends(get_db),
-        _: User = Depends(get_current_admin),
+        _: Principal = Depends(get_current_admin),
         skip: int = Query(0, ge=0),
         limit: int = Query(50, ge=1, le=200),
         date_from: Optional[datetime] = Query(None),
         date_to: Optional[datetime] = Query(None),
         action: Optional[str] = Query(None),
         user_id: Optional[int] = Query(None),
+        cursor: Optional[str] = Query(None, description="مقدار next_cursor صفحه قبل"),
+        include_total: bool = Query(True),
+        q: Optional[str] = Query(None, max_length=200, description="جستجوی متنی (مرتب بر اساس امتیاز)"),
 ):
-    """API دریافت لیست لاگ‌ها (برای AJAX/API calls)"""
+    """
+    API دریافت لیست لاگ‌ها (برای AJAX/API calls)
+
+    با Accept: application/x-ndjson همه لاگ‌های بعد از cursor (بدون limit و skip)
+    به صورت جریانی و یک لاگ در هر خط برگردانده می‌شوند.
+    """
+    headers = {"Vary": "Accept"}
+    if wants_ndjson(request):
+        return NDJSONResponse(stream_audit_logs_ndjson(
+            date_from=date_from,
+            date_to=date_to,
+            action=action,
+            user_id=user_id,
+            cursor=cursor,
+            q=q,
+        ), headers=headers)
 
     result = get_audit_logs(
         db=db,
@@ -113,13 +142,79 @@ def list_audit_logs_api(
         date_from=date_from,
         date_to=date_to,
         action=action,
-        user_id=user_id
+        user_id=user_id,
+        cursor=cursor,
+        include_total=include_total,
+        q=q,
     )
 
-    # اضافه کردن اطلاعات بیشتر به لاگ‌ها
-    for log in result.get("logs", []):
-        if log.user:
-            log.student_number = log.user.student_number
-            log.national_code = log.user.profile.national_code if log.user.profile else None
+    return ORJSONResponse(result, headers=headers)
+
+
+@router.get("/api/audit-sink", response_model=dict)
+def audit_sink_stats(
+        _: Principal = Depends(get_current_admin),
+):
+    """متریک‌های صف نوشتن لاگ‌ها (عمق صف، لاگ‌های دور ریخته شده و ...)"""
+    return audit_sink.stats()
+
+
+@router.get("/api/audit-stream", response_model=dict)
+def audit_stream_stats(
+        _: Principal = Depends(get_current_admin),
+):
+    """متریک‌های جریان زنده لاگ‌ها (تعداد کلاینت‌ها، رویدادهای دور ریخته شده و ...)"""
+    return audit_broadcaster.stats()
+
+
+@router.get("/api/student-filter", response_model=dict)
+def student_filter_stats(
+        _: Principal = Depends(get_current_admin),
+):
+    """متریک‌های Bloom filter شماره‌های دانشجویی (اندازه، نرخ مثبت کاذب و ...)"""
+    return student_number_filter.stats()
+
 
-    return result
+@router.post("/api/student-filter/rebuild", response_model=dict)
+def rebuild_student_filter(
+        _: Principal = Depends(get_current_admin),
+):
+    """ساخت دوباره Bloom filter از جدول users (مثلاً بعد از needs_rebuild یا حذف کاربران)"""
+    student_number_filter.rebuild()
+    return student_number_filter.stats()
+
+
+@router.get("/api/profile-cache", response_model=dict)
+def profile_cache_stats(
+        _: Principal = Depends(get_current_admin),
+):
+    """متریک‌های کش پروفایل‌ها (hit/miss/eviction، اندازه و backend)"""
+    return profile_cache.stats()
+
+
+@router.post("/api/profile-cache/clear", response_model=dict)
+def clear_profile_cache(
+        _: Principal = Depends(get_current_admin),
+):
+    """خالی کردن کش پروفایل‌ها (مثلاً بعد از تغییر مستقیم دیتابیس)"""
+    profile_cache.clear()
+    return profile_cache.stats()
+
+
+@router.get("/api/roles", response_model=dict)
+def role_registry_stats(
+        _: Principal = Depends(get_current_admin),
+):
+    """نقش‌های بارگذاری شده در رجیستری و bitmask مجوزهای هر نقش"""
+    return role_registry.stats()
+
+
+@router.post("/api/roles/reload", response_model=dict)
+def reload_role_registry(
+        _: Principal = Depends(get_current_admin),
+):
+    """خواندن دوباره نقش‌ها از دیتابیس (بعد از تغییر مستقیم جدول roles یا در پردازه دیگر)"""
+    role_registry.load()
+    # Principalهای کش شده نام نقش و مجوزها را snapshot کرده‌اند
+    principal_cache.clear()
+    return role_registry.stats()
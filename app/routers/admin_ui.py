@@ -6,8 +6,8 @@ from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
 from app.core.security import get_current_admin
-from app.models.audit_log import AuditLog
-from app.models.user import User  # فرض می‌کنیم مدل User اینجا است
+from app.core.principal_cache import Principal
+from app.services.audit_service import get_audit_logs
 
 # ایجاد router
 router = APIRouter()
@@ -17,39 +17,32 @@ router = APIRouter()
 def audit_logs_page(
     request: Request,
     db: Session = Depends(get_db),
-    _: User = Depends(get_current_admin),
+    _: Principal = Depends(get_current_admin),
     # پارامترهای query (فیلترها)
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     action: Optional[str] = Query(None, description="Filter by action"),
     date_from: Optional[datetime] = Query(None, description="Filter from date"),
     date_to: Optional[datetime] = Query(None, description="Filter to date"),
+    q: Optional[str] = Query(None, max_length=200, description="Full-text search in description/entity"),
+    # صفحه‌بندی keyset (در جستجوی متنی: skip)
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    skip: int = Query(0, ge=0, description="Offset (search results only)"),
+    limit: int = Query(500, ge=1, le=500, description="Page size"),
+    include_total: bool = Query(False, description="Compute total count"),
 ):
-    query = db.query(AuditLog)
-
-    if user_id is not None:
-        query = query.filter(AuditLog.user_id == user_id)
-
-    if action:
-        query = query.filter(AuditLog.action == action)
-
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-
-    logs = (
-        query
-        .order_by(AuditLog.created_at.desc())
-        .limit(500)
-        .all()
+    result = get_audit_logs(
+        db=db,
+        skip=skip,
+        limit=limit,
+        date_from=date_from,
+        date_to=date_to,
+        action=action,
+        user_id=user_id,
+        cursor=cursor,
+        include_total=include_total,
+        q=q,
     )
-
-    # اضافه کردن اطلاعات شماره دانشجویی و کد ملی
-    for log in logs:
-        if log.user:
-            log.student_number = log.user.student_number  # شماره دانشجویی
-            log.national_code = log.user.profile.national_code if log.user.profile else None  # کد ملی
+    logs = result["logs"]
 
     # تبدیل تاریخ‌ها به string برای نمایش در فرم
     date_from_str = date_from.isoformat() if date_from else ""
@@ -60,11 +53,17 @@ def audit_logs_page(
         {
             "request": request,
             "logs": logs,
+            "total": result["total"],
+            "next_cursor": result["next_cursor"],
+            "has_more": result["has_more"],
+            "skip": result["skip"],
+            "limit": limit,
             "filters": {
                 "user_id": user_id or "",
                 "action": action or "",
                 "date_from": date_from_str,
                 "date_to": date_to_str,
+                "q": q or "",
             },
         },
     )
@@ -1,15 +1,20 @@
 # app/routers/auth.py
-from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.orm import Session
-from app.core.deps import DBDep, CurrentUser, get_db
+from fastapi import APIRouter, Depends, Request, Response, status, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.deps import AsyncDBDep, CurrentUser, get_async_db
+from app.core.etag import conditional_response, principal_etag
+from app.core.principal_cache import Principal
 from app.schemas.auth import RegisterRequest, Token, RegisterResponse
 from app.schemas.user import UserOut
 from app.services.auth_service import (
-    register_user,
-    authenticate_user,
+    register_user_async,
+    authenticate_user_async,
     create_token_for_user
 )
+from app.services.student_service import get_user_out_async
 from app.models.user import User
+from app.services.student_number_filter import STUDENT_FILTER_ENABLED, student_number_filter
 
 router = APIRouter(
     prefix="/auth",
@@ -25,15 +30,15 @@ router = APIRouter(
 )
 async def register(
         data: RegisterRequest,  # اطلاعات ثبت نام شامل شماره دانشجویی و کد ملی
-        db: Session = DBDep()  # دسترسی به دیتابیس
+        db: AsyncSession = AsyncDBDep()  # دسترسی به دیتابیس
 ):
     # ثبت‌نام کاربر با استفاده از اطلاعات شماره دانشجویی و کد ملی
-    user = await register_user(db=db, data=data)
+    user = await register_user_async(db=db, data=data)
     return {
         "message": "ثبت‌نام با موفقیت انجام شد",
         "user_id": user.id,
         "student_number": user.student_number,
-        "role": user.role.name  # نقش کاربر
+        "role": user.role_name  # نقش کاربر (از role_registry)
     }
 
 
@@ -44,12 +49,12 @@ async def register(
 )
 async def login(
         data: RegisterRequest,  # داده‌های ورود شامل شماره دانشجویی و کد ملی
-        db: Session = DBDep()  # دسترسی به دیتابیس
+        db: AsyncSession = AsyncDBDep()  # دسترسی به دیتابیس
 ):
     """ورود به سیستم و دریافت توکن JWT."""
 
     # احراز هویت کاربر با استفاده از شماره دانشجویی و رمز عبور برابر با شماره دانشجویی
-    user = authenticate_user(
+    user = await authenticate_user_async(
         db,
         student_number=data.student_number,  # بررسی شماره دانشجویی
         password=data.student_number  # رمز عبور برابر با شماره دانشجویی است
@@ -77,16 +82,36 @@ async def login(
     summary="دریافت اطلاعات کاربر جاری"
 )
 async def get_me(
-        current_user: User = CurrentUser()
+        request: Request,
+        response: Response,
+        db: AsyncSession = AsyncDBDep(),
+        current_user: Principal = CurrentUser()
 ):
-    """دریافت اطلاعات کاربر فعلی."""
-    return current_user
+    """دریافت اطلاعات کاربر فعلی همراه با خلاصه پروفایل."""
+    not_modified = conditional_response(request, response, principal_etag(current_user))
+    if not_modified:
+        return not_modified
+    return await get_user_out_async(db, current_user)
 
 @router.get("/check/{student_number}")
-async def check_student_number(student_number: str, db: Session = Depends(get_db)):
-    """بررسی موجودیت شماره دانشجویی"""
-    existing_user = db.query(User).filter(User.student_number == student_number).first()
-    return {"available": existing_user is None}
+async def check_student_number(student_number: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    بررسی موجودیت شماره دانشجویی
+
+    شماره‌هایی که در Bloom filter نیستند بدون دیتابیس «آزاد» هستند. اگر
+    فیلتر از آخرین sync کهنه‌تر از STUDENT_FILTER_SYNC_INTERVAL باشد، ابتدا
+    کاربران ساخته‌شده در پردازه‌های دیگر (id بزرگ‌تر از آخرین id دیده‌شده) اضافه می‌شوند.
+    """
+    if STUDENT_FILTER_ENABLED:
+        if student_number_filter.needs_sync():
+            await student_number_filter.sync_async(db)
+        if not student_number_filter.might_contain(student_number):
+            return {"available": True}
+
+    existing_user_id = await db.scalar(select(User.id).where(User.student_number == student_number))
+    if STUDENT_FILTER_ENABLED:
+        student_number_filter.record_confirmation(existing_user_id is not None)
+    return {"available": existing_user_id is None}
 
 
 
@@ -1,35 +1,45 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_db
+from app.core.deps import get_async_db
+from app.core.etag import conditional_response, profile_etag
+from app.core.principal_cache import Principal
 from app.core.security import get_current_user
 from app.schemas.student import StudentProfileOut, StudentProfileUpdate
 from app.services import student_service
-from app.models.user import User
 
 router = APIRouter(prefix="/student", tags=["Student"])
 
 
 @router.get("/me", response_model=StudentProfileOut)
-def read_my_profile(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def read_my_profile(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     مشاهده پروفایل دانشجویی کاربر جاری.
     اطلاعات کاربر بر اساس شماره دانشجویی و کد ملی ارائه می‌شود.
+
+    با If-None-Match برابر ETag فعلی، 304 بدون خواندن پروفایل برگردانده می‌شود.
     """
-    return student_service.get_my_profile(db, current_user)
+    if current_user.profile_id is not None:
+        not_modified = conditional_response(request, response, profile_etag(current_user))
+        if not_modified:
+            return not_modified
+
+    return await student_service.get_my_profile_async(db, current_user)
 
 
 @router.put("/me", response_model=StudentProfileOut)
-def update_my_profile(
+async def update_my_profile(
     data: StudentProfileUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     به‌روزرسانی پروفایل دانشجویی کاربر جاری.
     اطلاعات پروفایل از شماره دانشجویی و کد ملی گرفته می‌شود.
     """
-    return student_service.update_my_profile(db, current_user, data)
+    return await student_service.update_my_profile_async(db, current_user, data)
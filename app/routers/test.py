@@ -1,8 +1,13 @@
 # app/routers/test.py - اصلاح شده
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from app.core.deps import DBDep, CurrentUser, AdminDep
+from app.core.deps import AsyncDBDep, CurrentUser, AdminDep
+from app.core.responses import ORJSONResponse
+from app.core.roles import role_registry
+from app.core.principal_cache import Principal
 from app.models.user import User
 from app.models.role import Role
 from app.models.student_profile import StudentProfile
@@ -62,18 +67,18 @@ async def test_auth():
     summary="تست دیتابیس",
     description="تست اتصال و سلامت دیتابیس"
 )
-async def test_database(db: Session = DBDep()):  # ✅ اصلاح شده
+async def test_database(db: AsyncSession = AsyncDBDep()):
     """
     تست اتصال به دیتابیس و شمارش رکوردها.
     """
     try:
         # شمارش رکوردها
-        user_count = db.query(User).count()
-        role_count = db.query(Role).count()
-        profile_count = db.query(StudentProfile).count()
+        user_count = await db.scalar(select(func.count(User.id)))
+        role_count = await db.scalar(select(func.count(Role.id)))
+        profile_count = await db.scalar(select(func.count(StudentProfile.id)))
 
         # تست query ساده
-        latest_user = db.query(User).order_by(User.created_at.desc()).first()
+        latest_user = await db.scalar(select(User).order_by(User.created_at.desc()).limit(1))
 
         return {
             "database": "connected ✅",
@@ -102,7 +107,7 @@ async def test_database(db: Session = DBDep()):  # ✅ اصلاح شده
     summary="تست کاربر جاری",
     description="تست endpoint محافظت شده با توکن"
 )
-async def test_me(current_user: User = CurrentUser()):  # ✅ اصلاح شده
+async def test_me(current_user: Principal = CurrentUser()):  # ✅ اصلاح شده
     """
     تست دریافت اطلاعات کاربر جاری.
 
@@ -111,7 +116,8 @@ async def test_me(current_user: User = CurrentUser()):  # ✅ اصلاح شده
     return {
         "id": current_user.id,
         "student_number": current_user.student_number,
-        "role": current_user.role.name if current_user.role else None,
+        "role": current_user.role_name,
+        "role_id": current_user.role_id,
         "is_active": current_user.is_active,
         "created_at": current_user.created_at,
         "additional_info": "این یک endpoint تستی است"
@@ -123,7 +129,7 @@ async def test_me(current_user: User = CurrentUser()):  # ✅ اصلاح شده
     summary="تست دسترسی ادمین",
     description="تست endpoint فقط برای ادمین‌ها"
 )
-async def test_admin_only(admin_user: User = AdminDep()):  # ✅ اصلاح شده
+async def test_admin_only(admin_user: Principal = AdminDep()):  # ✅ اصلاح شده
     """
     فقط کاربران با نقش admin می‌توانند به این endpoint دسترسی داشته باشند.
     """
@@ -132,7 +138,7 @@ async def test_admin_only(admin_user: User = AdminDep()):  # ✅ اصلاح شد
         "user": {
             "id": admin_user.id,
             "student_number": admin_user.student_number,
-            "role": admin_user.role.name if admin_user.role else None
+            "role": admin_user.role_name
         },
         "permissions": [
             "create_users",
@@ -149,8 +155,8 @@ async def test_admin_only(admin_user: User = AdminDep()):  # ✅ اصلاح شد
     description="نمایش لیست کاربران (برای تست)"
 )
 async def list_users(
-    db: Session = DBDep(),  # ✅ اصلاح شده
-    current_user: User = CurrentUser(),  # ✅ اصلاح شده
+    db: AsyncSession = AsyncDBDep(),
+    current_user: Principal = CurrentUser(),  # ✅ اصلاح شده
     limit: int = 10,
     offset: int = 0
 ):
@@ -168,7 +174,14 @@ async def list_users(
             detail="شما دسترسی به لیست کاربران را ندارید"
         )
 
-    users = db.query(User).offset(offset).limit(limit).all()
+    users = (
+        await db.scalars(
+            select(User)
+            .options(selectinload(User.role), selectinload(User.profile))
+            .offset(offset)
+            .limit(limit)
+        )
+    ).all()
 
     user_list = []
     for user in users:
@@ -190,14 +203,14 @@ async def list_users(
 
         user_list.append(user_data)
 
-    total_users = db.query(User).count()
+    total_users = await db.scalar(select(func.count(User.id)))
 
-    return {
+    return ORJSONResponse({
         "total": total_users,
         "limit": limit,
         "offset": offset,
         "users": user_list
-    }
+    })
 
 
 @router.get(
@@ -205,34 +218,35 @@ async def list_users(
     summary="لیست نقش‌ها (تست)",
     description="نمایش لیست نقش‌های سیستم"
 )
-async def list_roles(db: Session = DBDep()):  # ✅ اصلاح شده
+async def list_roles(db: AsyncSession = AsyncDBDep()):
     """
     نمایش لیست نقش‌های موجود در سیستم.
     """
-    roles = db.query(Role).all()
+    roles = (await db.scalars(select(Role))).all()
 
     role_list = []
     for role in roles:
-        user_count = db.query(User).filter(User.role_id == role.id).count()
+        user_count = await db.scalar(select(func.count(User.id)).where(User.role_id == role.id))
+        users_sample = (
+            await db.scalars(
+                select(User.student_number)
+                .where(User.role_id == role.id)
+                .limit(3)
+            )
+        ).all()
 
         role_list.append({
             "id": role.id,
             "name": role.name,
             "description": role.description,
             "user_count": user_count,
-            "users_sample": [
-                user.student_number
-                for user in db.query(User)
-                .filter(User.role_id == role.id)
-                .limit(3)
-                .all()
-            ]
+            "users_sample": users_sample
         })
 
-    return {
+    return ORJSONResponse({
         "total_roles": len(roles),
         "roles": role_list
-    }
+    })
 
 
 @router.get(
@@ -242,8 +256,8 @@ async def list_roles(db: Session = DBDep()):  # ✅ اصلاح شده
 )
 async def get_user_profile(
     user_id: int,
-    db: Session = DBDep(),  # ✅ اصلاح شده
-    current_user: User = CurrentUser()  # ✅ اصلاح شده
+    db: AsyncSession = AsyncDBDep(),
+    current_user: Principal = CurrentUser()  # ✅ اصلاح شده
 ):
     """
     دریافت پروفایل کاربر.
@@ -257,7 +271,11 @@ async def get_user_profile(
             detail="شما فقط می‌توانید پروفایل خودتان را ببینید"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(
+        select(User)
+        .options(selectinload(User.role), selectinload(User.profile))
+        .where(User.id == user_id)
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -292,8 +310,8 @@ async def get_user_profile(
     description="ایجاد یک کاربر تستی برای آزمایش"
 )
 async def create_test_user(
-    db: Session = DBDep(),  # ✅ اصلاح شده
-    current_user: User = AdminDep(),  # ✅ اصلاح شده
+    db: AsyncSession = AsyncDBDep(),
+    current_user: Principal = AdminDep(),  # ✅ اصلاح شده
     student_number: str = "test12345",
     role_name: str = "user"
 ):
@@ -302,10 +320,10 @@ async def create_test_user(
 
     فقط برای اهداف توسعه و تست.
     """
-    from app.core.security import hash_password
+    from app.core.security import hash_password_async
 
-    # بررسی وجود نقش
-    role = db.query(Role).filter(Role.name == role_name).first()
+    # بررسی وجود نقش (از role_registry، بدون کوئری)
+    role = role_registry.by_name(role_name)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -313,7 +331,7 @@ async def create_test_user(
         )
 
     # بررسی وجود کاربر با این شماره دانشجویی
-    existing_user = db.query(User).filter(User.student_number == student_number).first()
+    existing_user = await db.scalar(select(User.id).where(User.student_number == student_number))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -323,13 +341,12 @@ async def create_test_user(
     # ایجاد کاربر
     user = User(
         student_number=student_number,
-        hashed_password=hash_password(student_number),  # رمز = شماره دانشجویی
+        hashed_password=await hash_password_async(student_number),  # رمز = شماره دانشجویی
         role_id=role.id
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
     return {
         "message": "کاربر تستی ایجاد شد",
@@ -348,7 +365,7 @@ async def create_test_user(
     summary="سلامت سیستم",
     description="چک سلامت کامل سیستم"
 )
-async def health_check(db: Session = DBDep()):  # ✅ اصلاح شده
+async def health_check(db: AsyncSession = AsyncDBDep()):
     """
     بررسی سلامت کامل سیستم.
 
@@ -365,7 +382,7 @@ async def health_check(db: Session = DBDep()):  # ✅ اصلاح شده
 
     try:
         # ۱. چک دیتابیس
-        db.execute("SELECT 1")
+        await db.execute(text("SELECT 1"))
         health_status["checks"].append({
             "name": "database",
             "status": "healthy",
@@ -383,13 +400,14 @@ async def health_check(db: Session = DBDep()):  # ✅ اصلاح شده
     tables = ["users", "roles", "student_profiles"]
     for table in tables:
         try:
-            db.execute(f"SELECT 1 FROM {table} LIMIT 1")
+            await db.execute(text(f"SELECT 1 FROM {table} LIMIT 1"))
             health_status["checks"].append({
                 "name": f"table_{table}",
                 "status": "healthy",
                 "message": f"جدول {table} وجود دارد"
             })
         except Exception as e:
+            await db.rollback()
             health_status["status"] = "unhealthy"
             health_status["checks"].append({
                 "name": f"table_{table}",
@@ -400,7 +418,7 @@ async def health_check(db: Session = DBDep()):  # ✅ اصلاح شده
     # ۳. چک نقش‌های ضروری
     essential_roles = ["user", "admin"]
     for role_name in essential_roles:
-        role = db.query(Role).filter(Role.name == role_name).first()
+        role = await db.scalar(select(Role).where(Role.name == role_name))
         if role:
             health_status["checks"].append({
                 "name": f"role_{role_name}",
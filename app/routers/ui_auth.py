@@ -12,13 +12,13 @@ from fastapi.responses import (
     HTMLResponse
 )
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import DBDep
+from app.core.deps import AsyncDBDep, DBDep
 from app.schemas.auth import RegisterRequest, GenderEnum
-from app.services.auth_service import register_user
-from app.core.security import create_access_token, verify_password
-from app.models.user import User
+from app.services.auth_service import authenticate_user_async, register_user_async
+from app.core.security import create_access_token
 
 # ----------------------------
 # Router & Templates
@@ -81,7 +81,7 @@ async def submit_register(
     phone_number: str = Form(...),
     gender: str = Form(...),
     address: Optional[str] = Form(""),
-    db: Session = DBDep()
+    db: AsyncSession = AsyncDBDep()
 ):
     try:
         # تبدیل gender به Enum
@@ -95,7 +95,7 @@ async def submit_register(
             address=address or None
         )
 
-        register_user(db, register_data)
+        await register_user_async(db, register_data)
 
         return templates.TemplateResponse(
             "auth/login.html",
@@ -170,13 +170,12 @@ async def submit_login(
     password: str = Form(...),
     remember_me: Optional[str] = Form(None),
     redirect_url: Optional[str] = Form("/ui-auth/dashboard"),
-    db: Session = DBDep()
+    db: AsyncSession = AsyncDBDep()
 ):
-    user = db.query(User).filter(
-        User.student_number == username
-    ).first()
+    # تأیید رمز عبور در process pool انجام می‌شود
+    user = await authenticate_user_async(db, username, password)
 
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
         return templates.TemplateResponse(
             "auth/login.html",
             {
@@ -201,7 +200,11 @@ async def submit_login(
         )
 
     access_token = create_access_token(
-        data={"sub": user.student_number, "user_id": user.id}
+        data={
+            "sub": user.student_number,
+            "user_id": user.id,
+            "national_code": user.profile.national_code if user.profile else None,
+        }
     )
 
     max_age = 30 * 24 * 60 * 60 if remember_me else 24 * 60 * 60
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
+from app.core.etag import conditional_response, make_etag, principal_etag
+from app.core.principal_cache import Principal
 from app.core.security import get_current_user, get_current_admin
 from app.core.deps import get_db
 from app.models.user import User
 from app.schemas.user import UserOut
+from app.services.student_service import get_user_out
 
 router = APIRouter(
     prefix="/users",
@@ -18,13 +21,19 @@ router = APIRouter(
 
 @router.get("/me", response_model=UserOut)
 def read_user_me(
-        current_user: User = Depends(get_current_user),  # استفاده از get_current_user برای اعتبارسنجی
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(get_current_user),  # استفاده از get_current_user برای اعتبارسنجی
 ):
     """
-    دریافت اطلاعات هویتی کاربر فعلی.
-    (اطلاعات سیستمی – نه پروفایل دانشجویی)
+    دریافت اطلاعات هویتی کاربر فعلی همراه با خلاصه پروفایل.
+    (پروفایل از profile_cache خوانده می‌شود؛ با ETag معتبر هیچ کوئری‌ای اجرا نمی‌شود)
     """
-    return current_user
+    not_modified = conditional_response(request, response, principal_etag(current_user))
+    if not_modified:
+        return not_modified
+    return get_user_out(db, current_user)
 
 
 # ------------------------------------------------------------------
@@ -34,14 +43,16 @@ def read_user_me(
 @router.get("/{user_id}", response_model=UserOut)
 def read_user_by_id(
         user_id: int,
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
 ):
     """
     دریافت اطلاعات هویتی یک کاربر خاص.
     دسترسی فقط برای ادمین.
     """
-    if current_user.role.name != "admin":
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="دسترسی غیرمجاز",
@@ -59,4 +70,11 @@ def read_user_by_id(
             detail="کاربر یافت نشد",
         )
 
+    # پاسخ شامل خلاصه پروفایل است؛ تغییر پروفایل هم ETag را عوض می‌کند
+    profile_updated_at = user.profile.updated_at if user.profile else None
+    not_modified = conditional_response(
+        request, response, make_etag("user", user.id, user.updated_at, profile_updated_at)
+    )
+    if not_modified:
+        return not_modified
     return user
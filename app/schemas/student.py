@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import AliasChoices, AliasPath, BaseModel, Field, field_validator
 from typing import Optional
+from datetime import datetime
 from enum import Enum
+from typing_extensions import TypedDict
 
 # Enum برای جنسیت
 class GenderEnum(str, Enum):
@@ -56,10 +58,20 @@ class AdminStudentUpdate(StudentProfileBase):
     status: AccountStatus
 
 
-# کلاس خروجی پروفایل دانشجویی (Student)
-class StudentProfileOut(StudentProfileBase):
+# کلاس خروجی پروفایل دانشجویی (Student)؛ مطابق ستون‌های StudentProfile،
+# شماره دانشجویی از کاربر مربوطه (profile.user) خوانده می‌شود
+class StudentProfileOut(BaseModel):
     id: int
-    status: AccountStatus
+    user_id: int
+    student_number: str = Field(
+        ..., validation_alias=AliasChoices("student_number", AliasPath("user", "student_number"))
+    )
+    national_code: str
+    phone_number: str
+    gender: GenderEnum
+    address: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     model_config = {
         "from_attributes": True
@@ -78,3 +90,27 @@ class StudentProfileOutDB(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+# ردیف لیست دانشجویان ادمین (app/services/student_list_service.py)؛
+# total=False چون با fields فقط ستون‌های خواسته‌شده وجود دارند
+class StudentListRow(TypedDict, total=False):
+    id: int
+    user_id: int
+    student_number: str
+    national_code: str
+    phone_number: str
+    gender: str
+    address: Optional[str]
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+class StudentListPage(BaseModel):
+    """صفحه لیست دانشجویان ادمین (GET /admin/students)"""
+    students: list[StudentListRow]
+    total: Optional[int] = None  # فقط با include_total
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str] = None
@@ -1,12 +1,22 @@
 from pydantic import BaseModel, Field
 from typing import Optional
 
+# خلاصه پروفایل در خروجی کاربر (همان کلیدهای User.to_dict(include_profile=True))
+class UserProfileOut(BaseModel):
+    national_code: str
+    phone_number: str
+    gender: str
+    address: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+
 class UserOut(BaseModel):
     id: int
     student_number: str
     role_id: int
     is_active: bool
-    profile: Optional[dict] = None
+    profile: Optional[UserProfileOut] = None
 
     model_config = {"from_attributes": True}
 
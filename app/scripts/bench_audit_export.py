@@ -0,0 +1,211 @@
+# scripts/bench_audit_export.py
+"""
+مقایسه حافظه و زمان خروجی گرفتن از لاگ‌های audit.
+
+روش‌های قدیمی (خواندن همه ردیف‌ها با ORM و ساخت کل فایل در حافظه) با
+خروجی‌های جریانی audit_export_service مقایسه می‌شوند. هر حالت در یک process
+جداگانه اجرا می‌شود و اوج RSS (VmHWM) فقط برای همان حالت اندازه‌گیری می‌شود.
+
+نمونه اجرا:
+    python -m app.scripts.bench_audit_export --rows 100000 1000000 5000000 --skip-legacy
+    python -m app.scripts.bench_audit_export --rows 100000 --formats csv excel
+    python -m app.scripts.bench_audit_export --rows 1000000 --formats csv parquet --skip-legacy
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from openpyxl import Workbook
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_db_engine
+from app.models import role, student_profile, user  # noqa: F401  ثبت جداول روی Base
+from app.models.audit_log import AuditLog
+from app.services.audit_export_service import (
+    EXPORT_HEADERS,
+    PYARROW_AVAILABLE,
+    build_export_query,
+    export_excel_file,
+    export_parquet_file,
+    stream_csv,
+)
+
+ACTIONS = ["LOGIN", "REGISTER", "UPDATE_PROFILE", "ADMIN_UPDATE", "ACCESS_DENIED"]
+
+
+def _populate(engine, start_row: int, rows: int, chunk: int = 50000):
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(start_row, rows, chunk):
+            conn.execute(
+                AuditLog.__table__.insert(),
+                [
+                    {
+                        "action": ACTIONS[i % len(ACTIONS)],
+                        "entity": "user",
+                        "entity_id": i,
+                        "description": f"bench row {i}",
+                        "ip_address": "127.0.0.1",
+                        "created_at": start + timedelta(seconds=i),
+                    }
+                    for i in range(offset, min(offset + chunk, rows))
+                ],
+            )
+
+
+def _legacy_logs(engine):
+    db = sessionmaker(bind=engine)()
+    try:
+        return db.query(AuditLog).order_by(AuditLog.created_at.desc()).all()
+    finally:
+        db.close()
+
+
+def legacy_csv(engine):
+    """پیاده‌سازی قبلی: همه ردیف‌ها با ORM و کل CSV در یک StringIO"""
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_HEADERS)
+    for log in _legacy_logs(engine):
+        writer.writerow([
+            log.id, log.user_id, log.action, log.entity, log.entity_id,
+            log.description, log.ip_address, log.created_at,
+        ])
+    return len(output.getvalue().encode("utf-8"))
+
+
+def legacy_excel(engine):
+    """پیاده‌سازی قبلی: Workbook معمولی و ذخیره در BytesIO"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(EXPORT_HEADERS)
+    for log in _legacy_logs(engine):
+        ws.append([
+            log.id, log.user_id, log.action, log.entity, log.entity_id,
+            log.description, log.ip_address, log.created_at.strftime("%Y-%m-%d %H:%M"),
+        ])
+    stream = BytesIO()
+    wb.save(stream)
+    return stream.tell()
+
+
+def streaming_csv(engine, compress: bool = False):
+    return sum(len(chunk) for chunk in stream_csv(build_export_query(), compress=compress, bind=engine))
+
+
+def _file_export(export, engine):
+    path = export(build_export_query(), bind=engine)
+    try:
+        return os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+
+def streaming_excel(engine):
+    return _file_export(export_excel_file, engine)
+
+
+def streaming_parquet(engine):
+    return _file_export(export_parquet_file, engine)
+
+
+CASES = {
+    "csv": {
+        "legacy csv (ORM .all())": legacy_csv,
+        "streaming csv": streaming_csv,
+        "streaming csv + gzip": lambda engine: streaming_csv(engine, compress=True),
+    },
+    "excel": {
+        "legacy excel (Workbook)": legacy_excel,
+        "write-only excel (tempfile)": streaming_excel,
+    },
+}
+if PYARROW_AVAILABLE:
+    CASES["parquet"] = {"parquet (zstd, arrow batches)": streaming_parquet}
+
+
+def _reset_peak_rss():
+    """صفر کردن VmHWM (لینوکس)؛ چون ru_maxrss از process والد به ارث می‌رسد"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mib() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss روی لینوکس به کیلوبایت است
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_case(format_name: str, case_name: str, path: str, results):
+    # پروفایل sqlite-dev: بدون mmap تا صفحات فایل دیتابیس در RSS شمرده نشوند
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    _reset_peak_rss()
+    baseline = _peak_rss_mib()
+    start = time.perf_counter()
+    size = CASES[format_name][case_name](engine)
+    results.put((time.perf_counter() - start, baseline, _peak_rss_mib(), size))
+
+
+def _measure(format_name: str, case_name: str, path: str) -> tuple:
+    """اجرای یک حالت در process تازه: (زمان، RSS پایه، اوج RSS، حجم خروجی)"""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_run_case, args=(format_name, case_name, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک خروجی لاگ‌ها")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000, 5000000])
+    parser.add_argument("--formats", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--skip-legacy", action="store_true", help="اجرا نکردن روش‌های قدیمی (پرمصرف)")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="basij-bench-"), "audit.db")
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-prod", echo=False)
+    Base.metadata.create_all(bind=engine)
+
+    populated = 0
+    for rows in sorted(args.rows):
+        print(f"📝 ساخت لاگ‌ها تا {rows} ردیف ...")
+        _populate(engine, populated, rows)
+        populated = rows
+
+        print("=" * 72)
+        print(f"📊 rows={rows}")
+        print("=" * 72)
+        for format_name in args.formats:
+            for case_name in CASES[format_name]:
+                if args.skip_legacy and case_name.startswith("legacy"):
+                    continue
+                elapsed, baseline, peak, size = _measure(format_name, case_name, path)
+                print(
+                    f"  {case_name:<30} {elapsed:>8.2f} s   "
+                    f"peak RSS {peak:>8.1f} MiB (+{peak - baseline:.1f})   "
+                    f"{size / (1024 * 1024):>8.1f} MiB out"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# scripts/bench_audit_pagination.py
+"""
+مقایسه تأخیر صفحه‌بندی OFFSET و keyset (cursor) در get_audit_logs.
+
+یک دیتابیس موقت با تعداد مشخصی لاگ ساخته می‌شود و زمان صفحه اول و
+صفحه عمیق (پیش‌فرض ۱۰٬۰۰۰) برای هر دو روش اندازه‌گیری می‌شود.
+
+نمونه اجرا:
+    python -m app.scripts.bench_audit_pagination --rows 1000000 --page 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_db_engine
+from app.models import role, student_profile, user  # noqa: F401  ثبت جداول روی Base
+from app.models.audit_log import AuditLog
+from app.services.audit_service import encode_cursor, get_audit_logs
+
+ACTIONS = ["LOGIN", "REGISTER", "UPDATE_PROFILE", "ADMIN_UPDATE", "ACCESS_DENIED"]
+
+
+def _populate(engine, rows: int, chunk: int = 50000):
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, chunk):
+            conn.execute(
+                AuditLog.__table__.insert(),
+                [
+                    {
+                        "action": ACTIONS[i % len(ACTIONS)],
+                        "entity": "user",
+                        "entity_id": i,
+                        "description": f"bench row {i}",
+                        "ip_address": "127.0.0.1",
+                        "created_at": start + timedelta(seconds=i),
+                    }
+                    for i in range(offset, min(offset + chunk, rows))
+                ],
+            )
+
+
+def _timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک صفحه‌بندی لاگ‌ها")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--page", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = max(args.rows, args.limit * args.page + 1)
+    path = os.path.join(tempfile.mkdtemp(prefix="basij-bench-"), "audit.db")
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-prod", echo=False)
+    Base.metadata.create_all(bind=engine)
+
+    print(f"📝 ساخت {rows} لاگ ...")
+    _populate(engine, rows)
+
+    db = sessionmaker(bind=engine)()
+    deep_skip = args.limit * (args.page - 1)
+
+    # cursor صفحه عمیق = آخرین ردیف صفحه قبل (خارج از زمان‌سنجی)
+    previous = (
+        db.query(AuditLog)
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+        .offset(deep_skip - 1)
+        .first()
+    )
+    deep_cursor = encode_cursor(previous)
+
+    cases = {
+        "offset page 1 (with total)": lambda: get_audit_logs(db, skip=0, limit=args.limit),
+        f"offset page {args.page} (with total)": lambda: get_audit_logs(db, skip=deep_skip, limit=args.limit),
+        "keyset page 1": lambda: get_audit_logs(db, limit=args.limit, include_total=False),
+        f"keyset page {args.page}": lambda: get_audit_logs(
+            db, limit=args.limit, cursor=deep_cursor, include_total=False
+        ),
+    }
+
+    print("=" * 60)
+    print(f"📊 rows={rows} limit={args.limit}")
+    print("=" * 60)
+    for name, func in cases.items():
+        print(f"  {name:<32} {_timed(func, args.repeat):>9.2f} ms")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# scripts/bench_json_responses.py
+"""
+بنچمارک سریال‌سازی پاسخ endpointهای لیستی: مسیر قبلی در برابر ORJSONResponse.
+
+یک دیتابیس موقت با --students دانشجو و --logs لاگ ساخته می‌شود و خروجی واقعی
+سرویس‌های هر endpoint با سه روش به بایت تبدیل می‌شود:
+    jsonable_encoder  JSONResponse پیش‌فرض (endpointهای بدون response_model)
+    dump_json         اعتبارسنجی و dump_json پایدانتیک (response_model=dict)
+    orjson            ORJSONResponse (app/core/responses.py)
+برای هر endpoint مسیر قبلی آن با * مشخص و یکسان بودن JSON خروجی بررسی می‌شود.
+
+نمونه اجرا:
+    python -m app.scripts.bench_json_responses --students 5000 --logs 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.core.database import Base, create_db_engine
+from app.core.responses import ORJSONResponse
+from app.models import role  # noqa: F401  ثبت جداول روی Base
+from app.models.audit_log import AuditLog
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.services.audit_service import get_audit_logs
+from app.services.student_list_service import list_students, search_students
+
+ACTIONS = ["LOGIN", "REGISTER", "UPDATE_PROFILE", "ADMIN_UPDATE", "ACCESS_DENIED"]
+
+
+def _populate(engine, students: int, logs: int):
+    start = datetime(2024, 1, 1, 8, 30, 15, 123456)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "student_number": f"40{i:08d}", "hashed_password": "-", "role_id": 1,
+             "created_at": start + timedelta(minutes=i)}
+            for i in range(1, students + 1)
+        ])
+        conn.execute(StudentProfile.__table__.insert(), [
+            {
+                "user_id": i,
+                "national_code": f"{i:010d}",
+                "phone_number": f"0912{i:07d}",
+                "gender": "brother" if i % 2 else "sister",
+                "address": "تهران، خیابان انقلاب",
+                "created_at": start + timedelta(minutes=i),
+            }
+            for i in range(1, students + 1)
+        ])
+        conn.execute(AuditLog.__table__.insert(), [
+            {
+                "user_id": i % students + 1,
+                "action": ACTIONS[i % len(ACTIONS)],
+                "entity": "user",
+                "entity_id": i,
+                "description": f"ورود موفق کاربر شماره {i}",
+                "ip_address": "127.0.0.1",
+                "created_at": start + timedelta(seconds=i),
+            }
+            for i in range(logs)
+        ])
+
+
+def _test_users(db, limit: int) -> dict:
+    """همان شکل خروجی GET /test/users"""
+    users = db.scalars(
+        select(User).options(selectinload(User.role), selectinload(User.profile)).limit(limit)
+    ).all()
+    user_list = []
+    for user in users:
+        user_data = {
+            "id": user.id,
+            "student_number": user.student_number,
+            "role": user.role.name if user.role else None,
+            "is_active": user.is_active,
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+        }
+        if user.profile:
+            user_data["profile"] = {
+                "national_code": user.profile.national_code,
+                "phone_number": user.profile.phone_number,
+                "gender": user.profile.gender,
+            }
+        user_list.append(user_data)
+    return {"total": len(users), "limit": limit, "offset": 0, "users": user_list}
+
+
+def _serializers(payload):
+    adapter = TypeAdapter(type(payload))
+    return {
+        "jsonable_encoder": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "dump_json": lambda: adapter.dump_json(adapter.validate_python(payload)),
+        "orjson": lambda: ORJSONResponse(payload).body,
+    }
+
+
+def _median_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک سریال‌سازی JSON endpointهای لیستی")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--logs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="basij-json-"), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    Base.metadata.create_all(bind=engine)
+    _populate(engine, args.students, args.logs)
+    db = sessionmaker(bind=engine)()
+
+    # (endpoint، payload، مسیر سریال‌سازی قبل از ORJSONResponse)
+    cases = [
+        ("/admin/students?limit=500", list_students(db, limit=500), "dump_json"),
+        ("/admin/students?limit=50", list_students(db, limit=50), "dump_json"),
+        ("/admin/students/search", search_students(db, "40", limit=50), "dump_json"),
+        ("/admin/api/audit-logs?limit=200", get_audit_logs(db, limit=200), "dump_json"),
+        ("/test/users?limit=500", _test_users(db, 500), "jsonable_encoder"),
+    ]
+
+    print("=" * 78)
+    print(f"🧪 سریال‌سازی پاسخ‌ها (میانه {args.repeat} اجرا، میلی‌ثانیه؛ * = مسیر قبلی)")
+    print("=" * 78)
+    print(f"{'endpoint':<34}{'jsonable_encoder':>17}{'dump_json':>11}{'orjson':>9}{'speedup':>9}")
+
+    ok = True
+    for endpoint, payload, previous in cases:
+        serializers = _serializers(payload)
+        timings = {name: _median_ms(func, args.repeat) for name, func in serializers.items()}
+        same = json.loads(serializers[previous]()) == json.loads(serializers["orjson"]())
+        ok &= same
+        cells = "".join(
+            f"{timings[name]:>{width - 1}.2f}{'*' if name == previous else ' '}"
+            for name, width in (("jsonable_encoder", 17), ("dump_json", 11), ("orjson", 9))
+        )
+        speedup = timings[previous] / timings["orjson"]
+        print(f"{endpoint:<34}{cells}{speedup:>8.1f}x {'✅' if same else '❌ خروجی متفاوت'}")
+
+    sample = ORJSONResponse({"description": "ورود موفق"}).body
+    persian_ok = "ورود موفق".encode() in sample
+    ok &= persian_ok
+    print(f"{'✅' if persian_ok else '❌'} متن فارسی بدون escape: {sample.decode()}")
+
+    db.close()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# scripts/bench_ndjson_stream.py
+"""
+بنچمارک خروجی NDJSON در برابر یک آرایه JSON کامل برای لیست‌های بزرگ ادمین.
+
+یک دیتابیس موقت با --rows دانشجو و --rows لاگ ساخته می‌شود و همه ردیف‌ها یک
+بار با list_students/get_audit_logs (لیست کامل + ORJSONResponse) و یک بار با
+stream_students_ndjson/stream_audit_logs_ndjson خوانده می‌شوند. زمان رسیدن
+اولین تکه، زمان کل و اوج حافظه پایتون (tracemalloc) گزارش و تعداد خطوط
+NDJSON با تعداد ردیف‌ها مقایسه می‌شود. (tracemalloc زمان‌ها را چند برابر
+می‌کند؛ اعداد برای مقایسه دو روش با هم است.)
+
+نمونه اجرا:
+    python -m app.scripts.bench_ndjson_stream --rows 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_db_engine
+from app.core.responses import NDJSON_BATCH_SIZE, ORJSONResponse
+from app.models import role  # noqa: F401  ثبت جداول روی Base
+from app.models.audit_log import AuditLog
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.services.audit_service import get_audit_logs, stream_audit_logs_ndjson
+from app.services.student_list_service import list_students, stream_students_ndjson
+
+
+def _populate(engine, rows: int, chunk: int = 50000):
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, chunk):
+            ids = range(offset + 1, min(offset + chunk, rows) + 1)
+            conn.execute(User.__table__.insert(), [
+                {"id": i, "student_number": f"40{i:08d}", "hashed_password": "-", "role_id": 1} for i in ids
+            ])
+            conn.execute(StudentProfile.__table__.insert(), [
+                {
+                    "user_id": i,
+                    "national_code": f"{i:010d}",
+                    "phone_number": f"0912{i % 10 ** 7:07d}",
+                    "gender": "brother" if i % 2 else "sister",
+                    "address": "تهران، خیابان انقلاب",
+                    "created_at": start + timedelta(seconds=i),
+                }
+                for i in ids
+            ])
+            conn.execute(AuditLog.__table__.insert(), [
+                {
+                    "user_id": i,
+                    "action": "LOGIN",
+                    "entity": "user",
+                    "entity_id": i,
+                    "description": f"ورود موفق کاربر {i}",
+                    "ip_address": "127.0.0.1",
+                    "created_at": start + timedelta(seconds=i),
+                }
+                for i in ids
+            ])
+
+
+def _measure(produce) -> dict:
+    """produce: تابعی که iterable تکه‌های بایتی پاسخ را برمی‌گرداند"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    size = lines = chunks = 0
+    for chunk in produce():
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+        lines += chunk.count(b"\n")
+        chunks += 1
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"first": first or total, "total": total, "peak": peak, "size": size, "lines": lines, "chunks": chunks}
+
+
+def _report(label: str, stats: dict):
+    print(
+        f"{label:<26} اولین تکه {stats['first'] * 1000:>8.1f} ms  کل {stats['total']:>6.2f} s  "
+        f"اوج حافظه {stats['peak'] / 2 ** 20:>7.1f} MiB  ({stats['chunks']} تکه، {stats['size'] / 2 ** 20:.1f} MiB)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک خروجی NDJSON لیست‌های ادمین")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=NDJSON_BATCH_SIZE)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="basij-ndjson-"), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    Base.metadata.create_all(bind=engine)
+    print(f"📝 ساخت {args.rows} دانشجو و {args.rows} لاگ ...")
+    _populate(engine, args.rows)
+    Session = sessionmaker(bind=engine)
+
+    def students_json():
+        with Session() as db:
+            yield ORJSONResponse(list_students(db, limit=args.rows)).body
+
+    def audit_json():
+        with Session() as db:
+            yield ORJSONResponse(get_audit_logs(db, limit=args.rows, include_total=False)).body
+
+    cases = [
+        ("students JSON", students_json, None),
+        ("students NDJSON", lambda: stream_students_ndjson(batch_size=args.batch_size, bind=engine), args.rows),
+        ("audit-logs JSON", audit_json, None),
+        ("audit-logs NDJSON", lambda: stream_audit_logs_ndjson(batch_size=args.batch_size, bind=engine), args.rows),
+    ]
+
+    print("=" * 100)
+    ok = True
+    for label, produce, expected_lines in cases:
+        stats = _measure(produce)
+        _report(label, stats)
+        if expected_lines is not None and stats["lines"] != expected_lines:
+            ok = False
+            print(f"❌ {label}: {stats['lines']} خط به جای {expected_lines}")
+
+    if not ok:
+        sys.exit(1)
+    print("✅ تعداد خطوط NDJSON برابر تعداد ردیف‌هاست")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# scripts/bench_registration.py
+"""
+بنچمارک ثبت‌نام همزمان: مسیر قبلی (SELECT تکراری + دو commit) در برابر
+register_user_async فعلی (یک تراکنش و تکیه بر قید unique).
+
+هر حالت روی یک دیتابیس موقت جدا اجرا می‌شود. --concurrency درخواست همزمان
+ثبت‌نام می‌کنند و تعداد ثبت‌نام در ثانیه، تعداد دستور SQL هر ثبت‌نام و
+درستی پیام خطای ثبت‌نام تکراری گزارش می‌شود.
+
+هزینه هش در این بنچمارک عمداً پایین است (BCRYPT_ROUNDS=4 و بدون pool) تا
+فقط مسیر دیتابیس اندازه‌گیری شود؛ با متغیرهای محیطی قابل تغییر است.
+
+نمونه اجرا:
+    python -m app.scripts.bench_registration --users 2000 --concurrency 1 16 64
+    python -m app.scripts.bench_registration --profile sqlite-prod
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("HASH_POOL_WORKERS", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.database import Base, create_async_db_engine, create_db_engine
+from app.core.security import hash_password_async
+from app.models import audit_log  # noqa: F401  ثبت جداول روی Base
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.schemas.auth import RegisterRequest
+from app.services.auth_service import _normalize_gender, clear_role_cache, register_user_async
+
+
+async def register_legacy_async(db, data: RegisterRequest):
+    """مسیر قبلی ثبت‌نام (برای مقایسه)"""
+    gender = _normalize_gender(data.gender)
+
+    existing_user_id = await db.scalar(select(User.id).where(User.student_number == data.student_number))
+    if existing_user_id:
+        raise HTTPException(status_code=400, detail="شماره دانشجویی قبلاً ثبت شده است")
+
+    role = await db.scalar(select(Role).where(Role.name == "user"))
+    if not role:
+        role = Role(name="user", description="کاربر عادی")
+        db.add(role)
+        await db.commit()
+
+    user = User(
+        student_number=data.student_number,
+        hashed_password=await hash_password_async(data.student_number[:72]),
+        role=role,
+    )
+    db.add(user)
+    await db.commit()
+
+    db.add(StudentProfile(
+        user_id=user.id,
+        national_code=data.national_code,
+        phone_number=data.phone_number,
+        gender=gender,
+        address=data.address,
+    ))
+    await db.commit()
+    return user
+
+
+CASES = {
+    "legacy": register_legacy_async,
+    "single-tx": register_user_async,
+}
+
+
+def _request(i: int) -> RegisterRequest:
+    return RegisterRequest(
+        student_number=f"40{i:08d}",
+        national_code=f"{i:010d}",
+        phone_number="09120000000",
+        gender="brother" if i % 2 else "sister",
+        address="bench",
+    )
+
+
+async def run_case(register, url: str, profile: str, users: int, concurrency: int) -> dict:
+    engine = create_async_db_engine(url, profile, echo=False)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    statements = 0
+
+    def _count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    queue = iter(range(users))
+    errors = []
+
+    async def worker():
+        for i in queue:
+            async with sessions() as db:
+                try:
+                    await register(db, _request(i))
+                except Exception as e:  # قفل دیتابیس و ... در گزارش شمرده می‌شوند
+                    errors.append(repr(e))
+
+    clear_role_cache()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    per_registration = statements / users
+
+    # ثبت‌نام تکراری (شماره دانشجویی و کد ملی جداگانه)
+    duplicates = []
+    for data in (_request(0), _request(0).copy(update={"student_number": "4999999999"})):
+        async with sessions() as db:
+            try:
+                await register(db, data)
+                duplicates.append("accepted")
+            except HTTPException as e:
+                duplicates.append(e.detail)
+            except Exception as e:
+                duplicates.append(type(e).__name__)
+
+    await engine.dispose()
+    return {
+        "rate": (users - len(errors)) / elapsed,
+        "statements": per_registration,
+        "errors": errors,
+        "duplicates": duplicates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک ثبت‌نام همزمان")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--profile", default="sqlite-dev", help="sqlite-dev / sqlite-prod")
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"🧪 ثبت‌نام {args.users} کاربر ({args.profile})")
+    print("=" * 78)
+    print(f"{'case':<10} {'concurrency':>11} {'reg/s':>9} {'SQL/reg':>8} {'errors':>7}  duplicate student / national code")
+
+    for concurrency in args.concurrency:
+        for name, register in CASES.items():
+            path = os.path.join(tempfile.mkdtemp(prefix="basij-register-"), "bench.db")
+            url = f"sqlite:///{path}"
+            setup = create_db_engine(url, args.profile, echo=False)
+            Base.metadata.create_all(bind=setup)
+            with setup.begin() as conn:
+                conn.execute(Role.__table__.insert().values(name="user", description="کاربر عادی"))
+            setup.dispose()
+
+            result = asyncio.run(run_case(register, url, args.profile, args.users, concurrency))
+            print(
+                f"{name:<10} {concurrency:>11} {result['rate']:>9.0f} {result['statements']:>8.1f} "
+                f"{len(result['errors']):>7}  {' / '.join(result['duplicates'])}"
+            )
+            for error in result["errors"][:3]:
+                print(f"   ❌ {error[:120]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# scripts/bench_student_filter.py
+"""
+بنچمارک Bloom filter شماره‌های دانشجویی (/auth/check).
+
+روی یک دیتابیس موقت با --users کاربر، فیلتر ساخته و با شماره‌های ثبت‌نشده
+نرخ مثبت کاذب واقعی با مقدار مورد انتظار مقایسه می‌شود. زمان هر بررسی با
+فیلتر و با کوئری مستقیم دیتابیس هم گزارش می‌شود.
+
+(فیلتر سرور در حال اجرا با POST /admin/api/student-filter/rebuild دوباره
+ساخته و متریک‌هایش از GET /admin/api/student-filter خوانده می‌شود.)
+
+نمونه اجرا:
+    python -m app.scripts.bench_student_filter --users 100000 --probes 100000
+    python -m app.scripts.bench_student_filter --fp-rate 0.001
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import select
+
+from app.core.database import Base, create_db_engine
+from app.models import audit_log, role, student_profile  # noqa: F401  ثبت جداول روی Base
+from app.models.user import User
+from app.services.student_number_filter import StudentNumberFilter
+
+
+def _populate(engine, users: int, chunk: int = 50000):
+    with engine.begin() as conn:
+        for offset in range(0, users, chunk):
+            conn.execute(User.__table__.insert(), [
+                {"student_number": f"40{i:08d}", "hashed_password": "-", "role_id": 1}
+                for i in range(offset, min(offset + chunk, users))
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک Bloom filter شماره‌های دانشجویی")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--probes", type=int, default=100000, help="تعداد شماره‌های ثبت‌نشده برای بررسی")
+    parser.add_argument("--fp-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="basij-filter-"), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    Base.metadata.create_all(bind=engine)
+    _populate(engine, args.users)
+
+    print("=" * 60)
+    print(f"🧪 Bloom filter: {args.users} کاربر، {args.probes} بررسی")
+    print("=" * 60)
+
+    student_filter = StudentNumberFilter(fp_rate=args.fp_rate)
+    student_filter.rebuild(bind=engine)
+    stats = student_filter.stats()
+    print(f"📦 ساخت: {stats['build_seconds']:.2f} s، {stats['size_bytes'] / 1024:.0f} KiB، k={stats['hash_count']}")
+
+    # همه اعضا باید «شاید» باشند (منفی کاذب ممنوع)
+    missing = [i for i in range(args.users) if not student_filter.might_contain(f"40{i:08d}")]
+    print(f"{'✅' if not missing else '❌'} منفی کاذب: {len(missing)}")
+
+    probes = [f"50{i:08d}" for i in range(args.probes)]
+    start = time.perf_counter()
+    hits = sum(student_filter.might_contain(number) for number in probes)
+    filter_us = (time.perf_counter() - start) / args.probes * 1e6
+
+    db_probes = probes[:min(args.probes, 5000)]
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        for number in db_probes:
+            conn.scalar(select(User.id).where(User.student_number == number))
+    db_us = (time.perf_counter() - start) / len(db_probes) * 1e6
+
+    print(f"🎯 نرخ مثبت کاذب: {hits / args.probes:.4%} (مورد انتظار {stats['estimated_fp_rate']:.4%})")
+    print(f"⚡ هر بررسی: فیلتر {filter_us:.1f} µs، دیتابیس {db_us:.1f} µs")
+
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# scripts/bench_student_search.py
+"""
+بنچمارک جستجوی پیشوندی دانشجویان (GET /admin/students/search).
+
+یک دیتابیس موقت با --students دانشجو ساخته و برای پیشوندهای تصادفی با طول
+۲ تا ۸ از هر ستون (شماره دانشجویی، کد ملی، تلفن) تأخیر search_students
+اندازه‌گیری می‌شود. برای مقایسه، همان جستجو با LIKE (اسکن کامل) هم اجرا و
+query plan کوئری‌های بازه‌ای بررسی می‌شود.
+
+نمونه اجرا:
+    python -m app.scripts.bench_student_search --students 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_db_engine
+from app.models import audit_log, role  # noqa: F401  ثبت جداول روی Base
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.services.student_list_service import STUDENT_SEARCH_FIELDS, _prefix_query, search_students
+
+
+def _populate(engine, students: int, chunk: int = 50000):
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for offset in range(0, students, chunk):
+            ids = range(offset + 1, min(offset + chunk, students) + 1)
+            conn.execute(User.__table__.insert(), [
+                {"id": i, "student_number": f"40{rng.randrange(10 ** 8):08d}{i}", "hashed_password": "-", "role_id": 1}
+                for i in ids
+            ])
+            conn.execute(StudentProfile.__table__.insert(), [
+                {
+                    "user_id": i,
+                    "national_code": f"{i * 7919 % 10 ** 10:010d}",
+                    "phone_number": f"09{rng.randrange(10 ** 9):09d}",
+                    "gender": "brother" if i % 2 else "sister",
+                }
+                for i in ids
+            ])
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _samples(db, count: int, rng: random.Random):
+    """پیشوندهای تصادفی از مقادیر واقعی ستون‌ها"""
+    max_id = db.scalar(select(StudentProfile.id).order_by(StudentProfile.id.desc()).limit(1))
+    samples = []
+    for _ in range(count):
+        row = db.execute(
+            select(User.student_number, StudentProfile.national_code, StudentProfile.phone_number)
+            .join(User, User.id == StudentProfile.user_id)
+            .where(StudentProfile.id == rng.randint(1, max_id))
+        ).first()
+        value = rng.choice(row)
+        samples.append(value[:rng.randint(2, 8)])
+    return samples
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return (
+        statistics.median(timings),
+        timings[int(len(timings) * 0.95) - 1],
+        timings[-1],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک جستجوی پیشوندی دانشجویان")
+    parser.add_argument("--students", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="basij-search-"), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    Base.metadata.create_all(bind=engine)
+    _populate(engine, args.students)
+    db = sessionmaker(bind=engine)()
+
+    print("=" * 60)
+    print(f"🧪 جستجوی پیشوندی: {args.students} دانشجو، {args.queries} جستجو")
+    print("=" * 60)
+
+    # query plan: همه ستون‌ها باید با SEARCH روی ایندکس خوانده شوند
+    ok = True
+    with engine.connect() as conn:
+        for field in STUDENT_SEARCH_FIELDS:
+            stmt = _prefix_query(field, "40", args.limit).compile(
+                dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+            )
+            plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(stmt)).all()]
+            scan = [line for line in plan if line.startswith("SCAN") or "TEMP B-TREE" in line]
+            ok &= not scan
+            print(f"{'✅' if not scan else '❌'} {field:<15} {' | '.join(plan)}")
+
+    samples = _samples(db, args.queries, random.Random(7))
+
+    timings, empty = [], 0
+    for prefix in samples:
+        start = time.perf_counter()
+        results = search_students(db, prefix, limit=args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+        empty += not results
+    p50, p95, worst = _percentiles(timings)
+    print(f"⚡ index range: p50 {p50:.2f} ms، p95 {p95:.2f} ms، max {worst:.2f} ms (بدون نتیجه: {empty})")
+
+    like_timings = []
+    for prefix in samples[:min(len(samples), 50)]:
+        start = time.perf_counter()
+        db.execute(
+            select(StudentProfile.id)
+            .join(User, User.id == StudentProfile.user_id)
+            .where(or_(*(column.like(f"%{prefix}%") for column in STUDENT_SEARCH_FIELDS.values())))
+            .limit(args.limit)
+        ).all()
+        like_timings.append((time.perf_counter() - start) * 1000)
+    p50, p95, worst = _percentiles(like_timings)
+    print(f"🐢 LIKE (اسکن): p50 {p50:.2f} ms، p95 {p95:.2f} ms، max {worst:.2f} ms")
+
+    db.close()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# scripts/calibrate_password_hashing.py
+"""
+انتخاب هزینه هش رمز عبور بر اساس زمان اندازه‌گیری شده روی همین سرور.
+
+برای هر هزینه، زمان هش اندازه‌گیری می‌شود و بیشترین هزینه‌ای که میانه زمانش
+از بودجه تأخیر (target-ms) بیشتر نشود انتخاب می‌شود. خروجی، متغیرهای محیطی
+لازم برای app/core/hashing.py است.
+
+نمونه اجرا:
+    python -m app.scripts.calibrate_password_hashing --target-ms 250
+    python -m app.scripts.calibrate_password_hashing --scheme argon2 --target-ms 250 --memory-cost 65536
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.hashing import ARGON2_PARALLELISM, build_crypt_context
+
+
+def _median_hash_ms(context, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("4001234567")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> dict:
+    """بیشترین rounds که زیر بودجه بماند (حداقل ۱۰)."""
+    chosen = {"BCRYPT_ROUNDS": 10}
+    for rounds in range(10, 18):
+        elapsed = _median_hash_ms(build_crypt_context("bcrypt", bcrypt_rounds=rounds), samples)
+        print(f"  bcrypt rounds={rounds:<3} {elapsed:>8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = {"BCRYPT_ROUNDS": rounds}
+    return {"PASSWORD_SCHEME": "bcrypt", **chosen}
+
+
+def calibrate_argon2(target_ms: float, samples: int, memory_cost: int, parallelism: int) -> dict:
+    """با حافظه ثابت، بیشترین time_cost که زیر بودجه بماند (حداقل ۲)."""
+    chosen = {"ARGON2_TIME_COST": 2}
+    for time_cost in range(2, 11):
+        context = build_crypt_context(
+            "argon2",
+            argon2_memory_cost=memory_cost,
+            argon2_time_cost=time_cost,
+            argon2_parallelism=parallelism,
+        )
+        elapsed = _median_hash_ms(context, samples)
+        print(f"  argon2id m={memory_cost}KiB t={time_cost:<3} p={parallelism} {elapsed:>8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = {"ARGON2_TIME_COST": time_cost}
+    return {
+        "PASSWORD_SCHEME": "argon2",
+        "ARGON2_MEMORY_COST": memory_cost,
+        "ARGON2_PARALLELISM": parallelism,
+        **chosen,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="کالیبره کردن هزینه هش رمز عبور")
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250, help="بودجه تأخیر هر هش (میلی‌ثانیه)")
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--memory-cost", type=int, default=65536, help="حافظه argon2 به KiB")
+    parser.add_argument("--parallelism", type=int, default=ARGON2_PARALLELISM)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"⏱️ کالیبره کردن {args.scheme} با بودجه {args.target_ms:.0f} ms")
+    print("=" * 60)
+
+    if args.scheme == "bcrypt":
+        settings = calibrate_bcrypt(args.target_ms, args.samples)
+    else:
+        settings = calibrate_argon2(args.target_ms, args.samples, args.memory_cost, args.parallelism)
+
+    print("\n✅ تنظیمات پیشنهادی (هش‌های قدیمی هنگام ورود بعدی به‌روز می‌شوند):")
+    for name, value in settings.items():
+        print(f"export {name}={value}")
+
+
+if __name__ == "__main__":
+    main()
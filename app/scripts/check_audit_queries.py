@@ -0,0 +1,138 @@
+# scripts/check_audit_queries.py
+"""
+بررسی تعداد کوئری‌های صفحات لاگ ادمین (جلوگیری از بازگشت N+1).
+
+روی یک دیتابیس موقت با کاربر، پروفایل و لاگ، get_audit_logs و
+get_audit_logs_async برای اندازه‌های مختلف صفحه اجرا می‌شوند و تعداد
+دستورات SQL شمرده می‌شود. هر صفحه باید دقیقاً یک SELECT (و در صورت
+include_total یک COUNT) داشته باشد، مستقل از تعداد ردیف‌ها.
+
+نمونه اجرا:
+    python -m app.scripts.check_audit_queries
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_async_db_engine, create_db_engine
+from app.models import role  # noqa: F401  ثبت جداول روی Base
+from app.models.audit_log import AuditLog
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.services.audit_service import get_audit_logs, get_audit_logs_async
+
+USERS = 200
+LOGS = 2000
+PAGE_SIZES = [10, 50, 500]
+
+
+def _populate(engine):
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "student_number": f"40{i:08d}", "hashed_password": "-", "role_id": 1}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(StudentProfile.__table__.insert(), [
+            {"user_id": i, "national_code": f"{i:010d}", "phone_number": "09120000000", "gender": "brother"}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(AuditLog.__table__.insert(), [
+            {
+                # هر دهمین لاگ بدون کاربر (لاگ سیستمی)
+                "user_id": None if i % 10 == 0 else i % USERS + 1,
+                "action": "LOGIN",
+                "created_at": start + timedelta(seconds=i),
+            }
+            for i in range(LOGS)
+        ])
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def _check(label: str, counter: QueryCounter, result: dict, include_total: bool) -> bool:
+    expected = 2 if include_total else 1
+    missing = [log.id for log in result["logs"] if log.user_id and not log.national_code]
+    ok = counter.count == expected and not missing
+    status = "✅" if ok else "❌"
+    print(f"{status} {label:<40} rows={len(result['logs']):<4} queries={counter.count} (expected {expected})")
+    if missing:
+        print(f"   ❌ لاگ‌های بدون اطلاعات کاربر: {missing[:10]}")
+    return ok
+
+
+def check_sync(path: str) -> bool:
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    counter = QueryCounter(engine)
+    db = sessionmaker(bind=engine)()
+    ok = True
+
+    try:
+        for limit in PAGE_SIZES:
+            for include_total in (True, False):
+                counter.count = 0
+                first = get_audit_logs(db, limit=limit, include_total=include_total)
+                ok &= _check(f"sync limit={limit} total={include_total}", counter, first, include_total)
+
+                counter.count = 0
+                second = get_audit_logs(db, limit=limit, cursor=first["next_cursor"], include_total=include_total)
+                ok &= _check(f"sync limit={limit} total={include_total} (cursor)", counter, second, include_total)
+    finally:
+        db.close()
+    return ok
+
+
+async def check_async(path: str) -> bool:
+    engine = create_async_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    counter = QueryCounter(engine.sync_engine)
+    ok = True
+
+    try:
+        async with async_sessionmaker(engine)() as db:
+            for limit in PAGE_SIZES:
+                for include_total in (True, False):
+                    counter.count = 0
+                    result = await get_audit_logs_async(db, limit=limit, include_total=include_total)
+                    ok &= _check(f"async limit={limit} total={include_total}", counter, result, include_total)
+    finally:
+        await engine.dispose()
+    return ok
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(prefix="basij-check-"), "audit.db")
+    engine = create_db_engine(f"sqlite:///{path}", "sqlite-dev", echo=False)
+    Base.metadata.create_all(bind=engine)
+    _populate(engine)
+    engine.dispose()
+
+    print("=" * 60)
+    print("🔍 بررسی تعداد کوئری‌های لیست لاگ‌ها")
+    print("=" * 60)
+
+    ok = check_sync(path)
+    ok &= asyncio.run(check_async(path))
+
+    if not ok:
+        print("\n❌ تعداد کوئری‌ها با انتظار یکسان نیست (احتمال N+1)")
+        sys.exit(1)
+    print("\n✅ تعداد کوئری هر صفحه ثابت است")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# scripts/check_profile_cache.py
+"""
+بررسی کش پروفایل (/student/me) روی یک دیتابیس موقت.
+
+برای هر دو backend حافظه و sqlite:
+    - اولین GET /student/me یک miss و دومی یک hit است و پاسخ‌ها یکسان‌اند
+    - بعد از PUT /student/me ورودی حذف و GET بعدی دوباره miss است
+و برای backend sqlite دو نمونه روی یک فایل (مثل دو worker) ساخته می‌شود:
+نوشتن payloadی که بارگذاری آن قبل از حذف در worker دیگر شروع شده رد می‌شود.
+
+نمونه اجرا:
+    python -m app.scripts.check_profile_cache
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+TMP_DIR = tempfile.mkdtemp(prefix="basij-profile-cache-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'check.db')}"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.profile_cache import MemoryCacheBackend, SQLiteCacheBackend, profile_cache
+
+STUDENT = {
+    "student_number": "40100001",
+    "national_code": "1234567890",
+    "phone_number": "09120000000",
+    "gender": "brother",
+    "address": "تهران",
+}
+
+
+def _delta(before: dict, after: dict) -> tuple:
+    return after["hits"] - before["hits"], after["misses"] - before["misses"]
+
+
+def check_http(client: TestClient, headers: dict, backend) -> bool:
+    """miss، hit و حذف بعد از PUT برای یک backend"""
+    profile_cache.backend = backend
+    ok = True
+
+    before = profile_cache.stats()
+    first = client.get("/student/me", headers=headers)
+    second = client.get("/student/me", headers=headers)
+    hits, misses = _delta(before, profile_cache.stats())
+    passed = first.status_code == second.status_code == 200 and first.json() == second.json()
+    passed &= (hits, misses) == (1, 1)
+    ok &= passed
+    print(f"{'✅' if passed else '❌'} [{backend.name}] GET دوم از کش: وضعیت {first.status_code}/{second.status_code}، "
+          f"hit={hits} miss={misses}")
+
+    update = client.put("/student/me", headers=headers, json={"address": f"آدرس {backend.name}"})
+    before = profile_cache.stats()
+    third = client.get("/student/me", headers=headers)
+    hits, misses = _delta(before, profile_cache.stats())
+    passed = update.status_code == third.status_code == 200
+    passed &= (hits, misses) == (0, 1) and third.json()["address"] == f"آدرس {backend.name}"
+    ok &= passed
+    print(f"{'✅' if passed else '❌'} [{backend.name}] بعد از PUT: miss={misses} و آدرس جدید در پاسخ")
+    return ok
+
+
+def check_shared_generation(path: str) -> bool:
+    """دو worker روی یک فایل: حذف در B نوشتن بارگذاری قدیمی A را ناکام می‌کند"""
+    worker_a = SQLiteCacheBackend(path)
+    worker_b = SQLiteCacheBackend(path)
+
+    generation = worker_a.generation(7)
+    worker_b.delete(7)
+    stale = worker_a.set(7, {"address": "کهنه"}, generation)
+    fresh = worker_a.set(7, {"address": "جدید"}, worker_a.generation(7))
+
+    generation = worker_a.generation(7)
+    worker_b.clear()
+    after_clear = worker_a.set(7, {"address": "کهنه"}, generation)
+
+    passed = stale is None and fresh is not None and after_clear is None
+    passed &= worker_b.get(7) is None
+    print(f"{'✅' if passed else '❌'} [sqlite] نسل مشترک بین workerها: "
+          f"نوشتن کهنه={'رد شد' if stale is None else 'ذخیره شد'}، "
+          f"بعد از clear={'رد شد' if after_clear is None else 'ذخیره شد'}")
+    return passed
+
+
+def main():
+    ok = True
+    with TestClient(app) as client:
+        client.post("/auth/register", json=STUDENT)
+        login = client.post("/auth/login", json=STUDENT)
+        if login.status_code != 200:
+            print(f"❌ ورود ناموفق: {login.status_code} {login.text}")
+            sys.exit(1)
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        original = profile_cache.backend
+        try:
+            ok &= check_http(client, headers, MemoryCacheBackend())
+            ok &= check_http(client, headers, SQLiteCacheBackend(os.path.join(TMP_DIR, "profile_cache.db")))
+        finally:
+            profile_cache.backend = original
+
+    ok &= check_shared_generation(os.path.join(TMP_DIR, "shared_cache.db"))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
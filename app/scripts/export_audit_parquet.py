@@ -0,0 +1,60 @@
+# scripts/export_audit_parquet.py
+"""
+خروجی Parquet از لاگ‌های audit برای تحلیل آفلاین.
+
+همان فیلترهای endpoint /admin/audit-logs/export/parquet را می‌پذیرد و
+مستقیماً از دیتابیس برنامه (DATABASE_URL) می‌خواند.
+
+نمونه اجرا:
+    python -m app.scripts.export_audit_parquet -o audit_logs.parquet
+    python -m app.scripts.export_audit_parquet -o login.parquet --action LOGIN --date-from 2024-01-01
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.models import role, student_profile, user  # noqa: F401  ثبت جداول روی Base
+from app.services.audit_export_service import (
+    AUDIT_PARQUET_COMPRESSION,
+    PARQUET_COMPRESSIONS,
+    PYARROW_AVAILABLE,
+    build_export_query,
+    write_parquet,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="خروجی Parquet از لاگ‌های audit")
+    parser.add_argument("-o", "--output", default="audit_logs.parquet")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--action")
+    parser.add_argument("--date-from", type=datetime.fromisoformat)
+    parser.add_argument("--date-to", type=datetime.fromisoformat)
+    parser.add_argument("--compression", choices=PARQUET_COMPRESSIONS, default=AUDIT_PARQUET_COMPRESSION)
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("❌ بسته pyarrow نصب نیست: pip install pyarrow")
+        sys.exit(1)
+
+    query = build_export_query(
+        user_id=args.user_id,
+        action=args.action,
+        date_from=args.date_from,
+        date_to=args.date_to,
+    )
+
+    start = time.perf_counter()
+    rows = write_parquet(query, args.output, compression=args.compression)
+    elapsed = time.perf_counter() - start
+
+    size_mib = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"✅ {rows} لاگ در {args.output} نوشته شد ({size_mib:.1f} MiB، {elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
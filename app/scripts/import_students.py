@@ -0,0 +1,79 @@
+# scripts/import_students.py
+"""
+ورود گروهی دانشجوها از فایل CSV یا XLSX (همان سرویس endpoint
+POST /admin/students/import).
+
+ستون‌ها: student_number، national_code، phone_number، gender، address
+(سرآیند فارسی مثل «شماره دانشجویی» و «کد ملی» هم پذیرفته می‌شود).
+رمز عبور هر دانشجو مانند ثبت‌نام عادی برابر شماره دانشجویی است.
+
+نمونه اجرا:
+    python -m app.scripts.import_students students.xlsx
+    python -m app.scripts.import_students students.csv --dry-run --errors-out errors.csv
+    python -m app.scripts.import_students students.csv --chunk-size 2000 --workers 8
+"""
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.hashing import HASH_POOL_WORKERS, PasswordHasher
+from app.models import audit_log, role, student_profile, user  # noqa: F401  ثبت جداول روی Base
+from app.services.student_import_service import STUDENT_IMPORT_CHUNK_SIZE, import_students
+
+
+def write_errors(report, path: str):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["row", "student_number", "errors"])
+        for error in report.errors:
+            writer.writerow([error["row"], error["student_number"], " | ".join(error["errors"])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ورود گروهی دانشجوها")
+    parser.add_argument("path", help="فایل CSV یا XLSX")
+    parser.add_argument("--chunk-size", type=int, default=STUDENT_IMPORT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=HASH_POOL_WORKERS, help="پردازه‌های هش (۰ = بدون pool)")
+    parser.add_argument("--dry-run", action="store_true", help="فقط اعتبارسنجی")
+    parser.add_argument("--errors-out", help="ذخیره خطاهای ردیف‌ها در CSV")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"❌ فایل {args.path} پیدا نشد")
+        sys.exit(1)
+
+    hasher = PasswordHasher(workers=args.workers)
+    with open(args.path, "rb") as source:
+        try:
+            report = import_students(
+                source,
+                args.path,
+                chunk_size=args.chunk_size,
+                hasher=hasher,
+                dry_run=args.dry_run,
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        finally:
+            hasher.shutdown()
+
+    mode = " (dry run)" if report.dry_run else ""
+    rate = report.total / report.elapsed_seconds if report.elapsed_seconds else 0
+    print(f"📥 {report.total} ردیف در {report.elapsed_seconds:.1f} s ({rate:.0f} ردیف/ثانیه){mode}")
+    print(f"✅ معتبر: {report.valid}، ثبت شده: {report.imported}")
+    if report.failed:
+        print(f"❌ خطا: {report.failed}")
+        for error in report.errors[:10]:
+            print(f"   ردیف {error['row']} ({error['student_number']}): {' | '.join(error['errors'])}")
+
+    if args.errors_out and report.errors:
+        write_errors(report, args.errors_out)
+        print(f"📝 خطاها در {args.errors_out} ذخیره شد")
+
+
+if __name__ == "__main__":
+    main()
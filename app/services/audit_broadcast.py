@@ -0,0 +1,177 @@
+# app/services/audit_broadcast.py
+"""
+پخش زنده لاگ‌های audit برای ادمین‌های متصل (Server-Sent Events).
+
+بعد از commit هر دسته لاگ (در audit_sink یا مسیر مستقیم)، ردیف‌ها یک بار
+به JSON تبدیل و به صف هر کلاینت اضافه می‌شوند. صف هر کلاینت محدود است؛ اگر
+کلاینتی کند باشد قدیمی‌ترین رویدادهایش دور ریخته و شمرده می‌شوند، بدون اینکه
+نویسنده لاگ یا بقیه کلاینت‌ها منتظر بمانند.
+
+هر رویداد با بزرگ‌ترین id لاگ‌هایش در صف قرار می‌گیرد؛ stream رویدادهایی را که
+id آن‌ها از high-water mark snapshot (max(audit_logs.id) هنگام خواندن آمار)
+بیشتر نیست دور می‌ریزد، چون همین لاگ‌ها در snapshot شمرده شده‌اند.
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+AUDIT_STREAM_BUFFER = int(os.getenv("AUDIT_STREAM_BUFFER", 100))  # رویداد برای هر کلاینت
+AUDIT_STREAM_MAX_CLIENTS = int(os.getenv("AUDIT_STREAM_MAX_CLIENTS", 100))
+AUDIT_STREAM_HEARTBEAT = float(os.getenv("AUDIT_STREAM_HEARTBEAT", 15))  # ثانیه
+
+STREAM_FIELDS = ("id", "user_id", "action", "entity", "entity_id", "description", "ip_address", "created_at")
+
+_CLOSED = object()
+
+
+def format_sse(data: str, event: Optional[str] = None) -> str:
+    """قالب یک رویداد SSE"""
+    message = f"event: {event}\n" if event else ""
+    for line in data.splitlines() or [""]:
+        message += f"data: {line}\n"
+    return message + "\n"
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class AuditSubscription:
+    """صف محدود رویدادهای یک کلاینت"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, buffer_size: int):
+        self.loop = loop
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+        self.skipped = 0  # رویدادهای شمرده شده در snapshot
+
+    def offer(self, item):
+        """افزودن رویداد (در thread حلقه رویداد)؛ در صورت پر بودن، قدیمی‌ترین حذف می‌شود"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def next(self, timeout: float):
+        """رویداد بعدی یا None بعد از timeout (برای heartbeat)"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class AuditBroadcaster:
+    """pub/sub درون‌پردازه‌ای برای لاگ‌های تازه"""
+
+    def __init__(self, buffer_size: int = AUDIT_STREAM_BUFFER, max_clients: int = AUDIT_STREAM_MAX_CLIENTS):
+        self.buffer_size = buffer_size
+        self.max_clients = max_clients
+        self._subscribers: set = set()
+        self._lock = threading.Lock()
+
+        # متریک‌ها
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> Optional[AuditSubscription]:
+        """ثبت کلاینت جدید (داخل حلقه رویداد)؛ اگر ظرفیت پر باشد None"""
+        subscription = AuditSubscription(asyncio.get_running_loop(), self.buffer_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AuditSubscription):
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.remove(subscription)
+            self.dropped += subscription.dropped
+
+    def publish(self, rows: Iterable[Dict]):
+        """
+        ارسال ردیف‌های commit شده به همه کلاینت‌ها (از هر threadی قابل فراخوانی).
+
+        رویداد شامل لاگ‌ها و افزایش شمارنده هر عملیات است.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+
+        rows = list(rows)
+        payload = json.dumps(
+            {
+                "logs": [{field: _json_value(row.get(field)) for field in STREAM_FIELDS} for row in rows],
+                "counts": Counter(row["action"] for row in rows),
+            },
+            ensure_ascii=False,
+        )
+        message = format_sse(payload, event="audit")
+        ids = [row["id"] for row in rows if row.get("id") is not None]
+        item = (max(ids) if ids else None, message)
+        self.published += len(rows)
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, item)
+            except RuntimeError:
+                # حلقه رویداد کلاینت بسته شده است
+                self.unsubscribe(subscription)
+
+    async def stream(self, subscription: AuditSubscription, snapshot: Dict,
+                     high_water: Optional[int] = None, heartbeat: float = AUDIT_STREAM_HEARTBEAT):
+        """
+        generator پاسخ SSE: ابتدا آمار فعلی، سپس رویدادهای تازه و heartbeat.
+
+        high_water: بزرگ‌ترین id لاگ شمرده شده در snapshot؛ رویدادهای صف که
+        همه لاگ‌هایشان تا این id هستند (بین اشتراک و خواندن آمار commit شده‌اند)
+        ارسال نمی‌شوند تا شمارنده‌ها دو بار افزایش نیابند.
+        با قطع اتصال کلاینت generator بسته و اشتراک حذف می‌شود.
+        """
+        try:
+            yield format_sse(json.dumps(snapshot, ensure_ascii=False), event="snapshot")
+            while True:
+                item = await subscription.next(heartbeat)
+                if item is _CLOSED:
+                    break
+                if item is None:
+                    # خط comment در SSE برای زنده نگه داشتن اتصال از پشت proxyها
+                    yield ": heartbeat\n\n"
+                    continue
+                max_id, message = item
+                if high_water is not None and max_id is not None and max_id <= high_water:
+                    subscription.skipped += 1
+                    continue
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def close(self):
+        """پایان همه جریان‌ها (در shutdown برنامه)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, _CLOSED)
+            except RuntimeError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "clients": len(subscribers),
+            "max_clients": self.max_clients,
+            "buffer_size": self.buffer_size,
+            "published": self.published,
+            "dropped": self.dropped + sum(s.dropped for s in subscribers),
+        }
+
+
+audit_broadcaster = AuditBroadcaster()
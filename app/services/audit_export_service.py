@@ -0,0 +1,314 @@
+# app/services/audit_export_service.py
+"""
+خروجی گرفتن از لاگ‌های audit به صورت جریانی.
+
+ردیف‌ها فقط با ستون‌های لازم و به صورت دسته‌ای (yield_per / server-side
+cursor) خوانده می‌شوند تا حافظه مصرفی مستقل از تعداد ردیف‌ها بماند.
+"""
+import csv
+import os
+import tempfile
+import zlib
+from datetime import datetime
+from io import StringIO
+from typing import Iterator, List, Optional
+
+from openpyxl import Workbook
+from sqlalchemy import select
+
+from app.core.database import engine, get_dialect_name
+from app.models.audit_log import AuditLog
+from app.services.audit_search_service import audit_search_filter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = pq = None
+    PYARROW_AVAILABLE = False
+
+AUDIT_EXPORT_BATCH_SIZE = int(os.getenv("AUDIT_EXPORT_BATCH_SIZE", 5000))
+AUDIT_EXPORT_CHUNK_SIZE = int(os.getenv("AUDIT_EXPORT_CHUNK_SIZE", 64 * 1024))  # بایت
+AUDIT_EXPORT_TMP_DIR = os.getenv("AUDIT_EXPORT_TMP_DIR") or None  # None یعنی پوشه موقت سیستم
+
+# حداکثر ردیف هر sheet در Excel (همراه با سرآیند)
+EXCEL_MAX_ROWS = 1048576
+EXCEL_SHEET_TITLE = "Audit Logs"
+
+PARQUET_COMPRESSIONS = ("zstd", "snappy", "gzip", "none")
+AUDIT_PARQUET_COMPRESSION = os.getenv("AUDIT_PARQUET_COMPRESSION", "zstd")
+AUDIT_PARQUET_ROW_GROUP_SIZE = int(os.getenv("AUDIT_PARQUET_ROW_GROUP_SIZE", 100000))
+
+# ستون‌های کم‌تنوع که در Parquet به صورت dictionary ذخیره می‌شوند
+PARQUET_DICTIONARY_COLUMNS = ("action", "entity", "ip_address")
+
+EXPORT_HEADERS = [
+    "ID", "User ID", "Action", "Entity", "Entity ID", "Description", "IP Address", "Created At",
+]
+
+EXPORT_COLUMNS = (
+    AuditLog.id,
+    AuditLog.user_id,
+    AuditLog.action,
+    AuditLog.entity,
+    AuditLog.entity_id,
+    AuditLog.description,
+    AuditLog.ip_address,
+    AuditLog.created_at,
+)
+
+
+def build_export_query(
+        user_id: Optional[int] = None,
+        action: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        q: Optional[str] = None,
+        dialect_name: Optional[str] = None,
+):
+    """کوئری ستون‌های خروجی با همان فیلترهای صفحه لاگ‌ها (q: جستجوی متنی)"""
+    query = select(*EXPORT_COLUMNS)
+
+    if user_id:
+        query = query.where(AuditLog.user_id == user_id)
+    if action:
+        query = query.where(AuditLog.action == action)
+    if date_from:
+        query = query.where(AuditLog.created_at >= date_from)
+    if date_to:
+        query = query.where(AuditLog.created_at <= date_to)
+    q = q.strip() if q else None
+    if q:
+        query = query.where(audit_search_filter(q, dialect_name or get_dialect_name(engine)))
+
+    return query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+
+def _temp_export_path(suffix: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="audit_logs_", suffix=suffix, dir=AUDIT_EXPORT_TMP_DIR)
+    os.close(fd)
+    return path
+
+
+def iter_export_batches(query, batch_size: int = AUDIT_EXPORT_BATCH_SIZE, bind=engine) -> Iterator[List]:
+    """
+    خواندن ردیف‌ها به صورت دسته‌ای با یک اتصال اختصاصی.
+
+    اتصال تا پایان جریان باز می‌ماند و با بسته شدن generator (مثلاً قطع
+    اتصال کلاینت) آزاد می‌شود.
+    """
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.partitions():
+            yield partition
+
+
+def stream_csv(
+        query,
+        chunk_size: int = AUDIT_EXPORT_CHUNK_SIZE,
+        compress: bool = False,
+        batch_size: int = AUDIT_EXPORT_BATCH_SIZE,
+        bind=engine,
+) -> Iterator[bytes]:
+    """
+    تولید CSV به صورت تکه‌های chunk_size بایتی (در صورت نیاز gzip شده؛ تکه آخر کوچک‌تر).
+
+    ردیف‌های هر دسته دیتابیس در زیردسته‌هایی نوشته و به UTF-8 تبدیل می‌شوند که
+    اندازه آن‌ها از میانگین بایت هر ردیف تا اینجا به حدود chunk_size تنظیم
+    می‌شود؛ پس اندازه تکه‌ها (بایت، نه کاراکتر؛ متن فارسی دو بایتی است)
+    مستقل از batch_size است.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 یعنی gzip
+    output = bytearray()
+    raw_bytes = raw_rows = 0
+
+    def write(rows) -> None:
+        nonlocal raw_bytes, raw_rows
+        writer.writerows(rows)
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        raw_bytes += len(data)
+        raw_rows += len(rows)
+        output.extend(compressor.compress(data) if compressor else data)
+
+    def ready_chunks() -> Iterator[bytes]:
+        while len(output) >= chunk_size:
+            yield bytes(output[:chunk_size])
+            del output[:chunk_size]
+
+    write([EXPORT_HEADERS])
+    raw_bytes = raw_rows = 0  # سرآیند در میانگین اندازه ردیف‌ها حساب نمی‌شود
+    rows_per_write = 1
+    for rows in iter_export_batches(query, batch_size, bind):
+        start = 0
+        while start < len(rows):
+            part = rows[start:start + rows_per_write]
+            start += len(part)
+            write(part)
+            rows_per_write = max(1, min(batch_size, chunk_size * raw_rows // max(raw_bytes, 1)))
+            yield from ready_chunks()
+
+    if compressor:
+        output.extend(compressor.flush())
+    yield from ready_chunks()
+    if output:
+        yield bytes(output)
+
+
+def _excel_row(row) -> list:
+    """تبدیل ردیف کوئری به ردیف Excel (زمان با همان قالب قبلی)"""
+    values = list(row)
+    created_at = values[-1]
+    values[-1] = created_at.strftime("%Y-%m-%d %H:%M") if created_at else None
+    return values
+
+
+def write_excel(
+        query,
+        path: str,
+        batch_size: int = AUDIT_EXPORT_BATCH_SIZE,
+        bind=engine,
+) -> int:
+    """
+    نوشتن خروجی Excel با workbook حالت write-only.
+
+    ردیف‌ها مستقیماً روی دیسک نوشته می‌شوند و حافظه مصرفی ثابت می‌ماند. اگر
+    تعداد ردیف‌ها از سقف یک sheet بیشتر شود، sheet بعدی ساخته می‌شود.
+
+    Returns:
+        تعداد ردیف‌های نوشته شده (بدون سرآیند)
+    """
+    wb = Workbook(write_only=True)
+    ws = None
+    sheet_rows = EXCEL_MAX_ROWS
+    sheets = 0
+    total = 0
+
+    for rows in iter_export_batches(query, batch_size, bind):
+        for row in rows:
+            if sheet_rows >= EXCEL_MAX_ROWS:
+                sheets += 1
+                ws = wb.create_sheet(EXCEL_SHEET_TITLE if sheets == 1 else f"{EXCEL_SHEET_TITLE} {sheets}")
+                ws.append(EXPORT_HEADERS)
+                sheet_rows = 1
+            ws.append(_excel_row(row))
+            sheet_rows += 1
+        total += len(rows)
+
+    if ws is None:
+        wb.create_sheet(EXCEL_SHEET_TITLE).append(EXPORT_HEADERS)
+
+    wb.save(path)
+    return total
+
+
+def export_excel_file(query, batch_size: int = AUDIT_EXPORT_BATCH_SIZE, bind=engine) -> str:
+    """
+    ساخت فایل Excel در پوشه موقت و برگرداندن مسیر آن.
+
+    حذف فایل بعد از ارسال بر عهده فراخواننده است.
+    """
+    path = _temp_export_path(".xlsx")
+    try:
+        write_excel(query, path, batch_size, bind)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def parquet_schema():
+    """schema خروجی Parquet (زمان‌ها در دیتابیس به UTC ذخیره می‌شوند)"""
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("action", text),
+        ("entity", text),
+        ("entity_id", pa.int64()),
+        ("description", pa.string()),
+        ("ip_address", text),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _record_batch(rows, schema):
+    """تبدیل یک دسته ردیف به RecordBatch ستونی"""
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name in PARQUET_DICTIONARY_COLUMNS:
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(
+        query,
+        path: str,
+        compression: str = AUDIT_PARQUET_COMPRESSION,
+        row_group_size: int = AUDIT_PARQUET_ROW_GROUP_SIZE,
+        batch_size: int = AUDIT_EXPORT_BATCH_SIZE,
+        bind=engine,
+) -> int:
+    """
+    نوشتن خروجی Parquet فشرده از دسته‌های Arrow.
+
+    دسته‌ها تا اندازه row_group_size جمع و سپس به عنوان یک row group نوشته
+    می‌شوند؛ پس حافظه مصرفی به اندازه یک row group محدود است.
+
+    Returns:
+        تعداد ردیف‌های نوشته شده
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("برای خروجی Parquet باید بسته pyarrow نصب شود")
+
+    schema = parquet_schema()
+    pending = []
+    pending_rows = 0
+    total = 0
+
+    with pq.ParquetWriter(
+            path,
+            schema,
+            compression=None if compression == "none" else compression,
+            use_dictionary=list(PARQUET_DICTIONARY_COLUMNS),
+    ) as writer:
+        for rows in iter_export_batches(query, batch_size, bind):
+            pending.append(_record_batch(rows, schema))
+            pending_rows += len(rows)
+            total += len(rows)
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=row_group_size)
+                pending = []
+                pending_rows = 0
+
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=row_group_size)
+
+    return total
+
+
+def export_parquet_file(
+        query,
+        compression: str = AUDIT_PARQUET_COMPRESSION,
+        batch_size: int = AUDIT_EXPORT_BATCH_SIZE,
+        bind=engine,
+) -> str:
+    """
+    ساخت فایل Parquet در پوشه موقت و برگرداندن مسیر آن.
+
+    حذف فایل بعد از ارسال بر عهده فراخواننده است.
+    """
+    path = _temp_export_path(".parquet")
+    try:
+        write_parquet(query, path, compression=compression, batch_size=batch_size, bind=bind)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
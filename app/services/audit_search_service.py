@@ -0,0 +1,86 @@
+# app/services/audit_search_service.py
+"""
+جستجوی متنی در description و entity لاگ‌های audit.
+
+SQLite از جدول FTS5 و PostgreSQL از ایندکس GIN روی tsvector استفاده می‌کند
+(هر دو در app/models/audit_log.py ساخته می‌شوند). امتیاز مرتبط بودن و
+snippet با علامت‌گذاری <mark> در همان کوئری اصلی محاسبه می‌شوند.
+"""
+from typing import Tuple
+
+from sqlalchemy import column, func, literal, literal_column, or_, select, table
+
+from app.models.audit_log import AUDIT_FTS_TABLE, AUDIT_SEARCH_VECTOR_SQL, AuditLog
+
+AUDIT_SEARCH_MAX_TERMS = 8
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_TOKENS = 16
+
+audit_fts = table(AUDIT_FTS_TABLE, column("rowid"), column(AUDIT_FTS_TABLE), column("rank"))
+
+_search_vector = literal_column(AUDIT_SEARCH_VECTOR_SQL)
+_search_config = literal_column("'simple'")
+
+
+def fts_query(q: str) -> str:
+    """
+    تبدیل متن کاربر به عبارت امن FTS5: هر کلمه در کوتیشن و با جستجوی پیشوندی
+
+    (عملگرهای FTS5 مثل NEAR یا ستون: در متن کاربر اثری ندارند)
+    """
+    terms = q.split()[:AUDIT_SEARCH_MAX_TERMS]
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+
+def _fts_match(q: str):
+    return audit_fts.c[AUDIT_FTS_TABLE].match(fts_query(q))
+
+
+def _ts_query(q: str):
+    return func.websearch_to_tsquery(_search_config, q)
+
+
+def _like_condition(q: str):
+    pattern = f"%{q}%"
+    return or_(AuditLog.description.ilike(pattern), AuditLog.entity.ilike(pattern))
+
+
+def audit_search_filter(q: str, dialect_name: str):
+    """شرط WHERE جستجو (برای COUNT و خروجی‌ها، بدون امتیاز)"""
+    if dialect_name == "sqlite":
+        return AuditLog.id.in_(select(audit_fts.c.rowid).where(_fts_match(q)))
+    if dialect_name == "postgresql":
+        return _search_vector.op("@@")(_ts_query(q))
+    return _like_condition(q)
+
+
+def apply_audit_search(query, q: str, dialect_name: str) -> Tuple:
+    """
+    افزودن جستجو به کوئری لاگ‌ها همراه با امتیاز و snippet.
+
+    Returns:
+        (query, score, snippet) - امتیاز بیشتر یعنی مرتبط‌تر
+    """
+    if dialect_name == "sqlite":
+        query = query.join(audit_fts, audit_fts.c.rowid == AuditLog.id).where(_fts_match(q))
+        # rank در FTS5 همان bm25 است (منفی؛ کمتر یعنی مرتبط‌تر)
+        score = -audit_fts.c.rank
+        snippet = func.snippet(
+            literal_column(AUDIT_FTS_TABLE), -1, SNIPPET_START, SNIPPET_END, "…", SNIPPET_TOKENS
+        )
+        return query, score, snippet
+
+    if dialect_name == "postgresql":
+        ts_query = _ts_query(q)
+        query = query.where(_search_vector.op("@@")(ts_query))
+        score = func.ts_rank(_search_vector, ts_query)
+        snippet = func.ts_headline(
+            _search_config,
+            func.coalesce(AuditLog.description, AuditLog.entity, ""),
+            ts_query,
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords={SNIPPET_TOKENS}, MinWords=5",
+        )
+        return query, score, snippet
+
+    return query.where(_like_condition(q)), literal(0.0), AuditLog.description
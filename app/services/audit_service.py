@@ -1,11 +1,45 @@
-from fastapi import Request
-from datetime import datetime
+import base64
+import json
+from dataclasses import dataclass
+from fastapi import HTTPException, Request, status
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Dict, List, Optional
+from sqlalchemy import and_, func, or_, select
+from typing import Dict, Iterator, List, Optional
 
+from pydantic import TypeAdapter
+
+from app.core.database import engine, get_dialect_name
+from app.core.responses import NDJSON_BATCH_SIZE, iter_ndjson
 from app.models.audit_log import AuditLog
+from app.models.student_profile import StudentProfile
 from app.models.user import User
+from app.services.audit_broadcast import audit_broadcaster
+from app.services.audit_export_service import iter_export_batches
+from app.services.audit_sink import AUDIT_SINK_ENABLED, audit_sink
+from app.services.audit_search_service import apply_audit_search, audit_search_filter
+from app.services.audit_stats_service import get_rollup_snapshot, get_rollup_stats, record_audit_stats
+
+
+def _audit_row(
+        action: str,
+        request: Request,
+        user: User | None,
+        entity: str | None,
+        entity_id: int | None,
+        description: str | None,
+) -> Dict:
+    """ساخت ردیف لاگ (همه ستون‌ها، برای INSERT چندردیفی)"""
+    return {
+        "user_id": user.id if user else None,
+        "action": action,
+        "entity": entity,
+        "entity_id": entity_id,
+        "description": description,
+        "ip_address": request.client.host if request.client else None,
+        "created_at": datetime.now(timezone.utc),
+    }
 
 
 # ۱. ایجاد لاگ
@@ -18,41 +52,201 @@ def create_audit_log(
         entity_id: int | None = None,
         description: str | None = None,
 ):
-    """ایجاد یک لاگ جدید"""
-    log = AuditLog(
-        user_id=user.id if user else None,
-        action=action,
-        entity=entity,
-        entity_id=entity_id,
-        description=description,
-        ip_address=request.client.host if request.client else None,
-    )
+    """
+    ایجاد یک لاگ جدید.
+
+    به صورت پیش‌فرض لاگ در audit_sink قرار می‌گیرد و به صورت دسته‌ای نوشته
+    می‌شود (بدون commit در مسیر درخواست). با AUDIT_SINK_ENABLED=false مستقیم
+    در همین session ذخیره می‌شود.
+    """
+    row = _audit_row(action, request, user, entity, entity_id, description)
+
+    if AUDIT_SINK_ENABLED:
+        audit_sink.submit(row)
+        return
+
+    log = AuditLog(**row)
     db.add(log)
+    db.flush()
+    row["id"] = log.id
+    record_audit_stats(db, [row])
     db.commit()
+    audit_broadcaster.publish([row])
 
 
 # ۲. آمار ساده
 def get_simple_audit_stats(db: Session) -> Dict:
-    """آمار ساده لاگ‌ها"""
-    total_logs = db.query(AuditLog).count()
+    """
+    آمار ساده لاگ‌ها
 
-    actions = (
-        db.query(AuditLog.action, func.count(AuditLog.id))
-        .group_by(AuditLog.action)
-        .all()
+    از جدول تجمیعی audit_stats_total خوانده می‌شود (بدون اسکن audit_logs)؛
+    روی دیتابیس موجود، جدول هنگام شروع برنامه از audit_logs پر می‌شود.
+    """
+    return get_rollup_stats(db)
+
+
+# ۳. لیست لاگ‌ها با تاریخ و ساعت
+def encode_cursor(log) -> str:
+    """ساخت cursor مبهم از (created_at, id) آخرین لاگ صفحه"""
+    payload = json.dumps([log.created_at.isoformat() if log.created_at else None, log.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """بازگرداندن (created_at, id) از cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor نامعتبر است",
+        )
+
+
+def _after_cursor(cursor: str):
+    """شرط keyset: لاگ‌های قدیمی‌تر از cursor با ترتیب (created_at DESC, id DESC)"""
+    created_at, log_id = decode_cursor(cursor)
+    # شرط اضافه created_at <= ... باعث می‌شود دیتابیس از ایندکس (created_at, id)
+    # به صورت range استفاده کند، نه اسکن کامل همراه با فیلتر OR
+    return and_(
+        AuditLog.created_at <= created_at,
+        or_(
+            AuditLog.created_at < created_at,
+            and_(AuditLog.created_at == created_at, AuditLog.id < log_id),
+        ),
     )
 
-    actions_dict: Dict[str, int] = {
-        action: count for action, count in actions
-    }
+
+@dataclass(frozen=True)
+class AuditLogRow:
+    """ردیف سبک لاگ برای صفحات ادمین (همراه با شماره دانشجویی و کد ملی کاربر)"""
+    id: int
+    user_id: Optional[int]
+    action: str
+    entity: Optional[str]
+    entity_id: Optional[int]
+    description: Optional[str]
+    ip_address: Optional[str]
+    created_at: Optional[datetime]
+    student_number: Optional[str] = None
+    national_code: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AuditSearchRow(AuditLogRow):
+    """ردیف نتیجه جستجوی متنی (q) همراه با امتیاز و snippet؛ بدون q کلیدها در پاسخ نیستند"""
+    score: Optional[float] = None
+    snippet: Optional[str] = None
+
+
+def audit_row_type(q: Optional[str]) -> type:
+    """کلاس ردیف‌های لاگ برای q نرمال‌شده"""
+    return AuditSearchRow if q else AuditLogRow
+
+
+# سریال‌سازهای از پیش ساخته‌شده هر ردیف NDJSON
+AUDIT_LOG_ROW_ADAPTERS = {
+    AuditLogRow: TypeAdapter(AuditLogRow),
+    AuditSearchRow: TypeAdapter(AuditSearchRow),
+}
+
+
+def normalize_search(q: Optional[str]) -> Optional[str]:
+    """متن جستجو بدون فاصله‌های اضافه؛ رشته خالی یعنی بدون جستجو"""
+    q = q.strip() if q else ""
+    return q or None
+
+
+def _audit_filters(
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
+) -> List:
+    filters = []
+    if date_from:
+        filters.append(AuditLog.created_at >= date_from)
+    if date_to:
+        filters.append(AuditLog.created_at <= date_to)
+    if action:
+        filters.append(AuditLog.action == action)
+    if user_id:
+        filters.append(AuditLog.user_id == user_id)
+    return filters
+
+
+def _audit_count_query(filters: List, q: Optional[str], dialect_name: str):
+    if q:
+        filters = [*filters, audit_search_filter(q, dialect_name)]
+    return select(func.count(AuditLog.id)).where(*filters)
+
+
+def _audit_rows_query(
+        filters: List,
+        cursor: Optional[str],
+        skip: int,
+        limit: Optional[int],
+        q: Optional[str] = None,
+        dialect_name: str = "sqlite",
+):
+    """
+    یک کوئری JOIN برای ستون‌های لاگ + student_number + national_code
+    (به جای بارگذاری lazy کاربر و پروفایل برای هر ردیف)
+
+    با q نتایج بر اساس امتیاز مرتبط بودن مرتب می‌شوند و cursor نادیده گرفته می‌شود.
+    limit=None یعنی همه ردیف‌ها (بدون skip؛ برای خروجی جریانی).
+    """
+    query = (
+        select(
+            AuditLog.id,
+            AuditLog.user_id,
+            AuditLog.action,
+            AuditLog.entity,
+            AuditLog.entity_id,
+            AuditLog.description,
+            AuditLog.ip_address,
+            AuditLog.created_at,
+            User.student_number,
+            StudentProfile.national_code,
+        )
+        .outerjoin(User, User.id == AuditLog.user_id)
+        .outerjoin(StudentProfile, StudentProfile.user_id == AuditLog.user_id)
+        .where(*filters)
+    )
+
+    if q:
+        query, score, snippet = apply_audit_search(query, q, dialect_name)
+        query = query.add_columns(score.label("score"), snippet.label("snippet"))
+        order_by = [score.desc(), AuditLog.created_at.desc(), AuditLog.id.desc()]
+    else:
+        if cursor:
+            query = query.where(_after_cursor(cursor))
+        order_by = [AuditLog.created_at.desc(), AuditLog.id.desc()]
+
+    query = query.order_by(*order_by)
+    if limit is None:
+        return query
+    # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+    return query.offset(skip).limit(limit + 1)
+
+
+def _audit_page(rows, total: Optional[int], skip: int, limit: int, q: Optional[str] = None) -> Dict:
+    row_type = audit_row_type(q)
+    logs = [row_type(**row._mapping) for row in rows[:limit]]
+    has_more = len(rows) > limit
 
     return {
-        "total_logs": total_logs,
-        "actions": actions_dict,
+        "logs": logs,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": encode_cursor(logs[-1]) if has_more and not q else None,
     }
 
 
-# ۳. لیست لاگ‌ها با تاریخ و ساعت
 def get_audit_logs(
         db: Session,
         skip: int = 0,
@@ -61,53 +255,137 @@ def get_audit_logs(
         date_to: Optional[datetime] = None,
         action: Optional[str] = None,
         user_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        q: Optional[str] = None,
 ) -> Dict:
     """
     دریافت لیست لاگ‌ها با تاریخ و ساعت
 
+    اگر cursor داده شود صفحه‌بندی keyset روی (created_at, id) انجام می‌شود و
+    skip نادیده گرفته می‌شود؛ هزینه هر صفحه مستقل از عمق آن است.
+    با include_total=False کوئری COUNT اجرا نمی‌شود. هر صفحه حداکثر دو کوئری
+    دارد (COUNT و یک SELECT با JOIN کاربر و پروفایل).
+
+    با q (جستجوی متنی در description و entity) نتایج به ترتیب مرتبط بودن و
+    با score و snippet برگردانده می‌شوند؛ صفحه‌بندی در این حالت با skip است.
+
     Returns:
         {
-            "logs": List[AuditLog],  # لیست لاگ‌ها
-            "total": int,            # تعداد کل لاگ‌ها
+            "logs": List[AuditLogRow],  # لیست لاگ‌ها (با q از نوع AuditSearchRow)
+            "total": int | None,     # تعداد کل لاگ‌ها
             "skip": int,             # تعداد رد شده
             "limit": int,            # تعداد نمایش داده شده
-            "has_more": bool         # آیا لاگ بیشتری وجود دارد؟
+            "has_more": bool,        # آیا لاگ بیشتری وجود دارد؟
+            "next_cursor": str | None  # cursor صفحه بعد
         }
     """
-    query = db.query(AuditLog)
-
-    # فیلترها
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-    if action:
-        query = query.filter(AuditLog.action == action)
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
+    q = normalize_search(q)
+    dialect_name = get_dialect_name(db)
+    filters = _audit_filters(date_from, date_to, action, user_id)
 
     # تعداد کل
-    total = query.count()
-
-    # دریافت لاگ‌ها با مرتب‌سازی بر اساس تاریخ و ساعت (جدیدترین اول)
-    logs = (
-        query
-        .order_by(AuditLog.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    total = db.scalar(_audit_count_query(filters, q, dialect_name)) if include_total else None
 
-    return {
-        "logs": logs,
-        "total": total,
-        "skip": skip,
-        "limit": limit,
-        "has_more": (skip + limit) < total,
-    }
+    if cursor and not q:
+        skip = 0
+
+    rows = db.execute(_audit_rows_query(filters, cursor, skip, limit, q, dialect_name)).all()
+    return _audit_page(rows, total, skip, limit, q)
+
+
+# ۴. نسخه‌های async (برای routeهای async def)
+async def create_audit_log_async(
+        db: AsyncSession,
+        action: str,
+        request: Request,
+        user: User | None = None,
+        entity: str | None = None,
+        entity_id: int | None = None,
+        description: str | None = None,
+):
+    """ایجاد یک لاگ جدید (async) - مشابه create_audit_log"""
+    row = _audit_row(action, request, user, entity, entity_id, description)
+
+    if AUDIT_SINK_ENABLED:
+        audit_sink.submit(row)
+        return
+
+    log = AuditLog(**row)
+    db.add(log)
+    await db.flush()
+    row["id"] = log.id
+    await db.run_sync(record_audit_stats, [row])
+    await db.commit()
+    audit_broadcaster.publish([row])
+
+
+async def get_simple_audit_stats_async(db: AsyncSession) -> Dict:
+    """آمار ساده لاگ‌ها (async) - از جدول تجمیعی"""
+    return await db.run_sync(get_rollup_stats)
+
+
+async def get_audit_stats_snapshot_async(db: AsyncSession):
+    """(آمار ساده، بزرگ‌ترین id لاگ شمرده شده) برای شروع جریان زنده"""
+    return await db.run_sync(get_rollup_snapshot)
+
+
+async def get_audit_logs_async(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 50,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        q: Optional[str] = None,
+) -> Dict:
+    """دریافت لیست لاگ‌ها (async) - خروجی مشابه get_audit_logs"""
+    q = normalize_search(q)
+    dialect_name = get_dialect_name(db)
+    filters = _audit_filters(date_from, date_to, action, user_id)
+
+    total = await db.scalar(_audit_count_query(filters, q, dialect_name)) if include_total else None
+
+    if cursor and not q:
+        skip = 0
+
+    rows = (await db.execute(_audit_rows_query(filters, cursor, skip, limit, q, dialect_name))).all()
+    return _audit_page(rows, total, skip, limit, q)
+
+
+def stream_audit_logs_ndjson(
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None,
+        batch_size: int = NDJSON_BATCH_SIZE,
+        bind=engine,
+) -> Iterator[bytes]:
+    """
+    همه لاگ‌های بعد از cursor (بدون limit) به صورت NDJSON، هر لاگ در یک خط
+
+    هر خط همان شکل اعضای logs در get_audit_logs را دارد. cursor همین‌جا
+    بررسی می‌شود و ردیف‌ها دسته به دسته از یک server-side cursor خوانده می‌شوند.
+    """
+    q = normalize_search(q)
+    filters = _audit_filters(date_from, date_to, action, user_id)
+    query = _audit_rows_query(filters, cursor, 0, None, q, get_dialect_name(bind))
+
+    row_type = audit_row_type(q)
+    dump_json = AUDIT_LOG_ROW_ADAPTERS[row_type].dump_json
+    # ترتیب ستون‌های کوئری همان ترتیب فیلدهای AuditLogRow / AuditSearchRow است
+    return iter_ndjson(
+        iter_export_batches(query, batch_size, bind),
+        lambda row: dump_json(row_type(*row)),
+    )
 
 
-# ۴. تابع کمکی برای فرمت تاریخ در template
+# ۵. تابع کمکی برای فرمت تاریخ در template
 def format_datetime(dt: datetime) -> str:
     """فرمت کردن تاریخ برای نمایش"""
     if not dt:
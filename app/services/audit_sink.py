@@ -0,0 +1,238 @@
+# app/services/audit_sink.py
+"""
+نوشتن دسته‌ای لاگ‌های audit.
+
+به جای یک commit (و یک fsync) برای هر عملیات، لاگ‌ها در یک صف محدود قرار
+می‌گیرند و یک thread پس‌زمینه هر N ردیف یا هر T میلی‌ثانیه آن‌ها را با یک
+INSERT چندردیفی در یک تراکنش می‌نویسد (همراه با به‌روزرسانی جدول تجمیعی). اگر صف پر باشد لاگ دور ریخته و شمرده
+می‌شود تا مسیر درخواست هیچ‌وقت منتظر دیتابیس نماند.
+
+خطای نوشتن (مثلاً database is locked در SQLite) تا AUDIT_WRITE_RETRIES بار با
+فاصله دو برابر شونده تکرار می‌شود؛ فقط بعد از آن دسته کنار گذاشته و با سطح
+error گزارش می‌شود.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.database import engine
+from app.models.audit_log import AuditLog
+from app.services.audit_stats_service import record_audit_stats
+
+logger = logging.getLogger(__name__)
+
+AUDIT_SINK_ENABLED = os.getenv("AUDIT_SINK_ENABLED", "true").lower() in ("1", "true", "yes")
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 200))
+AUDIT_FLUSH_MS = int(os.getenv("AUDIT_FLUSH_MS", 500))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", 10000))
+AUDIT_WRITE_RETRIES = int(os.getenv("AUDIT_WRITE_RETRIES", 3))  # تلاش دوباره بعد از اولین خطا
+AUDIT_RETRY_BACKOFF_MS = int(os.getenv("AUDIT_RETRY_BACKOFF_MS", 100))  # فاصله اولین تلاش دوباره
+AUDIT_FLUSH_TIMEOUT = float(os.getenv("AUDIT_FLUSH_TIMEOUT", 10))  # ثانیه
+
+_STOP = object()
+
+
+class AuditSink:
+    """صف لاگ‌های audit با نوشتن دسته‌ای در thread جداگانه."""
+
+    def __init__(
+            self,
+            batch_size: int = AUDIT_BATCH_SIZE,
+            flush_interval_ms: int = AUDIT_FLUSH_MS,
+            max_queue: int = AUDIT_QUEUE_SIZE,
+            retries: int = AUDIT_WRITE_RETRIES,
+            retry_backoff_ms: int = AUDIT_RETRY_BACKOFF_MS,
+            bind=engine,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.retries = retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.bind = bind
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[List[Dict]], None]] = []
+
+        # متریک‌ها
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+
+    # ----------------------------
+    # API
+    # ----------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+                self._thread.start()
+
+    def add_listener(self, listener: Callable[[List[Dict]], None]):
+        """ثبت تابعی که بعد از commit هر دسته با ردیف‌های آن صدا زده می‌شود."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def submit(self, row: Dict) -> bool:
+        """افزودن یک ردیف به صف؛ در صورت پر بودن صف False برمی‌گرداند."""
+        if self._thread is None:
+            self.start()
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = AUDIT_FLUSH_TIMEOUT) -> bool:
+        """
+        انتظار تا نوشته شدن همه ردیف‌های فعلی صف؛ False اگر مهلت تمام شود یا
+        thread نویسنده اجرا نشود (صف بدون آن هرگز خالی نمی‌شود).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return False
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: float = 10):
+        """نوشتن ردیف‌های باقی‌مانده و توقف thread (در shutdown برنامه)."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+        if thread is None or not thread.is_alive():
+            return
+
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+        }
+
+    # ----------------------------
+    # thread پس‌زمینه
+    # ----------------------------
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+        # تخلیه باقی‌مانده صف قبل از خروج
+        remaining_rows = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining_rows.append(item)
+            else:
+                self._queue.task_done()
+        for start in range(0, len(remaining_rows), self.batch_size):
+            self._write(remaining_rows[start:start + self.batch_size])
+
+    @staticmethod
+    def _insert(conn, batch: List[Dict]):
+        """INSERT دسته؛ در صورت پشتیبانی دیالکت، id هر ردیف (برای پخش زنده) در خود ردیف قرار می‌گیرد"""
+        table = AuditLog.__table__
+        if not conn.dialect.insert_executemany_returning_sort_by_parameter_order:
+            conn.execute(insert(table).values(batch))
+            return
+        ids = conn.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), batch
+        ).scalars().all()
+        for row, log_id in zip(batch, ids):
+            row["id"] = log_id
+
+    def _commit(self, batch: List[Dict]):
+        """نوشتن دسته با تلاش دوباره محدود؛ خطای آخرین تلاش بالا می‌رود"""
+        for attempt in range(self.retries + 1):
+            try:
+                with self.bind.begin() as conn:
+                    self._insert(conn, batch)
+                    record_audit_stats(conn, batch)
+                return
+            except Exception as e:
+                # idهای تلاش ناموفق (rollback شده) نباید در INSERT بعدی بروند
+                for row in batch:
+                    row.pop("id", None)
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"⚠️ Audit batch write failed ({e}); retrying in {delay * 1000:.0f} ms")
+                time.sleep(delay)
+
+    def _write(self, batch: List[Dict]):
+        try:
+            self._commit(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"❌ Dropped {len(batch)} audit logs after {self.retries + 1} attempts: {e}")
+            return
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+        for listener in self._listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                logger.error(f"❌ Audit sink listener failed: {e}")
+
+
+audit_sink = AuditSink()
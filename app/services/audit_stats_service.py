@@ -0,0 +1,233 @@
+# app/services/audit_stats_service.py
+"""
+نگهداری جدول‌های تجمیعی audit_stats_hourly و audit_stats_total.
+
+هر دسته از لاگ‌ها که نوشته می‌شود، در همان تراکنش شمارنده‌های (ساعت، عملیات)
+و شمارنده کل هر عملیات را افزایش می‌دهد. rebuild_audit_stats و
+check_audit_stats برای پر کردن اولیه و بررسی سازگاری با جدول audit_logs
+هستند؛ backfill_audit_stats هنگام شروع برنامه، اگر جدول تجمیعی خالی ولی
+audit_logs پر باشد (دیتابیس موجود)، بازسازی را انجام می‌دهد.
+"""
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import get_dialect_name
+from app.models.audit_log import AuditLog
+from app.models.audit_stat import AuditStatHourly, AuditStatTotal
+
+logger = logging.getLogger(__name__)
+
+
+def hour_bucket(created_at: datetime) -> datetime:
+    """گرد کردن زمان به ابتدای ساعت (UTC، بدون tzinfo مثل ستون‌های دیتابیس)"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at.replace(minute=0, second=0, microsecond=0)
+
+
+def record_audit_stats(executor, rows: Iterable[Dict]):
+    """
+    افزایش شمارنده‌های ساعتی برای ردیف‌های لاگ.
+
+    Args:
+        executor: Connection یا Session (در همان تراکنشی که لاگ‌ها نوشته می‌شوند)
+        rows: دیکشنری ردیف‌ها با کلیدهای action و created_at
+    """
+    counts = Counter(
+        (hour_bucket(row["created_at"]), row["action"])
+        for row in rows
+        if row.get("created_at") is not None
+    )
+    if not counts:
+        return
+
+    _increment(executor, AuditStatHourly, ("bucket", "action"), [
+        {"bucket": bucket, "action": action, "count": count}
+        for (bucket, action), count in counts.items()
+    ])
+    _increment(executor, AuditStatTotal, ("action",), [
+        {"action": action, "count": count}
+        for action, count in _totals(counts).items()
+    ])
+
+
+def _increment(executor, model, keys, values: List[Dict]):
+    """افزایش ستون count ردیف‌ها (ساخت ردیف در صورت نبودن)"""
+    dialect_name = get_dialect_name(executor)
+    if dialect_name in ("postgresql", "sqlite"):
+        dialect = postgresql if dialect_name == "postgresql" else sqlite
+        stmt = dialect.insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[getattr(model, key) for key in keys],
+            set_={"count": model.count + stmt.excluded.count},
+        )
+        executor.execute(stmt, values)
+        return
+
+    # دیالکت‌های دیگر: update و در صورت نبودن ردیف insert
+    for value in values:
+        if _update_count(executor, model, keys, value):
+            continue
+        try:
+            with executor.begin_nested():
+                executor.execute(insert(model).values(**value))
+        except IntegrityError:
+            # تراکنش دیگری همزمان همین ردیف را ساخته است
+            _update_count(executor, model, keys, value)
+
+
+def _update_count(executor, model, keys, value: Dict) -> bool:
+    result = executor.execute(
+        update(model)
+        .where(*(getattr(model, key) == value[key] for key in keys))
+        .values(count=model.count + value["count"])
+    )
+    return result.rowcount > 0
+
+
+def _bucket_expression(dialect_name: str):
+    """عبارت SQL برای گرد کردن created_at به ساعت"""
+    if dialect_name == "postgresql":
+        return func.date_trunc("hour", AuditLog.created_at)
+    return func.strftime("%Y-%m-%d %H:00:00", AuditLog.created_at)
+
+
+def _counts_from_logs(db) -> Counter:
+    """شمارش (ساعت، عملیات) مستقیم از audit_logs"""
+    bucket = _bucket_expression(get_dialect_name(db)).label("bucket")
+    rows = db.execute(
+        select(bucket, AuditLog.action, func.count(AuditLog.id))
+        .where(AuditLog.created_at.isnot(None))
+        .group_by(bucket, AuditLog.action)
+    ).all()
+
+    counts = Counter()
+    for bucket_value, action, count in rows:
+        if isinstance(bucket_value, str):
+            bucket_value = datetime.fromisoformat(bucket_value)
+        counts[(hour_bucket(bucket_value), action)] += count
+    return counts
+
+
+def _totals(counts: Counter) -> Counter:
+    totals = Counter()
+    for (_, action), count in counts.items():
+        totals[action] += count
+    return totals
+
+
+def rebuild_audit_stats(db) -> int:
+    """
+    بازسازی کامل جدول‌های تجمیعی از روی audit_logs (برای backfill یا اصلاح).
+
+    Returns:
+        تعداد ردیف‌های ساخته شده در جدول ساعتی
+    """
+    counts = _counts_from_logs(db)
+    totals = _totals(counts)
+
+    db.execute(delete(AuditStatHourly))
+    db.execute(delete(AuditStatTotal))
+    if counts:
+        db.execute(
+            insert(AuditStatHourly),
+            [
+                {"bucket": bucket, "action": action, "count": count}
+                for (bucket, action), count in counts.items()
+            ],
+        )
+        db.execute(
+            insert(AuditStatTotal),
+            [{"action": action, "count": count} for action, count in totals.items()],
+        )
+    db.commit()
+    return len(counts)
+
+
+def backfill_audit_stats(db) -> bool:
+    """
+    بازسازی جدول‌های تجمیعی اگر خالی هستند ولی audit_logs لاگ دارد
+
+    (دیتابیس موجود قبل از اضافه شدن جدول‌های تجمیعی). True اگر بازسازی انجام شد.
+    """
+    if db.scalar(select(AuditStatTotal.action).limit(1)) is not None:
+        return False
+    if db.scalar(select(AuditLog.id).limit(1)) is None:
+        return False
+    buckets = rebuild_audit_stats(db)
+    logger.info(f"✅ Audit stats backfilled from audit_logs ({buckets} hourly rows)")
+    return True
+
+
+def check_audit_stats(db) -> List[Dict]:
+    """
+    مقایسه جدول تجمیعی با audit_logs.
+
+    Returns:
+        لیست اختلاف‌ها: [{"bucket", "action", "expected", "actual"}]
+    """
+    expected = _counts_from_logs(db)
+    actual = Counter({
+        (hour_bucket(bucket), action): count
+        for bucket, action, count in db.execute(
+            select(AuditStatHourly.bucket, AuditStatHourly.action, AuditStatHourly.count)
+        ).all()
+    })
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        if expected[key] != actual[key]:
+            mismatches.append({
+                "bucket": key[0],
+                "action": key[1],
+                "expected": expected[key],
+                "actual": actual[key],
+            })
+
+    # ردیف‌های کل (bucket=None)
+    expected_totals = _totals(expected)
+    actual_totals = Counter(dict(db.execute(select(AuditStatTotal.action, AuditStatTotal.count)).all()))
+    for action in sorted(set(expected_totals) | set(actual_totals)):
+        if expected_totals[action] != actual_totals[action]:
+            mismatches.append({
+                "bucket": None,
+                "action": action,
+                "expected": expected_totals[action],
+                "actual": actual_totals[action],
+            })
+    return mismatches
+
+
+def get_rollup_stats(db) -> Dict:
+    """آمار کل و به تفکیک عملیات از audit_stats_total (یک ردیف برای هر عملیات)"""
+    rows = db.execute(select(AuditStatTotal.action, AuditStatTotal.count)).all()
+    return _rollup_dict(rows)
+
+
+def get_rollup_snapshot(db) -> Tuple[Dict, Optional[int]]:
+    """
+    آمار کل به همراه بزرگ‌ترین id لاگ‌های شمرده شده (high-water mark)
+
+    هر دو در یک دستور SQL خوانده می‌شوند تا از یک snapshot دیتابیس باشند
+    (SQLite برای SELECTهای جدا تراکنش مشترکی باز نمی‌کند).
+    """
+    rows = db.execute(union_all(
+        select(literal(None).label("action"), func.max(AuditLog.id).label("count")),
+        select(AuditStatTotal.action, AuditStatTotal.count),
+    )).all()
+    high_water = next((count for action, count in rows if action is None), None)
+    return _rollup_dict([row for row in rows if row[0] is not None]), high_water
+
+
+def _rollup_dict(rows) -> Dict:
+    actions = {action: int(count or 0) for action, count in rows}
+    return {
+        "total_logs": sum(actions.values()),
+        "actions": actions,
+    }
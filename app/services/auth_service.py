@@ -1,82 +1,178 @@
 # app/services/auth_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, selectinload
 from fastapi import HTTPException, status
 from datetime import timedelta
+from app.core.roles import RoleInfo, default_role, role_registry
 from app.models.user import User
 from app.models.role import Role
 from app.models.student_profile import StudentProfile
 from app.schemas.auth import RegisterRequest
 from app.core.security import (
     hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password,
+    verify_and_update_password_async,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 
-def register_user(db: Session, data: RegisterRequest):
-    """
-    ثبت کاربر جدید در سیستم.
+def _normalize_gender(gender) -> str:
+    """تبدیل جنسیت (Enum، انگلیسی یا فارسی) به sister/brother."""
+    value = gender.value if hasattr(gender, "value") else gender
+    if value in ("خواهر", "sister"):
+        return "sister"
+    if value in ("برادر", "brother"):
+        return "brother"
+    raise HTTPException(status_code=400, detail="gender must be 'sister' or 'brother'")
 
-    Args:
-        db: Session دیتابیس
-        data: اطلاعات ثبت نام (RegisterRequest)
-    """
-    # بررسی تکراری نبودن شماره دانشجویی
 
-    if data.gender == "خواهر":
-        gender = "sister"
-    elif data.gender == "برادر":
-        gender = "brother"
-    else:
-        raise HTTPException(status_code=400, detail="gender must be 'sister' or 'brother'")
+# ----------------------------
+# نقش‌ها (app/core/roles.py)
+# ----------------------------
+# نقش از role_registry خوانده و به صورت detached با merge(load=False) بدون
+# SELECT به session هر درخواست متصل می‌شود.
+def _detached_role(info: RoleInfo) -> Role:
+    role = Role(id=info.id, name=info.name, description=info.description)
+    make_transient_to_detached(role)
+    return role
 
-    existing_user = db.query(User).filter(
-        User.student_number == data.student_number
-    ).first()
 
+def clear_role_cache():
+    """خالی کردن role_registry (بعد از ساخت دوباره جدول roles)"""
+    role_registry.clear()
 
-    if existing_user:
+
+def _missing_role(name: str) -> Role:
+    """
+    نقش ناموجود برای ساخت: فقط نقش‌های پیش‌فرض (DEFAULT_ROLES) و با توضیح
+    همان تعریف؛ نقش دیگری بی‌صدا ساخته نمی‌شود.
+    """
+    definition = default_role(name)
+    if definition is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="شماره دانشجویی قبلاً ثبت شده است"
+            detail=f"نقش '{name}' وجود ندارد",
         )
+    return Role(**definition)
 
-    # پیدا کردن نقش کاربر عادی
-    role = db.query(Role).filter(Role.name == "user").first()
 
-    if not role:
-        # اگر نقش user وجود ندارد، آن را ایجاد کنید
-        role = Role(name="user", description="کاربر عادی")
-        db.add(role)
-        db.commit()
-        db.refresh(role)
+def get_role(db: Session, name: str = "user") -> Role:
+    """نقش با نام مشخص (از role_registry)؛ نقش پیش‌فرض ناموجود ساخته می‌شود"""
+    info = role_registry.by_name(name)
+    if info is None:
+        role = db.scalar(select(Role).where(Role.name == name))
+        if not role:
+            role = _missing_role(name)
+            db.add(role)
+            try:
+                db.commit()
+            except IntegrityError:
+                # درخواست همزمان دیگری همین نقش را ساخته است
+                db.rollback()
+                role = db.scalar(select(Role).where(Role.name == name))
+        info = role_registry.register(role)
+    return db.merge(_detached_role(info), load=False)
 
-    # رمز عبور برابر با شماره دانشجویی
-    hashed_password = hash_password(data.student_number[:72])
 
-    # ایجاد کاربر
+async def get_role_async(db: AsyncSession, name: str = "user") -> Role:
+    """نسخه async از get_role"""
+    info = role_registry.by_name(name)
+    if info is None:
+        role = await db.scalar(select(Role).where(Role.name == name))
+        if not role:
+            role = _missing_role(name)
+            db.add(role)
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                role = await db.scalar(select(Role).where(Role.name == name))
+        info = role_registry.register(role)
+    return await db.merge(_detached_role(info), load=False)
+
+
+# ----------------------------
+# ثبت‌نام
+# ----------------------------
+def _new_user(data: RegisterRequest, role: Role, hashed_password: str) -> User:
+    """کاربر و پروفایل (هر دو در یک flush درج می‌شوند)"""
     user = User(
         student_number=data.student_number,
         hashed_password=hashed_password,
-        role_id=role.id
+        role=role,
     )
-
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    # ایجاد پروفایل دانشجویی
-    profile = StudentProfile(
-        user_id=user.id,
+    user.profile = StudentProfile(
         national_code=data.national_code,
         phone_number=data.phone_number,
-        gender=data.gender.value if hasattr(data.gender, 'value') else data.gender,
-        address=data.address
+        gender=_normalize_gender(data.gender),
+        address=data.address,
     )
+    return user
+
+
+def _registration_conflict(error: IntegrityError) -> HTTPException:
+    """تبدیل خطای یکتایی دیتابیس به پیام فارسی"""
+    message = str(error.orig)
+    if "student_number" in message:
+        detail = "شماره دانشجویی قبلاً ثبت شده است"
+    elif "national_code" in message:
+        detail = "کد ملی یا شماره دانشجویی تکراری است"
+    else:
+        raise error
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
 
-    db.add(profile)
-    db.commit()
+
+def register_user(db: Session, data: RegisterRequest):
+    """
+    ثبت کاربر جدید در سیستم.
+
+    کاربر و پروفایل در یک تراکنش ذخیره می‌شوند. تکراری بودن شماره دانشجویی
+    یا کد ملی از قبل بررسی نمی‌شود؛ قید unique دیتابیس آن را (بدون race بین
+    درخواست‌های همزمان) تشخیص می‌دهد و IntegrityError به پیام فارسی تبدیل می‌شود.
+
+    Args:
+        db: Session دیتابیس
+        data: اطلاعات ثبت نام (RegisterRequest)
+    """
+    _normalize_gender(data.gender)
+
+    # رمز عبور برابر با شماره دانشجویی (هش قبل از شروع تراکنش)
+    hashed_password = hash_password(data.student_number[:72])
+
+    user = _new_user(data, get_role(db), hashed_password)
+    db.add(user)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise _registration_conflict(e)
+
+    return user
+
+
+async def register_user_async(db: AsyncSession, data: RegisterRequest):
+    """
+    نسخه async از register_user (بدون مسدود کردن event loop در انتظار دیتابیس).
+
+    Args:
+        db: AsyncSession دیتابیس
+        data: اطلاعات ثبت نام (RegisterRequest)
+    """
+    _normalize_gender(data.gender)
+
+    hashed_password = await hash_password_async(data.student_number[:72])
+
+    user = _new_user(data, await get_role_async(db), hashed_password)
+    db.add(user)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise _registration_conflict(e)
 
     return user
 
@@ -99,10 +195,49 @@ def authenticate_user(db: Session, student_number: str, password: str):
     ).first()
 
     # بررسی وجود کاربر و صحت رمز عبور (که در اینجا باید برابر با شماره دانشجویی باشد)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        return None
+
+    verified, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return None
 
+    # هش با الگوریتم/هزینه قدیمی ذخیره شده؛ با تنظیمات فعلی جایگزین می‌شود
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
     return user
+
+
+async def authenticate_user_async(db: AsyncSession, student_number: str, password: str):
+    """
+    نسخه async از authenticate_user.
+
+    نقش و پروفایل همراه با کاربر بارگذاری می‌شوند تا create_token_for_user
+    نیازی به lazy-load نداشته باشد.
+    """
+    user = await db.scalar(
+        select(User)
+        .options(selectinload(User.role), selectinload(User.profile))
+        .where(User.student_number == student_number)
+    )
+
+    if not user:
+        return None
+
+    verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not verified:
+        return None
+
+    # هش با الگوریتم/هزینه قدیمی ذخیره شده؛ با تنظیمات فعلی جایگزین می‌شود
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    return user
+
+
 def create_token_for_user(user: User):
     """ ایجاد توکن JWT برای کاربر. Args: user: شیء کاربر Returns: dict: توکن دسترسی """
     access_token_expires =\
@@ -110,8 +245,8 @@ def create_token_for_user(user: User):
     access_token = create_access_token( data={
         "sub": user.student_number,
         "user_id": user.id,
-        "role": user.role.name if user.role else
-        "user" },
+        "national_code": user.profile.national_code if user.profile else None,
+        "role": user.role_name or "user" },
                                         expires_delta=access_token_expires
     )
     return {
@@ -0,0 +1,399 @@
+# app/services/profile_cache.py
+"""
+کش read-through پاسخ پروفایل دانشجویی (/student/me) با کلید user_id.
+
+پروفایل زیاد خوانده و کم نوشته می‌شود؛ payload سریال‌شده (dict قابل JSON)
+در کش نگه داشته می‌شود و با commit هر تغییری روی User یا StudentProfile
+(رویداد after_commit سشن، مثل principal_cache) ورودی آن کاربر حذف می‌شود.
+
+backendها (PROFILE_CACHE_BACKEND):
+    memory  LRU درون پردازه (پیش‌فرض)
+    sqlite  فایل SQLite مشترک بین workerها (PROFILE_CACHE_PATH)؛ حذف ورودی
+            در یک worker برای همه دیده می‌شود. برای اینکه خواندن به نوشتن
+            تبدیل نشود، ترتیب حذف بر اساس زمان نوشتن است (FIFO) نه آخرین خواندن.
+            فراخوانی‌های آن مسدودکننده‌اند و در مسیر async با run_in_threadpool
+            اجرا می‌شوند.
+    none    بدون کش
+
+شماره نسل (generation): هر حذف، نسل آن کلید را افزایش می‌دهد و payloadی که
+بارگذاری آن قبل از حذف شروع شده ذخیره نمی‌شود. در backend sqlite نسل‌ها در
+همان فایل مشترک (جدول profile_cache_generation) نگه داشته و مقایسه و نوشتن در
+یک دستور انجام می‌شود؛ پس worker دیگری هم نمی‌تواند داده کهنه را بنویسد.
+
+تغییراتی که از ORM نمی‌گذرند (insert/update مستقیم core یا دستی در دیتابیس)
+رویداد ندارند؛ این ورودی‌ها حداکثر تا PROFILE_CACHE_TTL باقی می‌مانند.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CACHE_BACKEND = os.getenv("PROFILE_CACHE_BACKEND", "memory").lower()  # memory / sqlite / none
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 10000))
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", 600))  # ثانیه
+PROFILE_CACHE_PATH = os.getenv("PROFILE_CACHE_PATH", "./profile_cache.db")
+
+
+class MemoryCacheBackend:
+    """LRU درون پردازه با TTL، thread-safe"""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, maxsize: int = PROFILE_CACHE_SIZE, ttl: int = PROFILE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # کش فقط در همین پردازه است؛ یک شمارنده برای همه کلیدها کافی است
+        self._generation = 0
+
+    def get(self, key: int) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return payload
+
+    def generation(self, key: int) -> int:
+        return self._generation
+
+    def set(self, key: int, payload: dict, generation: Optional[int] = None) -> Optional[int]:
+        """
+        ذخیره؛ تعداد ورودی‌های بیرون‌رانده شده را برمی‌گرداند
+        (None اگر نسل تغییر کرده و payload ذخیره نشده است)
+        """
+        if self.maxsize <= 0:
+            return 0
+        evicted = 0
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return None
+            self._items.pop(key, None)
+            self._items[key] = (time.monotonic() + self.ttl, payload)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, key: int):
+        with self._lock:
+            self._generation += 1
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+
+    def size(self) -> int:
+        return len(self._items)
+
+
+class SQLiteCacheBackend:
+    """کش در یک فایل SQLite مشترک بین پردازه‌ها (WAL، یک اتصال برای هر thread)"""
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str = PROFILE_CACHE_PATH, maxsize: int = PROFILE_CACHE_SIZE,
+                 ttl: int = PROFILE_CACHE_TTL):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS profile_cache ("
+            " key INTEGER PRIMARY KEY, payload TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, written_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_profile_cache_written_at ON profile_cache (written_at)")
+        # نسل هر کلید؛ key=0 نسل سراسری است که با clear افزایش می‌یابد (id کاربر از 1 شروع می‌شود)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS profile_cache_generation ("
+            " key INTEGER PRIMARY KEY, generation INTEGER NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: int) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT payload FROM profile_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def generation(self, key: int) -> int:
+        # هر دو نسل فقط افزایش می‌یابند، پس مجموع آن‌ها با هر حذف یا clear تغییر می‌کند
+        return self._conn().execute(
+            "SELECT coalesce(sum(generation), 0) FROM profile_cache_generation WHERE key IN (0, ?)", (key,)
+        ).fetchone()[0]
+
+    def set(self, key: int, payload: dict, generation: Optional[int] = None) -> Optional[int]:
+        if self.maxsize <= 0:
+            return 0
+        now = time.time()
+        conn = self._conn()
+        params = (key, json.dumps(payload, ensure_ascii=False), now + self.ttl, now)
+        if generation is None:
+            conn.execute(
+                "INSERT OR REPLACE INTO profile_cache (key, payload, expires_at, written_at) VALUES (?, ?, ?, ?)",
+                params,
+            )
+        else:
+            # مقایسه نسل و نوشتن در یک دستور: حذفی که worker دیگری بعد از
+            # شروع بارگذاری انجام داده، نوشتن payload کهنه را ناکام می‌گذارد
+            stored = conn.execute(
+                "INSERT OR REPLACE INTO profile_cache (key, payload, expires_at, written_at)"
+                " SELECT ?, ?, ?, ? WHERE (SELECT coalesce(sum(generation), 0)"
+                " FROM profile_cache_generation WHERE key IN (0, ?)) = ?",
+                (*params, key, generation),
+            ).rowcount
+            if not stored:
+                return None
+        # ابتدا منقضی‌ها، سپس قدیمی‌ترین نوشته‌ها بیرون رانده می‌شوند
+        evicted = conn.execute("DELETE FROM profile_cache WHERE expires_at < ?", (now,)).rowcount
+        evicted += conn.execute(
+            "DELETE FROM profile_cache WHERE key IN ("
+            " SELECT key FROM profile_cache ORDER BY written_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        ).rowcount
+        return evicted
+
+    def delete(self, key: int):
+        self._bump_and_delete(key, "DELETE FROM profile_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._bump_and_delete(0, "DELETE FROM profile_cache", ())
+
+    def _bump_and_delete(self, generation_key: int, delete_sql: str, params: tuple):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO profile_cache_generation (key, generation) VALUES (?, 1)"
+                " ON CONFLICT (key) DO UPDATE SET generation = generation + 1",
+                (generation_key,),
+            )
+            conn.execute(delete_sql, params)
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM profile_cache").fetchone()[0]
+
+
+class NullCacheBackend:
+    """غیرفعال: همیشه miss"""
+
+    name = "none"
+    blocking = False
+    maxsize = 0
+    ttl = 0
+
+    def get(self, key: int) -> Optional[dict]:
+        return None
+
+    def generation(self, key: int) -> int:
+        return 0
+
+    def set(self, key: int, payload: dict, generation: Optional[int] = None) -> Optional[int]:
+        return 0
+
+    def delete(self, key: int):
+        pass
+
+    def clear(self):
+        pass
+
+    def size(self) -> int:
+        return 0
+
+
+def create_backend(name: str = PROFILE_CACHE_BACKEND):
+    """ساخت backend بر اساس نام (PROFILE_CACHE_BACKEND)"""
+    if name == "memory":
+        return MemoryCacheBackend()
+    if name == "sqlite":
+        return SQLiteCacheBackend()
+    if name in ("none", "off", ""):
+        return NullCacheBackend()
+    raise ValueError(f"PROFILE_CACHE_BACKEND نامعتبر است: {name}")
+
+
+class ProfileCache:
+    """
+    لایه read-through روی یک backend به همراه شمارنده‌های hit/miss/eviction.
+
+    قبل از بارگذاری از دیتابیس generation(user_id) گرفته و به set داده می‌شود؛
+    اگر در این فاصله حذفی انجام شده باشد payload ذخیره نمی‌شود (stale_skips).
+    متدهای *_async برای backendهای مسدودکننده (sqlite) از thread pool استفاده می‌کنند.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else create_backend()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+        self.errors = 0
+
+    def get(self, user_id: int) -> Optional[dict]:
+        try:
+            payload = self.backend.get(user_id)
+        except sqlite3.Error as exc:
+            payload = None
+            self._count_error(exc)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload
+
+    def generation(self, user_id: int) -> Optional[int]:
+        """نسل فعلی کلید؛ None یعنی نسل معلوم نیست و set انجام نمی‌شود"""
+        try:
+            return self.backend.generation(user_id)
+        except sqlite3.Error as exc:
+            self._count_error(exc)
+            return None
+
+    def set(self, user_id: int, payload: dict, generation: Optional[int]):
+        if generation is None:
+            return
+        try:
+            evicted = self.backend.set(user_id, payload, generation)
+        except sqlite3.Error as exc:
+            self._count_error(exc)
+            return
+        with self._lock:
+            if evicted is None:
+                self.stale_skips += 1
+            else:
+                self.evictions += evicted
+
+    def get_or_load(self, user_id: int, loader: Callable[[], dict]) -> dict:
+        """read-through برای مسیر sync"""
+        payload = self.get(user_id)
+        if payload is None:
+            generation = self.generation(user_id)
+            payload = loader()
+            self.set(user_id, payload, generation)
+        return payload
+
+    # ---------- مسیر async ----------
+    async def get_async(self, user_id: int) -> Optional[dict]:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.get, user_id)
+        return self.get(user_id)
+
+    async def generation_async(self, user_id: int) -> Optional[int]:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.generation, user_id)
+        return self.generation(user_id)
+
+    async def set_async(self, user_id: int, payload: dict, generation: Optional[int]):
+        if self.backend.blocking:
+            await run_in_threadpool(self.set, user_id, payload, generation)
+        else:
+            self.set(user_id, payload, generation)
+
+    # ---------- حذف ----------
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self.invalidations += 1
+        try:
+            self.backend.delete(user_id)
+        except sqlite3.Error as exc:
+            self._count_error(exc)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        try:
+            size = self.backend.size()
+        except sqlite3.Error:
+            size = None
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "size": size,
+            "maxsize": self.backend.maxsize,
+            "ttl": self.backend.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_skips": self.stale_skips,
+            "errors": self.errors,
+        }
+
+    def _count_error(self, exc: Exception):
+        # خطای کش نباید درخواست را خراب کند؛ فقط شمرده و لاگ می‌شود
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"⚠️ Profile cache error: {exc}")
+
+
+profile_cache = ProfileCache()
+
+
+# ----------------------------
+# Invalidation با رویدادهای Session
+# ----------------------------
+_PENDING_KEY = "profile_cache_invalidate"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_profile_changes(session, flush_context):
+    """جمع‌آوری user_idهایی که User یا StudentProfile آن‌ها تغییر کرده است"""
+    from app.models.student_profile import StudentProfile
+    from app.models.user import User
+
+    pending = None
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            user_id = obj.id
+        elif isinstance(obj, StudentProfile):
+            user_id = obj.user_id
+        else:
+            continue
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, set())
+        pending.add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_profile_invalidation(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        profile_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_profile_invalidation(session):
+    session.info.pop(_PENDING_KEY, None)
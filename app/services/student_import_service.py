@@ -0,0 +1,364 @@
+# app/services/student_import_service.py
+"""
+ورود گروهی دانشجوها از فایل CSV یا XLSX.
+
+فایل به صورت جریانی خوانده می‌شود (CSV با csv.DictReader و XLSX با openpyxl
+در حالت read-only) و ردیف‌ها در دسته‌های STUDENT_IMPORT_CHUNK_SIZE تایی:
+  ۱. اعتبارسنجی می‌شوند (همان RegisterRequest ثبت‌نام + تکراری نبودن در فایل و دیتابیس)،
+  ۲. رمزهایشان با password_hasher.hash_many در pool مشترک هش برنامه هش می‌شود،
+  ۳. با INSERT چندردیفی User و StudentProfile در یک تراکنش ذخیره می‌شوند.
+خروجی، گزارش خطای هر ردیف است.
+
+حداکثر STUDENT_IMPORT_MAX_CONCURRENT ورود گروهی (غیر dry run) همزمان در هر
+پردازه اجرا می‌شود؛ درخواست اضافه بلافاصله با 503 رد می‌شود.
+"""
+import csv
+import io
+import os
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import engine
+from app.core.hashing import PasswordHasher, password_hasher
+from app.core.principal_cache import principal_cache
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.schemas.auth import RegisterRequest
+from app.services.student_number_filter import student_number_filter
+
+STUDENT_IMPORT_CHUNK_SIZE = int(os.getenv("STUDENT_IMPORT_CHUNK_SIZE", 1000))
+STUDENT_IMPORT_MAX_ERRORS = int(os.getenv("STUDENT_IMPORT_MAX_ERRORS", 10000))  # سقف خطاهای گزارش
+STUDENT_IMPORT_MAX_CONCURRENT = int(os.getenv("STUDENT_IMPORT_MAX_CONCURRENT", 1))
+
+_import_slots = threading.BoundedSemaphore(max(STUDENT_IMPORT_MAX_CONCURRENT, 1))
+
+IMPORT_FIELDS = ("student_number", "national_code", "phone_number", "gender", "address")
+
+# سرآیندهای فارسی قابل قبول در فایل
+HEADER_ALIASES = {
+    "شماره دانشجویی": "student_number",
+    "کد ملی": "national_code",
+    "شماره تلفن": "phone_number",
+    "تلفن": "phone_number",
+    "جنسیت": "gender",
+    "آدرس": "address",
+}
+
+GENDERS = {"sister": "sister", "خواهر": "sister", "brother": "brother", "برادر": "brother"}
+
+# حداکثر طول ستون‌ها (همان تعریف مدل‌ها)
+MAX_LENGTHS = {
+    "student_number": User.__table__.c.student_number.type.length,
+    "national_code": StudentProfile.__table__.c.national_code.type.length,
+    "phone_number": StudentProfile.__table__.c.phone_number.type.length,
+    "address": StudentProfile.__table__.c.address.type.length,
+}
+
+
+@dataclass
+class ImportReport:
+    """نتیجه ورود گروهی"""
+    total: int = 0
+    valid: int = 0  # ردیف‌های بدون خطای اعتبارسنجی و تکرار
+    imported: int = 0
+    failed: int = 0
+    dry_run: bool = False
+    elapsed_seconds: float = 0.0
+    errors: List[Dict] = field(default_factory=list)
+
+    def add_error(self, row: int, student_number: Optional[str], messages: List[str]):
+        self.failed += 1
+        if len(self.errors) < STUDENT_IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "student_number": student_number, "errors": messages})
+
+
+# ----------------------------
+# خواندن فایل
+# ----------------------------
+def _normalize_header(name) -> str:
+    name = str(name or "").strip()
+    return HEADER_ALIASES.get(name, name.lower())
+
+
+def _iter_csv(source: BinaryIO) -> Iterator[Tuple[int, Dict]]:
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    headers = [_normalize_header(h) for h in next(reader, [])]
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            yield reader.line_num, dict(zip(headers, row))
+
+
+def _iter_xlsx(source: BinaryIO) -> Iterator[Tuple[int, Dict]]:
+    try:
+        wb = load_workbook(source, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError):
+        raise ValueError("فایل XLSX معتبر نیست")
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for line, row in enumerate(rows, start=2):
+            if any(cell not in (None, "") for cell in row):
+                yield line, dict(zip(headers, row))
+    finally:
+        wb.close()
+
+
+def iter_import_rows(source: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict]]:
+    """(شماره ردیف در فایل، دیکشنری ستون‌ها)"""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return _iter_xlsx(source)
+    if filename.lower().endswith(".csv"):
+        return _iter_csv(source)
+    raise ValueError("فقط فایل‌های CSV و XLSX پشتیبانی می‌شوند")
+
+
+def _chunks(rows: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ----------------------------
+# اعتبارسنجی
+# ----------------------------
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # اعداد در اکسل (مثلاً شماره دانشجویی) به صورت float خوانده می‌شوند
+        value = int(value)
+    return str(value).strip()
+
+
+def validate_row(raw: Dict) -> Tuple[Optional[Dict], List[str]]:
+    """اعتبارسنجی یک ردیف؛ (داده تمیز شده یا None، لیست خطاها)"""
+    values = {name: _cell(raw.get(name)) for name in IMPORT_FIELDS}
+    values["gender"] = GENDERS.get(values["gender"].lower(), values["gender"])
+
+    try:
+        data = RegisterRequest(**values)
+    except ValidationError as e:
+        return None, [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+
+    errors = []
+    clean = {name: getattr(data, name) for name in IMPORT_FIELDS}
+    clean["gender"] = data.gender.value if hasattr(data.gender, "value") else data.gender
+
+    for name in ("student_number", "national_code", "phone_number"):
+        if not clean[name]:
+            errors.append(f"{name}: خالی است")
+    for name, max_length in MAX_LENGTHS.items():
+        if max_length and len(clean[name] or "") > max_length:
+            errors.append(f"{name}: بیشتر از {max_length} کاراکتر")
+
+    return (None, errors) if errors else (clean, [])
+
+
+def _existing_values(conn, rows: List[Dict]) -> Tuple[set, set]:
+    """شماره‌های دانشجویی و کدهای ملی این دسته که از قبل در دیتابیس هستند"""
+    student_numbers = conn.scalars(
+        select(User.student_number).where(User.student_number.in_([r["student_number"] for r in rows]))
+    ).all()
+    national_codes = conn.scalars(
+        select(StudentProfile.national_code).where(
+            StudentProfile.national_code.in_([r["national_code"] for r in rows])
+        )
+    ).all()
+    return set(student_numbers), set(national_codes)
+
+
+# ----------------------------
+# نوشتن در دیتابیس
+# ----------------------------
+def _get_user_role_id(bind) -> int:
+    with bind.begin() as conn:
+        role_id = conn.scalar(select(Role.id).where(Role.name == "user"))
+        if role_id is None:
+            conn.execute(insert(Role).values(name="user", description="کاربر عادی"))
+            role_id = conn.scalar(select(Role.id).where(Role.name == "user"))
+    return role_id
+
+
+def _insert_rows(conn, rows: List[Dict], role_id: int):
+    """INSERT چندردیفی کاربران و پروفایل‌ها (داخل تراکنش فراخواننده)"""
+    conn.execute(
+        insert(User),
+        [
+            {
+                "student_number": row["student_number"],
+                "hashed_password": row["hashed_password"],
+                "role_id": role_id,
+                "is_active": True,
+            }
+            for row in rows
+        ],
+    )
+    user_ids = dict(
+        conn.execute(
+            select(User.student_number, User.id).where(
+                User.student_number.in_([row["student_number"] for row in rows])
+            )
+        ).all()
+    )
+    conn.execute(
+        insert(StudentProfile),
+        [
+            {
+                "user_id": user_ids[row["student_number"]],
+                "national_code": row["national_code"],
+                "phone_number": row["phone_number"],
+                "gender": row["gender"],
+                "address": row["address"],
+            }
+            for row in rows
+        ],
+    )
+
+
+def _after_insert(student_numbers: List[str]):
+    """insertهای core رویداد سشن ندارند؛ کش‌های درون پردازه مستقیم به‌روز می‌شوند"""
+    student_number_filter.add_many(student_numbers)
+    principal_cache.invalidate_keys(student_numbers)
+
+
+def _write_chunk(bind, rows: List[Dict], role_id: int, report: ImportReport):
+    """یک تراکنش برای کل دسته؛ در صورت تداخل همزمان، ردیف به ردیف با savepoint"""
+    try:
+        with bind.begin() as conn:
+            _insert_rows(conn, rows, role_id)
+        report.imported += len(rows)
+        _after_insert([row["student_number"] for row in rows])
+        return
+    except IntegrityError:
+        pass
+
+    inserted = []
+    with bind.begin() as conn:
+        for row in rows:
+            try:
+                with conn.begin_nested():
+                    _insert_rows(conn, [row], role_id)
+                inserted.append(row["student_number"])
+            except IntegrityError:
+                report.add_error(row["line"], row["student_number"], ["شماره دانشجویی یا کد ملی قبلاً ثبت شده است"])
+    report.imported += len(inserted)
+    _after_insert(inserted)
+
+
+def import_students(
+        source: BinaryIO,
+        filename: str,
+        bind=engine,
+        chunk_size: int = STUDENT_IMPORT_CHUNK_SIZE,
+        hasher: PasswordHasher = password_hasher,
+        dry_run: bool = False,
+) -> ImportReport:
+    """
+    ورود گروهی دانشجوها.
+
+    رمز عبور هر دانشجو مانند ثبت‌نام عادی برابر شماره دانشجویی است.
+
+    Args:
+        source: فایل باینری (CSV با UTF-8 یا XLSX)
+        filename: نام فایل (برای تشخیص نوع)
+        hasher: سرویس هش (پیش‌فرض pool مشترک برنامه)
+        dry_run: فقط اعتبارسنجی، بدون ذخیره
+    """
+    if not dry_run and not _import_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ورود گروهی دیگری در حال اجراست، لطفاً بعد از پایان آن دوباره تلاش کنید",
+            headers={"Retry-After": "30"},
+        )
+    try:
+        return _import_students(source, filename, bind, chunk_size, hasher, dry_run)
+    finally:
+        if not dry_run:
+            _import_slots.release()
+
+
+def _import_students(
+        source: BinaryIO,
+        filename: str,
+        bind,
+        chunk_size: int,
+        hasher: PasswordHasher,
+        dry_run: bool,
+) -> ImportReport:
+    started = time.perf_counter()
+    report = ImportReport(dry_run=dry_run)
+    role_id = None if dry_run else _get_user_role_id(bind)
+    seen_student_numbers, seen_national_codes = set(), set()
+
+    for chunk in _chunks(iter_import_rows(source, filename), chunk_size):
+        report.total += len(chunk)
+
+        # ۱. اعتبارسنجی ردیف‌ها و تکراری نبودن در فایل
+        valid = []
+        for line, raw in chunk:
+            clean, errors = validate_row(raw)
+            if clean is None:
+                report.add_error(line, _cell(raw.get("student_number")) or None, errors)
+                continue
+            if clean["student_number"] in seen_student_numbers:
+                errors.append("شماره دانشجویی در فایل تکراری است")
+            if clean["national_code"] in seen_national_codes:
+                errors.append("کد ملی در فایل تکراری است")
+            seen_student_numbers.add(clean["student_number"])
+            seen_national_codes.add(clean["national_code"])
+            if errors:
+                report.add_error(line, clean["student_number"], errors)
+                continue
+            clean["line"] = line
+            valid.append(clean)
+
+        if not valid:
+            continue
+
+        # ۲. تکراری نبودن در دیتابیس (دو کوئری برای کل دسته)
+        with bind.connect() as conn:
+            existing_student_numbers, existing_national_codes = _existing_values(conn, valid)
+
+        rows = []
+        for row in valid:
+            errors = []
+            if row["student_number"] in existing_student_numbers:
+                errors.append("شماره دانشجویی قبلاً ثبت شده است")
+            if row["national_code"] in existing_national_codes:
+                errors.append("کد ملی قبلاً ثبت شده است")
+            if errors:
+                report.add_error(row["line"], row["student_number"], errors)
+            else:
+                rows.append(row)
+
+        report.valid += len(rows)
+        if dry_run or not rows:
+            continue
+
+        # ۳. هش موازی رمزها (رمز = شماره دانشجویی، مانند register_user)
+        hashes = hasher.hash_many([row["student_number"][:72] for row in rows])
+        for row, hashed_password in zip(rows, hashes):
+            row["hashed_password"] = hashed_password
+
+        # ۴. INSERT چندردیفی در یک تراکنش
+        _write_chunk(bind, rows, role_id, report)
+
+    report.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return report
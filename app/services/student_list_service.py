@@ -0,0 +1,358 @@
+# app/services/student_list_service.py
+"""
+لیست دانشجویان برای ادمین: صفحه‌بندی keyset، فیلتر و انتخاب ستون‌ها.
+
+به جای بارگذاری همه StudentProfileها، فقط ستون‌های خواسته‌شده (fields) با
+یک SELECT خوانده می‌شوند و جدول users فقط وقتی JOIN می‌شود که یکی از
+ستون‌ها، فیلترها یا کلید مرتب‌سازی به آن نیاز داشته باشد.
+
+با Accept: application/x-ndjson همه ردیف‌های بعد از cursor به صورت جریانی
+(stream_students_ndjson) و بدون ساختن لیست کامل در حافظه برگردانده می‌شوند.
+
+جستجوی پیشوندی (typeahead) روی شماره دانشجویی، کد ملی و تلفن هم اینجاست.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, and_, func, or_, select, type_coerce
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.core.database import engine, get_dialect_name
+from app.core.responses import NDJSON_BATCH_SIZE, iter_ndjson
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.schemas.student import StudentListRow
+from app.services.audit_export_service import iter_export_batches
+
+# ستون‌های قابل انتخاب در fields
+STUDENT_FIELDS = {
+    "id": StudentProfile.id,
+    "user_id": StudentProfile.user_id,
+    "student_number": User.student_number,
+    "national_code": StudentProfile.national_code,
+    "phone_number": StudentProfile.phone_number,
+    "gender": StudentProfile.gender,
+    "address": StudentProfile.address,
+    "is_active": User.is_active,
+    "created_at": StudentProfile.created_at,
+    "updated_at": StudentProfile.updated_at,
+}
+
+# کلیدهای مرتب‌سازی (همه روی ایندکس)؛ "-" یعنی نزولی
+STUDENT_SORT_KEYS = {
+    "created_at": StudentProfile.created_at,  # ix_student_profiles_created_at_id
+    "student_number": User.student_number,  # ix_users_student_number
+    "national_code": StudentProfile.national_code,  # ix_student_profiles_national_code
+}
+DEFAULT_STUDENT_SORT = "-created_at"
+
+# سریال‌ساز از پیش ساخته‌شده هر ردیف NDJSON (بدون اعتبارسنجی ردیف‌ها)
+STUDENT_ROW_ADAPTER = TypeAdapter(StudentListRow)
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """تبدیل "id,student_number" به لیست ستون‌ها؛ خالی یعنی همه ستون‌ها"""
+    names = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in STUDENT_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ستون نامعتبر: {', '.join(unknown)} (مجاز: {', '.join(STUDENT_FIELDS)})",
+        )
+    return list(dict.fromkeys(names)) or list(STUDENT_FIELDS)
+
+
+def parse_sort(sort: Optional[str]) -> Tuple[str, bool]:
+    """(کلید، نزولی؟)"""
+    sort = sort or DEFAULT_STUDENT_SORT
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in STUDENT_SORT_KEYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"مرتب‌سازی نامعتبر: {sort} (مجاز: {', '.join(STUDENT_SORT_KEYS)})",
+        )
+    return key, descending
+
+
+def _sort_column(sort_key: str, dialect_name: str):
+    """
+    ستون مرتب‌سازی
+
+    SQLite تاریخ پیش‌فرض (CURRENT_TIMESTAMP) را بدون میکروثانیه ذخیره می‌کند ولی
+    پارامتر datetime با میکروثانیه bind می‌شود؛ پس created_at به صورت متن خام
+    خوانده و مقایسه می‌شود تا شرط تساوی cursor درست کار کند (بدون CAST، با ایندکس).
+    """
+    column = STUDENT_SORT_KEYS[sort_key]
+    if dialect_name == "sqlite" and sort_key == "created_at":
+        return type_coerce(column, String)
+    return column
+
+
+def encode_student_cursor(sort_key: str, value, student_id: int) -> str:
+    """cursor مبهم از (کلید مرتب‌سازی، مقدار آن، id) آخرین ردیف صفحه"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_key, value, student_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_student_cursor(cursor: str, sort_key: str, dialect_name: str = "sqlite") -> tuple:
+    """بازگرداندن (مقدار کلید، id)؛ cursor باید با همان مرتب‌سازی ساخته شده باشد"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, value, student_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if key != sort_key:
+            raise ValueError(key)
+        if sort_key == "created_at" and dialect_name != "sqlite":
+            value = datetime.fromisoformat(value)
+        return value, int(student_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor نامعتبر است",
+        )
+
+
+def _after_cursor(column, descending: bool, value, student_id: int):
+    """شرط keyset با ترتیب (column, id)؛ شرط اول برای range روی ایندکس است"""
+    value = type_coerce(value, column.type)
+    if descending:
+        return and_(
+            column <= value,
+            or_(column < value, and_(column == value, StudentProfile.id < student_id)),
+        )
+    return and_(
+        column >= value,
+        or_(column > value, and_(column == value, StudentProfile.id > student_id)),
+    )
+
+
+def _student_filters(
+        gender: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+) -> List:
+    filters = []
+    if gender:
+        filters.append(StudentProfile.gender == gender)
+    if is_active is not None:
+        filters.append(User.is_active == is_active)
+    if created_from:
+        filters.append(StudentProfile.created_at >= created_from)
+    if created_to:
+        filters.append(StudentProfile.created_at <= created_to)
+    return filters
+
+
+def _uses_users(*columns) -> bool:
+    return any(column.table is User.__table__ for column in columns)
+
+
+def _students_query(
+        fields: List[str],
+        filters: List,
+        sort_key: str,
+        descending: bool,
+        cursor: Optional[str],
+        limit: Optional[int],
+        join_user: bool = False,
+        dialect_name: str = "sqlite",
+):
+    """SELECT فقط ستون‌های لازم + id و کلید مرتب‌سازی (برای cursor)؛ limit=None یعنی همه ردیف‌ها"""
+    sort_column = _sort_column(sort_key, dialect_name)
+    columns = [STUDENT_FIELDS[name].label(name) for name in fields]
+    columns += [StudentProfile.id.label("_id"), sort_column.label("_sort")]
+
+    query = select(*columns).select_from(StudentProfile)
+    if join_user or _uses_users(STUDENT_SORT_KEYS[sort_key], *(STUDENT_FIELDS[name] for name in fields)):
+        query = query.join(User, User.id == StudentProfile.user_id)
+
+    query = query.where(*filters)
+    if cursor:
+        value, student_id = decode_student_cursor(cursor, sort_key, dialect_name)
+        query = query.where(_after_cursor(sort_column, descending, value, student_id))
+
+    if descending:
+        order_by = [sort_column.desc(), StudentProfile.id.desc()]
+    else:
+        order_by = [sort_column.asc(), StudentProfile.id.asc()]
+
+    query = query.order_by(*order_by)
+    if limit is None:
+        return query
+    # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+    return query.limit(limit + 1)
+
+
+def _students_count_query(filters: List, join_user: bool = False):
+    query = select(func.count(StudentProfile.id)).select_from(StudentProfile)
+    if join_user:
+        query = query.join(User, User.id == StudentProfile.user_id)
+    return query.where(*filters)
+
+
+def list_students(
+        db: Session,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        gender: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        sort: Optional[str] = None,
+        fields: Optional[str] = None,
+        include_total: bool = False,
+) -> Dict:
+    """
+    یک صفحه از لیست دانشجویان
+
+    Args:
+        cursor: مقدار next_cursor صفحه قبل (با همان sort)
+        sort: created_at / student_number / national_code؛ با "-" نزولی (پیش‌فرض -created_at)
+        fields: ستون‌های خروجی با کاما (پیش‌فرض همه STUDENT_FIELDS)
+        include_total: اجرای COUNT (برای جدول‌های بزرگ پرهزینه است)
+
+    Returns:
+        {"students": List[dict], "total": int | None, "limit": int,
+         "has_more": bool, "next_cursor": str | None}
+    """
+    names = parse_fields(fields)
+    sort_key, descending = parse_sort(sort)
+    filters = _student_filters(gender, is_active, created_from, created_to)
+    join_user = is_active is not None  # فیلترهای روی جدول users
+
+    total = db.scalar(_students_count_query(filters, join_user)) if include_total else None
+    query = _students_query(names, filters, sort_key, descending, cursor, limit, join_user, get_dialect_name(db))
+    rows = db.execute(query).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]._mapping
+        next_cursor = encode_student_cursor(sort_key, last["_sort"], last["_id"])
+
+    return {
+        "students": [{name: row._mapping[name] for name in names} for row in rows],
+        "total": total,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+    }
+
+
+def stream_students_ndjson(
+        cursor: Optional[str] = None,
+        gender: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        sort: Optional[str] = None,
+        fields: Optional[str] = None,
+        batch_size: int = NDJSON_BATCH_SIZE,
+        bind=engine,
+) -> Iterator[bytes]:
+    """
+    همه دانشجویان بعد از cursor (بدون limit) به صورت NDJSON، یک ردیف در هر خط
+
+    پارامترها و ترتیب مثل list_students است. ورودی‌ها همین‌جا بررسی می‌شوند
+    (HTTPException قبل از شروع پاسخ) و ردیف‌ها سپس دسته به دسته از یک
+    server-side cursor خوانده می‌شوند.
+    """
+    names = parse_fields(fields)
+    sort_key, descending = parse_sort(sort)
+    filters = _student_filters(gender, is_active, created_from, created_to)
+    join_user = is_active is not None
+    query = _students_query(names, filters, sort_key, descending, cursor, None, join_user, get_dialect_name(bind))
+
+    count = len(names)
+    dump_json = STUDENT_ROW_ADAPTER.dump_json
+
+    def dump(row) -> bytes:
+        # ستون‌های اول ردیف همان fields هستند (_id و _sort بعد از آن‌ها)
+        return dump_json(dict(zip(names, row[:count])))
+
+    return iter_ndjson(iter_export_batches(query, batch_size, bind), dump)
+
+
+# ----------------------------
+# جستجوی پیشوندی (typeahead)
+# ----------------------------
+# هر ستون ایندکس B-tree دارد؛ پیشوند به بازه column >= q AND column < q_next
+# تبدیل می‌شود که در SQLite و PostgreSQL مستقیماً از ایندکس خوانده می‌شود
+# (برخلاف LIKE 'q%' که در SQLite بدون case_sensitive_like از ایندکس استفاده نمی‌کند).
+STUDENT_SEARCH_FIELDS = {
+    "student_number": User.student_number,  # ix_users_student_number
+    "national_code": StudentProfile.national_code,  # ix_student_profiles_national_code
+    "phone_number": StudentProfile.phone_number,  # ix_student_profiles_phone_number
+}
+STUDENT_SEARCH_MAX_LENGTH = 20
+
+# ارقام فارسی و عربی به انگلیسی
+_DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+
+
+def normalize_prefix(q: Optional[str]) -> str:
+    return (q or "").translate(_DIGITS).strip()[:STUDENT_SEARCH_MAX_LENGTH]
+
+
+def _prefix_upper(prefix: str) -> str:
+    """کوچک‌ترین رشته بزرگ‌تر از همه رشته‌های با این پیشوند"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _prefix_query(field: str, prefix: str, limit: int):
+    column = STUDENT_SEARCH_FIELDS[field]
+    return (
+        select(
+            StudentProfile.id,
+            StudentProfile.user_id,
+            User.student_number,
+            StudentProfile.national_code,
+            StudentProfile.phone_number,
+            StudentProfile.gender,
+        )
+        .select_from(StudentProfile)
+        .join(User, User.id == StudentProfile.user_id)
+        .where(column >= prefix, column < _prefix_upper(prefix))
+        .order_by(column)
+        .limit(limit)
+    )
+
+
+def search_students(db: Session, q: str, limit: int = 10, field: Optional[str] = None) -> List[Dict]:
+    """
+    جستجوی پیشوندی دانشجویان (برای typeahead)
+
+    هر ستون با یک کوئری بازه‌ای روی ایندکس خودش جستجو می‌شود؛ نتایج به ترتیب
+    ستون‌ها (شماره دانشجویی، کد ملی، تلفن) و بدون تکرار برگردانده می‌شوند.
+
+    Args:
+        q: پیشوند (ارقام فارسی هم پذیرفته می‌شود)
+        field: محدود کردن به یکی از STUDENT_SEARCH_FIELDS
+    """
+    prefix = normalize_prefix(q)
+    if not prefix:
+        return []
+    if field is not None and field not in STUDENT_SEARCH_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ستون جستجو نامعتبر: {field} (مجاز: {', '.join(STUDENT_SEARCH_FIELDS)})",
+        )
+
+    results: Dict[int, Dict] = {}
+    for name in [field] if field else STUDENT_SEARCH_FIELDS:
+        remaining = limit - len(results)
+        if remaining <= 0:
+            break
+        # ردیف‌های تکراری (مثلاً تطابق در دو ستون) جای نتیجه جدید را نگیرند
+        for row in db.execute(_prefix_query(name, prefix, remaining + len(results))):
+            if row.id not in results and len(results) < limit:
+                results[row.id] = {**row._mapping, "matched": name}
+    return list(results.values())
@@ -0,0 +1,265 @@
+# app/services/student_number_filter.py
+"""
+Bloom filter شماره‌های دانشجویی ثبت‌شده برای /auth/check/{student_number}.
+
+فرم ثبت‌نام با هر کلید این endpoint را صدا می‌زند. اگر شماره در فیلتر نباشد
+قطعاً ثبت نشده و بدون دیتابیس «آزاد» برگردانده می‌شود؛ فقط وقتی فیلتر «شاید»
+بگوید، با کوئری روی ایندکس student_number تأیید می‌شود.
+
+فیلتر هنگام شروع برنامه ساخته می‌شود و به‌روز می‌ماند:
+    - هر User ساخته‌شده یا با شماره دانشجویی تغییر یافته از طریق ORM (ثبت‌نام،
+      create_simple_user، create-test-user، create_admin و ...) بعد از commit
+      با رویداد after_commit سشن اضافه می‌شود (مثل principal_cache)
+    - insertهای core ورود گروهی مستقیماً add_many را صدا می‌زنند
+    - کاربرانی که پردازه‌های دیگر ساخته‌اند با sync افزایشی
+      (SELECT ... WHERE id > آخرین id دیده‌شده، روی کلید اصلی) خوانده می‌شوند؛
+      /auth/check قبل از پاسخ «آزاد» اگر از آخرین sync بیش از
+      STUDENT_FILTER_SYNC_INTERVAL ثانیه گذشته باشد sync می‌کند (0 = هر بار)
+
+کاربران حذف‌شده فقط مثبت کاذب می‌سازند (که با دیتابیس رد می‌شوند). تغییر
+شماره دانشجویی یک کاربر موجود در پردازه دیگر id جدیدی نمی‌سازد و تا rebuild
+بعدی دیده نمی‌شود.
+"""
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+STUDENT_FILTER_ENABLED = os.getenv("STUDENT_FILTER_ENABLED", "true").lower() in ("1", "true", "yes")
+STUDENT_FILTER_FP_RATE = float(os.getenv("STUDENT_FILTER_FP_RATE", 0.01))  # نرخ مثبت کاذب هدف
+STUDENT_FILTER_MIN_CAPACITY = int(os.getenv("STUDENT_FILTER_MIN_CAPACITY", 10000))
+STUDENT_FILTER_GROWTH = float(os.getenv("STUDENT_FILTER_GROWTH", 2.0))  # ظرفیت = تعداد فعلی × رشد
+STUDENT_FILTER_BATCH_SIZE = int(os.getenv("STUDENT_FILTER_BATCH_SIZE", 10000))
+STUDENT_FILTER_SYNC_INTERVAL = float(os.getenv("STUDENT_FILTER_SYNC_INTERVAL", 1.0))  # ثانیه
+
+
+class BloomFilter:
+    """Bloom filter با k هش از روی یک blake2b (double hashing)"""
+
+    def __init__(self, capacity: int, fp_rate: float = STUDENT_FILTER_FP_RATE):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))  # بیت
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def estimated_fp_rate(self) -> float:
+        """نرخ مثبت کاذب مورد انتظار با تعداد فعلی اعضا"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class StudentNumberFilter:
+    """فیلتر شماره‌های دانشجویی همراه با متریک‌ها"""
+
+    def __init__(self, fp_rate: float = STUDENT_FILTER_FP_RATE):
+        self.fp_rate = fp_rate
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+        self._pending: Optional[list] = None  # افزوده‌ها در حین rebuild
+        self.built_at: Optional[float] = None
+        self.build_seconds = 0.0
+        self.max_user_id = 0  # بزرگ‌ترین users.id خوانده‌شده از دیتابیس (rebuild/sync)
+        self.synced_at = 0.0  # time.monotonic آخرین sync
+
+        # متریک‌ها
+        self.syncs = 0
+        self.synced_items = 0
+        self.checks = 0
+        self.definite_negatives = 0  # پاسخ بدون دیتابیس
+        self.db_confirmations = 0
+        self.false_positives = 0  # «شاید» که در دیتابیس نبود
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def rebuild(self, bind=engine, batch_size: int = STUDENT_FILTER_BATCH_SIZE):
+        """ساخت دوباره فیلتر از جدول users (جریانی، بدون بارگذاری همه ردیف‌ها)"""
+        started = time.perf_counter()
+        with self._lock:
+            self._pending = []
+
+        synced_at = time.monotonic()
+        max_user_id = 0
+        try:
+            with bind.connect() as conn:
+                total = conn.scalar(select(func.count(User.id))) or 0
+                bloom = BloomFilter(
+                    max(STUDENT_FILTER_MIN_CAPACITY, int(total * STUDENT_FILTER_GROWTH)),
+                    self.fp_rate,
+                )
+                result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+                    select(User.id, User.student_number)
+                )
+                for partition in result.partitions():
+                    for user_id, student_number in partition:
+                        bloom.add(student_number)
+                        if user_id > max_user_id:
+                            max_user_id = user_id
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for student_number in self._pending:
+                bloom.add(student_number)
+            self._pending = None
+            self._bloom = bloom
+            self.max_user_id = max_user_id
+            self.synced_at = synced_at
+
+        self.build_seconds = round(time.perf_counter() - started, 3)
+        self.built_at = time.time()
+        logger.info(f"✅ Student number filter built: {bloom.count} items in {self.build_seconds}s")
+
+    def add(self, student_number: str):
+        """افزودن شماره دانشجویی تازه ثبت‌شده"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(student_number)
+            if self._bloom is not None:
+                self._bloom.add(student_number)
+
+    def add_many(self, student_numbers: Iterable[str]):
+        for student_number in student_numbers:
+            self.add(student_number)
+
+    # ---------- sync افزایشی با دیتابیس ----------
+    def needs_sync(self, interval: float = STUDENT_FILTER_SYNC_INTERVAL) -> bool:
+        """آیا ممکن است پردازه دیگری از آخرین sync کاربری ساخته باشد که هنوز دیده نشده؟"""
+        return self._bloom is not None and time.monotonic() - self.synced_at >= interval
+
+    def _sync_query(self):
+        return select(User.id, User.student_number).where(User.id > self.max_user_id).order_by(User.id)
+
+    def _apply_sync(self, rows, started: float):
+        with self._lock:
+            if self._bloom is None:
+                return
+            for user_id, student_number in rows:
+                self._bloom.add(student_number)
+                if user_id > self.max_user_id:
+                    self.max_user_id = user_id
+            self.synced_at = max(self.synced_at, started)
+            self.syncs += 1
+            self.synced_items += len(rows)
+
+    def sync(self, bind=engine):
+        """افزودن کاربرانی که بعد از آخرین rebuild/sync (مثلاً در پردازه‌های دیگر) ساخته شده‌اند"""
+        started = time.monotonic()
+        with bind.connect() as conn:
+            rows = conn.execute(self._sync_query()).all()
+        self._apply_sync(rows, started)
+
+    async def sync_async(self, db: AsyncSession):
+        """نسخه async از sync با سشن درخواست"""
+        started = time.monotonic()
+        rows = (await db.execute(self._sync_query())).all()
+        self._apply_sync(rows, started)
+
+    def might_contain(self, student_number: str) -> bool:
+        """False یعنی قطعاً ثبت نشده؛ True یعنی باید با دیتابیس تأیید شود"""
+        self.checks += 1
+        bloom = self._bloom
+        if bloom is not None and student_number not in bloom:
+            self.definite_negatives += 1
+            return False
+        self.db_confirmations += 1
+        return True
+
+    def record_confirmation(self, exists: bool):
+        """نتیجه تأیید دیتابیس (برای نرخ مثبت کاذب مشاهده‌شده)"""
+        if not exists and self._bloom is not None:
+            self.false_positives += 1
+
+    def stats(self) -> Dict:
+        bloom = self._bloom
+        negatives = self.definite_negatives + self.false_positives
+        return {
+            "enabled": STUDENT_FILTER_ENABLED,
+            "ready": bloom is not None,
+            "items": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else 0,
+            "size_bytes": len(bloom.bits) if bloom else 0,
+            "hash_count": bloom.hash_count if bloom else 0,
+            "target_fp_rate": self.fp_rate,
+            "estimated_fp_rate": round(bloom.estimated_fp_rate(), 6) if bloom else None,
+            # از بین شماره‌های ثبت‌نشده، چه کسری به اشتباه به دیتابیس رفتند
+            "observed_fp_rate": round(self.false_positives / negatives, 6) if negatives else None,
+            "checks": self.checks,
+            "definite_negatives": self.definite_negatives,
+            "db_confirmations": self.db_confirmations,
+            "false_positives": self.false_positives,
+            "needs_rebuild": bool(bloom and bloom.count > bloom.capacity),
+            "build_seconds": self.build_seconds,
+            "built_at": self.built_at,
+            "max_user_id": self.max_user_id,
+            "sync_interval": STUDENT_FILTER_SYNC_INTERVAL,
+            "syncs": self.syncs,
+            "synced_items": self.synced_items,
+        }
+
+
+student_number_filter = StudentNumberFilter()
+
+
+# ----------------------------
+# به‌روزرسانی با رویدادهای Session
+# ----------------------------
+_PENDING_KEY = "student_number_filter_added"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_student_numbers(session, flush_context):
+    """شماره دانشجویی Userهای جدید یا با شماره تغییر یافته"""
+    pending = None
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, User):
+            continue
+        if obj not in session.new and not inspect(obj).attrs.student_number.history.has_changes():
+            continue
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, [])
+        pending.append(obj.student_number)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_student_numbers(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        student_number_filter.add_many(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_student_numbers(session):
+    session.info.pop(_PENDING_KEY, None)
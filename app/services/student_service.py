@@ -1,30 +1,73 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException
 
 from app.models.student_profile import StudentProfile
-from app.models.user import User
+from app.core.principal_cache import Principal
 from app.schemas.student import StudentProfileOut, StudentProfileUpdate
+from app.schemas.user import UserOut
+from app.services.profile_cache import profile_cache
 
 
-def get_my_profile(db: Session, current_user: User) -> StudentProfileOut:
+def get_profile_payload(db: Session, user_id: int) -> Optional[dict]:
     """
-    دریافت پروفایل دانشجویی کاربر جاری.
+    پروفایل کاربر به شکل JSON خروجی StudentProfileOut (از profile_cache یا دیتابیس)؛
+    None اگر کاربر پروفایل ندارد.
     """
+    cached = profile_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = profile_cache.generation(user_id)
     profile = (
         db.query(StudentProfile)
-        .filter(StudentProfile.user_id == current_user.id)
+        .filter(StudentProfile.user_id == user_id)
         .first()
     )
-
     if not profile:
+        return None
+
+    payload = StudentProfileOut.model_validate(profile).model_dump(mode="json")
+    profile_cache.set(user_id, payload, generation)
+    return payload
+
+
+def get_my_profile(db: Session, current_user: Principal) -> StudentProfileOut:
+    """
+    دریافت پروفایل دانشجویی کاربر جاری.
+    در صورت وجود در profile_cache هیچ کوئری‌ای اجرا نمی‌شود.
+    """
+    payload = get_profile_payload(db, current_user.id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="پروفایل یافت نشد")
+    return StudentProfileOut.model_validate(payload)
 
-    return StudentProfileOut.model_validate(profile)
+
+def get_user_out(db: Session, principal: Principal) -> UserOut:
+    """
+    اطلاعات هویتی کاربر جاری (principal) همراه با خلاصه پروفایل (/users/me).
+    کاربر بدون پروفایل (profile_id خالی) کوئری پروفایل ندارد.
+    """
+    profile = get_profile_payload(db, principal.id) if principal.profile_id is not None else None
+    return _user_out(principal, profile)
+
+
+def _user_out(principal: Principal, profile: Optional[dict]) -> UserOut:
+    return UserOut(
+        id=principal.id,
+        student_number=principal.student_number,
+        role_id=principal.role_id,
+        is_active=principal.is_active,
+        profile=profile,
+    )
 
 
 def update_my_profile(
     db: Session,
-    current_user: User,
+    current_user: Principal,
     data: StudentProfileUpdate
 ) -> StudentProfileOut:
     """
@@ -46,3 +89,71 @@ def update_my_profile(
     db.refresh(profile)
 
     return StudentProfileOut.model_validate(profile)
+
+
+# ---------------- ASYNC ----------------
+
+async def get_profile_payload_async(db: AsyncSession, user_id: int) -> Optional[dict]:
+    """
+    نسخه async get_profile_payload؛ دسترسی به backend مسدودکننده کش (sqlite)
+    بیرون از event loop انجام می‌شود.
+    """
+    cached = await profile_cache.get_async(user_id)
+    if cached is not None:
+        return cached
+
+    generation = await profile_cache.generation_async(user_id)
+    profile = await db.scalar(
+        select(StudentProfile)
+        .options(joinedload(StudentProfile.user))  # student_number در StudentProfileOut
+        .where(StudentProfile.user_id == user_id)
+    )
+    if not profile:
+        return None
+
+    payload = StudentProfileOut.model_validate(profile).model_dump(mode="json")
+    await profile_cache.set_async(user_id, payload, generation)
+    return payload
+
+
+async def get_my_profile_async(db: AsyncSession, current_user: Principal) -> StudentProfileOut:
+    """
+    دریافت پروفایل دانشجویی کاربر جاری (async).
+    در صورت وجود در profile_cache هیچ کوئری‌ای اجرا نمی‌شود.
+    """
+    payload = await get_profile_payload_async(db, current_user.id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="پروفایل یافت نشد")
+    return StudentProfileOut.model_validate(payload)
+
+
+async def get_user_out_async(db: AsyncSession, principal: Principal) -> UserOut:
+    """اطلاعات هویتی کاربر جاری همراه با خلاصه پروفایل (async، /auth/me)"""
+    profile = await get_profile_payload_async(db, principal.id) if principal.profile_id is not None else None
+    return _user_out(principal, profile)
+
+
+async def update_my_profile_async(
+    db: AsyncSession,
+    current_user: Principal,
+    data: StudentProfileUpdate
+) -> StudentProfileOut:
+    """
+    بروزرسانی پروفایل دانشجویی کاربر جاری (async).
+    """
+    profile = await db.scalar(
+        select(StudentProfile)
+        .options(joinedload(StudentProfile.user))  # student_number در StudentProfileOut
+        .where(StudentProfile.user_id == current_user.id)
+    )
+
+    if not profile:
+        raise HTTPException(status_code=404, detail="پروفایل یافت نشد")
+
+    for field, value in data.model_dump(exclude_unset=True).items():
+        setattr(profile, field, value)
+
+    await db.commit()
+    await db.refresh(profile)
+
+    return StudentProfileOut.model_validate(profile)